@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from .disk_cache import CACHE_DIR
+from .tracing import increment
+
+SIMILARITY_THRESHOLD = float(os.environ.get("ANSWER_CACHE_SIMILARITY", "0.95"))
+TTL_SECONDS = float(os.environ.get("ANSWER_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", "5000"))
+
+def context_source(doc):
+    """Return the document name a context chunk came from."""
+    metadata = getattr(doc, 'metadata', None) or {}
+    return metadata.get('original_metadata', {}).get('source') or metadata.get('source', 'unknown')
+
+def context_key(context):
+    """Fingerprint the ordered context set; citation numbers depend on the order."""
+    digest = hashlib.sha256()
+    for doc in context:
+        content = doc.page_content if hasattr(doc, 'page_content') else str(doc)
+        digest.update(context_source(doc).encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(hashlib.sha256(content.encode("utf-8")).digest())
+    return digest.hexdigest()
+
+class SemanticAnswerCache:
+    """Persistent cache of generated answers, looked up by question similarity.
+
+    An entry is reused only when the new question's embedding is within the
+    similarity threshold of a cached question and the retrieved context is
+    identical, so citations and source_details stay valid. Entries expire after
+    a TTL, the least recently used are evicted when full, and every entry built
+    on a document is dropped when that document is re-ingested.
+    """
+
+    def __init__(self, path=None, similarity_threshold=SIMILARITY_THRESHOLD, ttl_seconds=TTL_SECONDS, max_entries=MAX_ENTRIES):
+        self.path = path or os.path.join(CACHE_DIR, "answers.sqlite3")
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, question TEXT NOT NULL, "
+                "embedding BLOB NOT NULL, context_key TEXT NOT NULL, result TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS answers_context ON answers (context_key)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS answers_accessed ON answers (accessed_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answer_sources ("
+                "answer_id INTEGER NOT NULL, source TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS answer_sources_source ON answer_sources (source)")
+
+    def _delete(self, where, params):
+        ids = [(row[0],) for row in self._conn.execute(f"SELECT id FROM answers WHERE {where}", params)]
+        self._conn.executemany("DELETE FROM answer_sources WHERE answer_id = ?", ids)
+        self._conn.executemany("DELETE FROM answers WHERE id = ?", ids)
+        return len(ids)
+
+    def lookup(self, question_embedding, context):
+        """Return the cached result for a similar question over the same context, or None."""
+        key = context_key(context)
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, embedding, result FROM answers WHERE context_key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds)
+            ).fetchall()
+            if rows:
+                query = np.asarray(question_embedding, dtype=np.float32)
+                candidates = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                norms = np.linalg.norm(candidates, axis=1) * np.linalg.norm(query)
+                similarities = candidates @ query / np.where(norms == 0, 1.0, norms)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    with self._conn:
+                        self._conn.execute("UPDATE answers SET accessed_at = ? WHERE id = ?", (now, rows[best][0]))
+                    self.hits += 1
+                    increment("rag_cache_lookups_total", cache="answer", result="hit")
+                    return json.loads(rows[best][2])
+            self.misses += 1
+            increment("rag_cache_lookups_total", cache="answer", result="miss")
+            return None
+
+    def store(self, question, question_embedding, context, result):
+        """Cache a generated result for this question and context; empty answers are never cached."""
+        if not (result.get('answer') or "").strip():
+            return
+        now = time.time()
+        embedding = np.asarray(question_embedding, dtype=np.float32).tobytes()
+        sources = {context_source(doc) for doc in context}
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO answers (question, embedding, context_key, result, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (question, embedding, context_key(context), json.dumps(result), now, now)
+            )
+            self._conn.executemany(
+                "INSERT INTO answer_sources (answer_id, source) VALUES (?, ?)",
+                [(cursor.lastrowid, source) for source in sources]
+            )
+            self._delete("created_at < ?", (now - self.ttl_seconds,))
+            count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            if count > self.max_entries:
+                self._delete(
+                    "id IN (SELECT id FROM answers ORDER BY accessed_at ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+    def invalidate_sources(self, sources):
+        """Drop every cached answer that used one of `sources`; return how many were removed."""
+        sources = list(sources)
+        if not sources:
+            return 0
+        placeholders = ",".join("?" * len(sources))
+        with self._lock, self._conn:
+            removed = self._delete(
+                f"id IN (SELECT answer_id FROM answer_sources WHERE source IN ({placeholders}))",
+                sources
+            )
+        if removed:
+            print(f"🗑️ Invalidated {removed} cached answers for re-ingested documents")
+        return removed
+
+    def answers(self):
+        """Return the answer text of every unexpired cached entry."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM answers WHERE created_at >= ?", (time.time() - self.ttl_seconds,)
+            ).fetchall()
+        return [json.loads(row[0]).get('answer', '') for row in rows]
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached answers."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,46 +1,87 @@
 import os
+import sys
+import logging
 import argparse
-from .loaders import load_pdf, load_html
-from .splitter import split_text
-from .vector_store import get_chroma_client, create_collection, add_documents_to_collection
-from .embeddings import get_embedding_function
-from .retriever import Retriever
-from .generator import generate_answer
-from .translator import translate_to_english, translate_from_english
-
-def ingest_documents(file_path, url):
-    """Ingest documents from a file or URL."""
-    if file_path:
-        documents = load_pdf(file_path)
-    elif url:
-        documents = load_html(url)
-    else:
-        return
+from .import_report import start_import_report
 
-    chunks = split_text(documents)
-    client = get_chroma_client()
-    collection = create_collection(client)
-    embedding_function = get_embedding_function()
-    add_documents_to_collection(collection, chunks, embedding_function)
-    print("Documents ingested successfully.")
+# Started before the package imports below so their cost shows up in the report
+start_import_report()
+
+from .loaders import load_html
+from .splitter import iter_split
+from .ingest import DEFAULT_BATCH_SIZE, IngestCheckpoint, count_pages, file_fingerprint, find_ingestable_files, ingest_files, iter_file_chunks, stream_chunks_to_collection
+from .resources import get_shared_answer_cache, get_shared_collection, get_shared_embedding_function, get_shared_lexical_index, shutdown_resources
+from .language_detect import detect_language
+from .pipeline import answer_question
+from .batch import DEFAULT_CHUNK_SIZE, DEFAULT_CONCURRENCY, run_ask_batch
+from .translator import pretranslate_answers
+from .tracing import span, trace_request
 
-def ask_question(question, lang='en'):
-    """Ask a question and get an answer."""
-    if lang != 'en':
-        question = translate_to_english(question, lang)
+# Pipeline stage messages are logged at INFO; set LOG_LEVEL=INFO to see them
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "WARNING")
 
-    retriever = Retriever()
-    context_docs = retriever.query(question)
+def ingest_documents(file_path, url, batch_size=DEFAULT_BATCH_SIZE, resume=True, workers=None):
+    """Ingest documents from a file or URL.
+
+    A file is streamed: its pages are extracted (large PDFs by `workers`
+    processes in page ranges), split and embedded batch by batch.
+    """
+    if not (file_path or url):
+        return
+    with trace_request("ingest", source=file_path or url) as request:
+        checkpoint = None
+        if file_path:
+            request.set(pages=count_pages(file_path))
+            checkpoint = IngestCheckpoint(file_path, file_fingerprint(file_path))
+            if not resume:
+                checkpoint.clear()
+            chunks = iter_file_chunks(file_path, workers=workers)
+        else:
+            with span("load") as load_span:
+                documents = load_html(url) or []
+                load_span.set(pages=len(documents))
+            chunks = iter_split(documents)
+        collection = get_shared_collection()
+        embedding_function = get_shared_embedding_function()
+        with span("store") as store_span:
+            stats = stream_chunks_to_collection(collection, chunks, embedding_function, batch_size, checkpoint, lexical_index=get_shared_lexical_index())
+            store_span.set(written=stats.chunks_written, skipped=stats.chunks_skipped, deleted=stats.chunks_deleted)
+        stats.report()
+        get_shared_answer_cache().invalidate_sources(stats.changed_sources)
+    print("Documents ingested successfully.")
 
-    # Create a list of Document objects for the generator
-    context = [doc for doc in context_docs]
+def ingest_many_documents(file_paths, workers=None, batch_size=DEFAULT_BATCH_SIZE, resume=True):
+    """Ingest many files, parsing them in parallel worker processes."""
+    collection = get_shared_collection()
+    embedding_function = get_shared_embedding_function()
+    stats, results = ingest_files(file_paths, collection, embedding_function, workers, batch_size, resume, lexical_index=get_shared_lexical_index())
+    stats.report()
+    get_shared_answer_cache().invalidate_sources(stats.changed_sources)
+    failed = [result for result in results if result.error]
+    print(f"Ingested {len(results) - len(failed)} of {len(results)} files.")
 
-    result = generate_answer(context, question)
+def ask_question(question, lang='en', stream=False):
+    """Ask a question and get an answer.
 
-    if lang != 'en':
-        result['answer'] = translate_from_english(result['answer'], lang)
+    With `stream`, an English answer is printed token by token as Gemini
+    produces it. Answers that still need translating are printed whole.
+    The question's language is detected locally; `lang` is only used when
+    the text itself gives no signal. Every stage is traced under one request.
+    """
+    detected = detect_language(question, lang)
+    if detected != lang:
+        print(f"🌐 Detected language '{detected}' (selected '{lang}')")
 
-    print("Answer:", result['answer'])
+    with trace_request("ask", question_chars=len(question)) as request:
+        if stream:
+            print("Answer: ", end="", flush=True)
+            result = answer_question(question, detected, on_delta=lambda delta: print(delta, end="", flush=True), detect=False)
+            # Cached or translated answers are not streamed and arrive whole
+            print("" if result['streamed'] else result['answer'])
+        else:
+            result = answer_question(question, detected, detect=False)
+            print("Answer:", result['answer'])
+        request.set(lang=result['lang'], cached=result['cached'])
     print("Citations:", result['citations'])
 
 def main():
@@ -49,27 +90,114 @@ def main():
     subparsers = parser.add_subparsers(dest="command")
 
     ingest_parser = subparsers.add_parser("ingest", help="Ingest documents")
-    ingest_parser.add_argument("--file", help="Path to a PDF file")
+    ingest_parser.add_argument("--file", action="append", help="Path to a PDF file (repeat to ingest several files)")
+    ingest_parser.add_argument("--dir", help="Directory whose PDF and HTML files should all be ingested")
     ingest_parser.add_argument("--url", help="URL of an HTML document")
+    ingest_parser.add_argument("--workers", type=int, help="Parser processes; large PDFs are also extracted in parallel page ranges (default: one per CPU)")
+    ingest_parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Number of chunks to embed and write per batch")
+    ingest_parser.add_argument("--no-resume", dest="resume", action="store_false", help="Ignore any checkpoint left by an interrupted run")
 
     ask_parser = subparsers.add_parser("ask", help="Ask a question")
     ask_parser.add_argument("question", help="The question to ask")
     ask_parser.add_argument("--lang", default="en", help="Language of the question (e.g., 'hi' for Hindi)")
+    ask_parser.add_argument("--stream", action="store_true", help="Print the answer as it is generated")
+
+    batch_parser = subparsers.add_parser("ask-batch", help="Answer many questions and write JSONL results")
+    batch_parser.add_argument("input", nargs="?", default="-", help="JSONL, CSV or text file of questions (default: stdin)")
+    batch_parser.add_argument("--output", default="-", help="Where to write JSONL results (default: stdout)")
+    batch_parser.add_argument("--format", dest="input_format", choices=["auto", "jsonl", "csv", "text"], default="auto", help="Input format (default: guess)")
+    batch_parser.add_argument("--lang", default="en", help="Language of questions that do not specify one")
+    batch_parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Answers generated at the same time")
+    batch_parser.add_argument("--batch-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Questions embedded and retrieved together")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the HTTP API server")
+    serve_parser.add_argument("--host", default=None, help="Interface to listen on (default: SERVER_HOST or 0.0.0.0)")
+    serve_parser.add_argument("--port", type=int, default=None, help="Port to listen on (default: SERVER_PORT or 8000)")
+    serve_parser.add_argument("--no-warm", dest="warm", action="store_false", help="Load models on the first request instead of at startup")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Measure per-stage latency offline against local stand-ins")
+    benchmark_parser.add_argument("--output", default="-", help="Where to write the JSON report (default: stdout)")
+    benchmark_parser.add_argument("--pdf", action="append", help="PDF to ingest (repeat for several; default: the bundled PDFs)")
+    benchmark_parser.add_argument("--rounds", type=int, default=3, help="Times to ingest the PDFs and answer every question")
+    benchmark_parser.add_argument("--gemini-latency-ms", type=float, default=None, help="Injected Gemini latency (default: BENCHMARK_GEMINI_LATENCY_MS or 800)")
+    benchmark_parser.add_argument("--tavily-latency-ms", type=float, default=None, help="Injected Tavily latency (default: BENCHMARK_TAVILY_LATENCY_MS or 1200)")
+    benchmark_parser.add_argument("--fake-embeddings", action="store_true", help="Use a hashing embedder instead of the HuggingFace model")
+    benchmark_parser.add_argument("--lang", default="hi", help="Language answers are translated to in the translate stage")
+
+    export_onnx_parser = subparsers.add_parser("export-onnx", help="Export the embedding model to int8 ONNX and check it against PyTorch")
+    export_onnx_parser.add_argument("--output", default=None, help="Directory to write the model to (default: ONNX_MODEL_DIR)")
+    export_onnx_parser.add_argument("--no-check", dest="check", action="store_false", help="Skip the parity and throughput comparison")
+
+    compare_parser = subparsers.add_parser("compare-embeddings", help="Report cosine drift and throughput of the ONNX model against PyTorch")
+    compare_parser.add_argument("--model-dir", default=None, help="Exported ONNX model (default: ONNX_MODEL_DIR)")
+    compare_parser.add_argument("--output", default="-", help="Where to write the JSON report (default: stdout)")
+    compare_parser.add_argument("--texts", type=int, default=256, help="Chunks of the benchmark PDFs to embed")
+
+    pretranslate_parser = subparsers.add_parser("pretranslate", help="Translate cached answers ahead of time")
+    pretranslate_parser.add_argument("--lang", action="append", help="Target language code (repeat for several; default: all supported)")
 
     args = parser.parse_args()
+    logging.basicConfig(level=LOG_LEVEL.upper(), format="%(message)s")
 
-    if args.command == "ingest":
-        if not args.file and not args.url:
-            print("Please provide either a file or a URL to ingest.")
-            return
-        ingest_documents(args.file, args.url)
-    elif args.command == "ask":
-        # Set dummy API keys if not provided, for local testing without actual API calls
-        if "GEMINI_API_KEY" not in os.environ:
-            os.environ["GEMINI_API_KEY"] = "dummy_key"
-        if "TAVILY_API_KEY" not in os.environ:
-            os.environ["TAVILY_API_KEY"] = "dummy_key"
-        ask_question(args.question, args.lang)
+    try:
+        if args.command == "ingest":
+            file_paths = list(args.file or [])
+            if args.dir:
+                file_paths.extend(find_ingestable_files(args.dir))
+            if not file_paths and not args.url:
+                print("Please provide a file, a directory or a URL to ingest.")
+                return
+            if args.url:
+                ingest_documents(None, args.url, args.batch_size, args.resume)
+            if len(file_paths) == 1:
+                ingest_documents(file_paths[0], None, args.batch_size, args.resume, args.workers)
+            elif file_paths:
+                ingest_many_documents(file_paths, args.workers, args.batch_size, args.resume)
+        elif args.command in ("ask", "ask-batch"):
+            # Set dummy API keys if not provided, for local testing without actual API calls
+            if "GEMINI_API_KEY" not in os.environ:
+                os.environ["GEMINI_API_KEY"] = "dummy_key"
+            if "TAVILY_API_KEY" not in os.environ:
+                os.environ["TAVILY_API_KEY"] = "dummy_key"
+            if args.command == "ask-batch":
+                run_ask_batch(args.input, args.output, args.input_format, args.lang, args.concurrency, args.batch_size)
+            else:
+                ask_question(args.question, args.lang, args.stream)
+        elif args.command == "serve":
+            # Imported here so the other commands do not need aiohttp
+            from .server import SERVER_HOST, SERVER_PORT, run_server
+            run_server(args.host or SERVER_HOST, args.port or SERVER_PORT, args.warm)
+        elif args.command == "benchmark":
+            # Imported here so the other commands do not load the stand-ins
+            from .benchmark import FAKE_GEMINI_LATENCY_MS, FAKE_TAVILY_LATENCY_MS, run_benchmark_cli
+            run_benchmark_cli(
+                args.output,
+                pdf_paths=args.pdf,
+                rounds=args.rounds,
+                gemini_latency_ms=FAKE_GEMINI_LATENCY_MS if args.gemini_latency_ms is None else args.gemini_latency_ms,
+                tavily_latency_ms=FAKE_TAVILY_LATENCY_MS if args.tavily_latency_ms is None else args.tavily_latency_ms,
+                fake_embeddings=args.fake_embeddings,
+                translate_lang=args.lang
+            )
+        elif args.command in ("export-onnx", "compare-embeddings"):
+            # Imported here so the other commands do not need onnxruntime
+            from .embeddings import ONNX_MODEL_DIR
+            from .onnx_embeddings import export_onnx_model, run_comparison_cli
+            report = None
+            if args.command == "export-onnx":
+                model_dir = export_onnx_model(args.output or ONNX_MODEL_DIR)
+                if args.check:
+                    report = run_comparison_cli("-", model_dir=model_dir)
+            else:
+                report = run_comparison_cli(args.output, model_dir=args.model_dir or ONNX_MODEL_DIR, limit=args.texts)
+            # A failed parity check must fail the command, so it can gate a release
+            if report is not None and not report['parity']['passed']:
+                sys.exit("❌ ONNX embeddings drift too far from the PyTorch model")
+        elif args.command == "pretranslate":
+            answers = [answer for answer in get_shared_answer_cache().answers() if answer]
+            pretranslate_answers(answers, args.lang)
+    finally:
+        shutdown_resources()
 
 if __name__ == "__main__":
     main()
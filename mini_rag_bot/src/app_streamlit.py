@@ -9,13 +9,14 @@ load_dotenv()
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from tempfile import NamedTemporaryFile
-from mini_rag_bot.src.loaders import load_pdf, load_html
-from mini_rag_bot.src.splitter import split_text
-from mini_rag_bot.src.vector_store import get_chroma_client, create_collection, add_documents_to_collection
-from mini_rag_bot.src.embeddings import get_embedding_function
-from mini_rag_bot.src.retriever import Retriever
-from mini_rag_bot.src.generator import generate_answer
-from mini_rag_bot.src.translator import translate_to_english, translate_from_english
+from mini_rag_bot.src.ingest import ingest_files
+from mini_rag_bot.src.resources import registry, get_shared_answer_cache, get_shared_collection, get_shared_embedding_function, get_shared_lexical_index
+from mini_rag_bot.src.language_detect import detect_language
+from mini_rag_bot.src.pipeline import answer_question
+from mini_rag_bot.src.retriever import web_search_stats
+from mini_rag_bot.src.translator import lang_names
+
+LANGUAGE_CODES = {"English": "en", "Hindi (हिंदी)": "hi", "Bengali (বাংলা)": "bn"}
 
 # Initialize session state for uploaded files tracking
 if "uploaded_files_info" not in st.session_state:
@@ -55,6 +56,20 @@ def main():
         api_status = check_api_keys()
         for status in api_status:
             st.write(status)
+
+        cold_starts = registry.cold_start_times()
+        if cold_starts:
+            with st.expander("⏱️ Warm resources", expanded=False):
+                for key, seconds in cold_starts.items():
+                    st.write(f"{key}: cold start {seconds:.2f}s")
+
+        gate = web_search_stats.snapshot()
+        if gate["skipped_confident"] or gate["searched_concurrently"] or gate["searched_after_low_confidence"]:
+            with st.expander("🌐 Web search gate", expanded=False):
+                st.write(f"Skipped (confident local results): {gate['skipped_confident']}")
+                st.write(f"Searched (recency cues): {gate['searched_concurrently']}")
+                st.write(f"Searched (weak local results): {gate['searched_after_low_confidence']}")
+                st.write(f"Estimated latency saved: {gate['estimated_latency_saved']:.1f}s")
         
         st.header("📚 Document Management")
         uploaded_files = st.file_uploader(
@@ -69,77 +84,66 @@ def main():
                 # Create a status container for detailed progress tracking
                 with st.status("Processing documents...", expanded=True) as status:
                     try:
-                        total_chunks = 0
-                        processed_files = []
-                        
-                        for file_idx, uploaded_file in enumerate(uploaded_files):
-                            st.write(f"📄 Processing file {file_idx + 1}/{len(uploaded_files)}: {uploaded_file.name}")
-                            
-                            # Save uploaded file temporarily
+                        # Save every upload first so the files can be parsed in parallel
+                        tmp_paths = []
+                        source_names = {}
+                        upload_types = {}
+                        for uploaded_file in uploaded_files:
                             with NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.type.split('/')[1]}") as tmp_file:
                                 tmp_file.write(uploaded_file.getvalue())
-                                tmp_file_path = tmp_file.name
-                            
-                            st.write("✅ File uploaded successfully")
+                                tmp_paths.append(tmp_file.name)
+                            source_names[tmp_file.name] = uploaded_file.name
+                            upload_types[tmp_file.name] = uploaded_file.type
+                        st.write(f"✅ {len(tmp_paths)} file(s) uploaded successfully")
 
-                            # Load document based on type
-                            if uploaded_file.type == "application/pdf":
-                                st.write("🔧 Loading PDF document...")
-                                documents = load_pdf(tmp_file_path)
-                                st.write(f"✅ Loaded {len(documents)} pages from PDF")
-                            else:
-                                st.write("🔧 Loading HTML document...")
-                                with open(tmp_file_path, 'r', encoding='utf-8') as f:
-                                    html_content = f.read()
-                                documents = load_html(f"file://{tmp_file_path}")
-                                st.write(f"✅ Loaded HTML document")
+                        st.write("🔧 Parsing documents in parallel and adding them to the vector store...")
+                        collection = get_shared_collection()
+                        embedding_function = get_shared_embedding_function()
 
-                            # Split into chunks
-                            st.write("🔧 Splitting document into chunks...")
-                            chunks = split_text(documents)
-                            st.write(f"✅ Created {len(chunks)} text chunks")
-                            
-                            # Add metadata to chunks for proper citation
-                            for chunk in chunks:
-                                chunk.metadata['source'] = uploaded_file.name
-                                chunk.metadata['file_type'] = uploaded_file.type
-                            
-                            # Initialize vector store components
-                            st.write("🔧 Initializing vector store...")
-                            client = get_chroma_client()
-                            collection = create_collection(client)
-                            embedding_function = get_embedding_function()
-                            
-                            # Add documents to collection
-                            st.write("🔧 Adding documents to vector store...")
-                            add_documents_to_collection(collection, chunks, embedding_function)
-                            st.write("✅ Documents added to vector store")
-                            
-                            # Clean up temporary file
-                            os.remove(tmp_file_path)
-                            
-                            # Track processed file info
-                            file_info = {
-                                'name': uploaded_file.name,
-                                'type': uploaded_file.type,
-                                'chunks': len(chunks),
-                                'pages': len(documents) if uploaded_file.type == "application/pdf" else 1
-                            }
-                            processed_files.append(file_info)
-                            total_chunks += len(chunks)
+                        def report_file_progress(result):
+                            done = len(processed_files) + len(failed_files) + 1
+                            if result.error:
+                                failed_files.append(result.source)
+                                st.write(f"❌ [{done}/{len(tmp_paths)}] {result.source}: {result.error}")
+                                return
+                            st.write(f"✅ [{done}/{len(tmp_paths)}] {result.source}: {result.pages} pages, {result.chunks} chunks ({result.written} new)")
+                            file_type = upload_types[result.file_path]
+                            processed_files.append({
+                                'name': result.source,
+                                'type': file_type,
+                                'chunks': result.chunks,
+                                'pages': result.pages if file_type == "application/pdf" else 1
+                            })
+
+                        processed_files = []
+                        failed_files = []
+                        try:
+                            ingest_stats, _ = ingest_files(
+                                tmp_paths,
+                                collection,
+                                embedding_function,
+                                source_names=source_names,
+                                progress_callback=report_file_progress,
+                                lexical_index=get_shared_lexical_index()
+                            )
+                        finally:
+                            for tmp_path in tmp_paths:
+                                os.remove(tmp_path)
+                        total_chunks = sum(file_info['chunks'] for file_info in processed_files)
+                        get_shared_answer_cache().invalidate_sources(ingest_stats.changed_sources)
                         
                         # Update session state with file information
                         st.session_state.uploaded_files_info.extend(processed_files)
                         
                         # Update status to complete
                         status.update(
-                            label=f"✅ Successfully processed {len(uploaded_files)} document(s)!",
-                            state="complete"
+                            label=f"✅ Successfully processed {len(processed_files)} of {len(uploaded_files)} document(s)!",
+                            state="complete" if not failed_files else "error"
                         )
                         
                         # Show summary
                         st.success(f"🎉 Processing Complete!")
-                        st.info(f"📊 **Summary:**\n- Files processed: {len(uploaded_files)}\n- Total chunks created: {total_chunks}\n- Documents ready for querying!")
+                        st.info(f"📊 **Summary:**\n- Files processed: {len(processed_files)}\n- Total chunks created: {total_chunks}\n- Throughput: {ingest_stats.chunks_per_second:.1f} chunks/s\n- Documents ready for querying!")
                         
                     except Exception as e:
                         status.update(
@@ -169,8 +173,8 @@ def main():
         st.header("🌍 Language Support")
         language = st.selectbox(
             "Select your language:",
-            ["English", "Hindi (हिंदी)", "Bengali (বাংলা)"],
-            help="Ask questions in your preferred language"
+            list(LANGUAGE_CODES),
+            help="Ask questions in your preferred language (detected automatically when the question makes it clear)"
         )
 
     # Initialize chat history
@@ -192,28 +196,37 @@ def main():
         # Generate assistant response
         with st.chat_message("assistant"):
             # Create a status container for detailed progress tracking
+            answer_streamed = False
             with st.status("Processing your question...", expanded=True) as status:
                 try:
-                    # Step 1: Language detection and translation
-                    original_prompt = prompt
-                    if language == "Hindi (हिंदी)":
-                        st.write("🔧 Translating from Hindi to English...")
-                        prompt = translate_to_english(prompt, "hi")
-                        st.write("✅ Translation completed")
-                    elif language == "Bengali (বাংলা)":
-                        st.write("🔧 Translating from Bengali to English...")
-                        prompt = translate_to_english(prompt, "bn")
-                        st.write("✅ Translation completed")
-                    
-                    # Step 2: Initialize retriever and search for context
-                    st.write("🔧 Initializing retrieval system...")
-                    retriever = Retriever()
-                    st.write("✅ Retrieval system ready")
-                    
-                    st.write("🔍 Searching for relevant information...")
-                    context_docs = retriever.query(prompt)
-                    
-                    if not context_docs:
+                    # Detected locally; the selectbox only decides when the text gives no signal
+                    lang = detect_language(prompt, LANGUAGE_CODES[language])
+                    lang_name = lang_names.get(lang, "English")
+                    stage_messages = {
+                        "translate_question": f"🔧 Translating from {lang_name} to English...",
+                        "retrieve": "🔍 Searching for relevant information...",
+                        "generate": "🔧 Generating comprehensive answer...",
+                        "translate_answer": f"🔧 Translating answer to {lang_name}...",
+                    }
+
+                    # English answers are shown token by token as Gemini produces them
+                    answer_view = st.empty()
+                    streamed_parts = []
+
+                    def show_delta(delta):
+                        streamed_parts.append(delta)
+                        answer_view.markdown("### 💬 Answer\n\n" + "".join(streamed_parts))
+
+                    result = answer_question(
+                        prompt, lang,
+                        on_delta=show_delta,
+                        on_stage=lambda stage: st.write(stage_messages[stage]),
+                        generate_without_context=False,
+                        detect=False
+                    )
+                    answer_streamed = result['streamed']
+
+                    if result['answer'] is None:
                         st.write("⚠️ No relevant documents found")
                         status.update(
                             label="⚠️ No relevant information found",
@@ -221,31 +234,12 @@ def main():
                         )
                         response = "I apologize, but I couldn't find relevant information to answer your question. Please try rephrasing your question or upload relevant documents."
                     else:
-                        st.write(f"✅ Found {len(context_docs)} relevant sources")
-                        
-                        # Step 3: Generate answer
-                        st.write("🔧 Generating comprehensive answer...")
-                        result = generate_answer(context_docs, prompt)
-                        answer = result['answer']
-                        st.write("✅ Answer generated successfully")
-                        
-                        # Step 4: Translate back if needed
-                        if language == "Hindi (हिंदी)":
-                            st.write("🔧 Translating answer to Hindi...")
-                            answer = translate_from_english(answer, "hi")
-                            st.write("✅ Translation completed")
-                        elif language == "Bengali (বাংলা)":
-                            st.write("🔧 Translating answer to Bengali...")
-                            answer = translate_from_english(answer, "bn")
-                            st.write("✅ Translation completed")
-                        
+                        st.write(f"✅ Answer generated from {result['context_documents']} relevant sources")
                         status.update(
                             label="✅ Answer ready with citations",
                             state="complete"
                         )
-                        
-                        # Format response with proper citations
-                        response = answer
+                        response = result['answer']
                         
                         # Display citations in a nice format
                         if result.get('citations'):
@@ -299,7 +293,7 @@ def main():
                     response = error_msg
             
             # Display the main answer outside the status container
-            if 'response' in locals() and not response.startswith("❌"):
+            if 'response' in locals() and not response.startswith("❌") and not answer_streamed:
                 st.markdown("### 💬 Answer")
                 st.markdown(response)
         
@@ -0,0 +1,167 @@
+import os
+import sys
+import csv
+import json
+import time
+import itertools
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .ingest import iter_batches
+from .resources import get_shared_retriever
+from .language_detect import detect_language
+from .pipeline import answer_question
+from .translator import translate_batch
+
+# Stay below the model call pool's queue so batch generation never gets rejected
+DEFAULT_CONCURRENCY = int(os.environ.get("ASK_BATCH_CONCURRENCY", "4"))
+DEFAULT_CHUNK_SIZE = int(os.environ.get("ASK_BATCH_SIZE", "32"))
+
+def _detect_format(path, first_line):
+    """Guess the input format from the file extension, or from the first line for stdin."""
+    extension = os.path.splitext(path or "")[1].lower()
+    if extension in (".jsonl", ".json"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    stripped = first_line.strip()
+    # A text question may start with a quote too; only a line that parses is JSONL
+    if stripped.startswith(("{", '"')):
+        try:
+            json.loads(stripped)
+            return "jsonl"
+        except json.JSONDecodeError:
+            pass
+    if "question" in [column.strip().lower() for column in next(csv.reader([first_line]), [])]:
+        return "csv"
+    return "text"
+
+def _parse_jsonl(line):
+    """Return `(row, error)` for one JSONL line; a bare string is the question itself."""
+    try:
+        row = json.loads(line)
+    except json.JSONDecodeError as e:
+        return None, f"Invalid JSON: {e}"
+    if isinstance(row, str):
+        return {'question': row}, None
+    if not isinstance(row, dict):
+        return None, "Expected a JSON object or string"
+    return row, None
+
+def read_questions(stream, input_format="auto", path=None, default_lang='en'):
+    """Yield `{'id', 'question', 'lang'}` records from JSONL, CSV or plain text.
+
+    JSONL lines are objects with a `question` field (plus optional `id` and
+    `lang`) or bare JSON strings. CSV files need a `question` column. Plain
+    text has one question per line. Records without an ID are numbered from 1.
+    A JSONL line that cannot be parsed yields `{'id', 'error'}` instead, so one
+    bad line does not stop the rest of the run.
+    """
+    lines = (line for line in stream if line.strip())
+    first_line = next(lines, None)
+    if first_line is None:
+        return
+    lines = itertools.chain([first_line], lines)
+    if input_format == "auto":
+        input_format = _detect_format(path, first_line)
+
+    if input_format == "csv":
+        rows = (({key.strip().lower(): value for key, value in row.items() if key}, None) for row in csv.DictReader(lines))
+    elif input_format == "jsonl":
+        rows = (_parse_jsonl(line) for line in lines)
+    else:
+        rows = (({'question': line.strip()}, None) for line in lines)
+
+    for number, (row, error) in enumerate(rows, 1):
+        if error:
+            yield {'id': number, 'error': error}
+            continue
+        question = str(row.get('question') or "").strip()
+        if not question:
+            continue
+        yield {
+            'id': row.get('id') or number,
+            'question': question,
+            'lang': row.get('lang') or default_lang,
+        }
+
+def answer_questions(records, concurrency=DEFAULT_CONCURRENCY, n_results=5):
+    """Answer one chunk of questions and yield a result dict for each as soon as it is done.
+
+    Questions are translated with one batched call per language, retrieved
+    together with `Retriever.query_batch` and generated with at most
+    `concurrency` answers in flight. Each result carries per-stage timings;
+    the translation and retrieval times are for the whole chunk.
+    """
+    chunk_start = time.time()
+    retriever = get_shared_retriever()
+
+    questions = []
+    by_lang = {}
+    for i, record in enumerate(records):
+        record['lang'] = detect_language(record['question'], record['lang'])
+        questions.append(record['question'])
+        if record['lang'] != 'en':
+            by_lang.setdefault(record['lang'], []).append(i)
+    for lang, indices in by_lang.items():
+        translated = translate_batch([questions[i] for i in indices], lang, 'en')
+        for i, question in zip(indices, translated):
+            questions[i] = question
+    translation_time = time.time() - chunk_start
+
+    retrieval_start = time.time()
+    contexts = retriever.query_batch(questions, n_results)
+    retrieval_time = time.time() - retrieval_start
+
+    def answer_one(i):
+        record = records[i]
+        result = answer_question(record['question'], record['lang'], english_question=questions[i], context=contexts[i])
+        return dict(record, answer=result['answer'], citations=result['citations'], cached=result['cached'], timings={
+            'question_translation_s': round(translation_time, 4),
+            'retrieval_s': round(retrieval_time, 4),
+            'generation_s': round(result['timings']['generation_s'], 4),
+            'answer_translation_s': round(result['timings'].get('answer_translation_s', 0.0), 4),
+            'total_s': round(time.time() - chunk_start, 4),
+        })
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="ask-batch") as pool:
+        futures = {pool.submit(answer_one, i): i for i in range(len(records))}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield dict(records[futures[future]], error=str(e))
+
+def run_ask_batch(input_path="-", output_path="-", input_format="auto", lang='en', concurrency=DEFAULT_CONCURRENCY, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Answer every question in `input_path` and write one JSON line per answer to `output_path`.
+
+    `-` means stdin/stdout. When results go to stdout, progress messages are
+    sent to stderr so the output stays valid JSONL.
+    """
+    with contextlib.ExitStack() as stack:
+        source = sys.stdin if input_path == "-" else stack.enter_context(open(input_path, encoding="utf-8", newline=""))
+        if output_path == "-":
+            output = sys.stdout
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        else:
+            output = stack.enter_context(open(output_path, "w", encoding="utf-8"))
+
+        start_time = time.time()
+        answered = failed = 0
+        records = read_questions(source, input_format, None if input_path == "-" else input_path, lang)
+        for chunk in iter_batches(records, chunk_size):
+            # Unreadable input lines are reported as they are; only real questions are answered
+            invalid = [record for record in chunk if 'error' in record]
+            questions = [record for record in chunk if 'error' not in record]
+            answered_chunk = answer_questions(questions, concurrency) if questions else []
+            for result in itertools.chain(invalid, answered_chunk):
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+                if 'error' in result:
+                    failed += 1
+                else:
+                    answered += 1
+
+        elapsed = time.time() - start_time
+        rate = (answered + failed) / elapsed if elapsed else 0.0
+        print(f"✅ Answered {answered} questions ({failed} failed) in {elapsed:.1f}s, {rate:.2f} questions/s")
+    return answered, failed
@@ -0,0 +1,286 @@
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import platform
+import tempfile
+import contextlib
+import numpy as np
+from .embeddings import embedding_model_id
+from .generator import build_prompt, generate_answer
+from .ingest import DEFAULT_BATCH_SIZE, stream_chunks_to_collection
+from .lexical_index import BM25Index, tokenize
+from .loaders import load_pdf
+from .metrics import percentile
+from .model_registry import set_model_factory
+from .resources import get_shared_embedding_function, registry, shutdown_resources
+from .retriever import Retriever
+from .splitter import character_text_splitter, split_text
+from .translator import TranslationMemory, set_translation_memory, translate_from_english
+from .tracing import add_span_listener, remove_span_listener
+from .vector_store import get_chroma_client
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BENCHMARK_PDFS = [os.path.join(_REPO_ROOT, name) for name in ("Women.pdf", "C. Women and health.pdf")]
+BENCHMARK_QUESTIONS = [
+    "What are the symptoms of PCOS?",
+    "How is anemia in women treated?",
+    "What causes irregular menstrual cycles?",
+    "How common is HPV and how can it be prevented?",
+    "What are the health risks during menopause?",
+    "How does maternal nutrition affect pregnancy outcomes?",
+    "What are the latest guidelines for cervical cancer screening?",
+    "Which factors increase the risk of osteoporosis in women?",
+    "How does violence against women affect their health?",
+    "What is the current maternal mortality rate worldwide?",
+]
+STAGES = (
+    "load", "split", "embed", "chroma_add", "lexical_index",
+    "query_embed", "vector_search", "retrieve", "context_build", "generate", "translate",
+)
+FAKE_GEMINI_LATENCY_MS = float(os.environ.get("BENCHMARK_GEMINI_LATENCY_MS", "800"))
+FAKE_TAVILY_LATENCY_MS = float(os.environ.get("BENCHMARK_TAVILY_LATENCY_MS", "1200"))
+# Injected latencies vary by up to this fraction, drawn from a seeded generator
+FAKE_LATENCY_JITTER = float(os.environ.get("BENCHMARK_LATENCY_JITTER", "0.25"))
+
+class _FakeLatency:
+    """Seeded latency source, so two runs with the same settings sleep for the same times."""
+
+    def __init__(self, latency_ms, jitter, seed):
+        self.latency_s = latency_ms / 1000.0
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def sleep(self):
+        time.sleep(self.latency_s * (1 + self.jitter * self._random.random()))
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.candidates = []
+
+class FakeGeminiModel:
+    """Local stand-in for a Gemini GenerativeModel with injected latency.
+
+    Replies deterministically: a numbered answer citing the first source in
+    the prompt. Each reply is distinct, so translations are never remembered.
+    """
+
+    def __init__(self, model_name, latency):
+        self.model_name = model_name
+        self._latency = latency
+        self._calls = 0
+
+    def generate_content(self, prompt, request_options=None, stream=False):
+        self._latency.sleep()
+        self._calls += 1
+        text = f"Answer {self._calls} from {self.model_name}: {' '.join(prompt.split()[-12:])} [Source 1]"
+        if stream:
+            return iter([_FakeResponse(word + " ") for word in text.split()])
+        return _FakeResponse(text)
+
+class FakeTavilySearch:
+    """Local stand-in for the Tavily tool with injected latency and canned results."""
+
+    def __init__(self, latency):
+        self._latency = latency
+
+    def invoke(self, query):
+        self._latency.sleep()
+        return {'results': [
+            {'url': f"https://example.org/result-{i}", 'title': f"Result {i}", 'content': f"Web result {i} about {query}"}
+            for i in range(1, 4)
+        ]}
+
+class HashingEmbeddings:
+    """Deterministic offline embedding model for machines without the HuggingFace weights.
+
+    Words are hashed into a fixed number of buckets; the vectors are normalized
+    like the MiniLM ones, so Chroma distances stay in the same range.
+    """
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in tokenize(text):
+            vector[zlib.crc32(token.encode("utf-8")) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+class StageTimer:
+    """Collects one latency sample per call of each pipeline stage."""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[stage].append(time.perf_counter() - start)
+
+    @contextlib.contextmanager
+    def collect(self, stages):
+        """Sample the spans of `stages` that production code records while the block runs."""
+        def listener(name, seconds):
+            if name in stages:
+                self.samples[name].append(seconds)
+        add_span_listener(listener)
+        try:
+            yield
+        finally:
+            remove_span_listener(listener)
+
+    def summary(self):
+        """Return count, mean, max and p50/p95/p99 in milliseconds for every stage that ran."""
+        summary = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            summary[stage] = {
+                'count': len(samples),
+                'mean_ms': round(1000 * sum(samples) / len(samples), 3),
+                'p50_ms': round(1000 * percentile(samples, 0.50), 3),
+                'p95_ms': round(1000 * percentile(samples, 0.95), 3),
+                'p99_ms': round(1000 * percentile(samples, 0.99), 3),
+                'max_ms': round(1000 * max(samples), 3),
+            }
+        return summary
+
+def _ingest_round(timer, client, collection_name, pdf_paths, embedding_function, batch_size, lexical_index=None):
+    """Load, split and store every PDF into a fresh collection with the production writer; return its chunk count.
+
+    The embed, chroma_add and lexical_index samples are the spans that
+    `stream_chunks_to_collection` records, so they measure the code ingest runs.
+    """
+    collection = client.get_or_create_collection(collection_name)
+    chunk_count = 0
+    for pdf_path in pdf_paths:
+        with timer.time("load"):
+            documents = load_pdf(pdf_path)
+        with timer.time("split"):
+            chunks = split_text(documents)
+        with timer.collect(("embed", "chroma_add", "lexical_index")):
+            stats = stream_chunks_to_collection(collection, chunks, embedding_function, batch_size, lexical_index=lexical_index, save_lexical_index=False)
+        chunk_count += stats.chunks_written
+    if lexical_index is not None:
+        # Saved once per round, as bulk ingest does
+        lexical_index.save()
+    return chunk_count
+
+def _query_round(timer, retriever, questions, n_results, translate_lang):
+    """Answer every question; query_embed and vector_search are the spans `Retriever.query` records."""
+    for question in questions:
+        with timer.time("retrieve"), timer.collect(("query_embed", "vector_search")):
+            context = retriever.query(question, n_results)
+        with timer.time("context_build"):
+            build_prompt(context, question)
+        with timer.time("generate"):
+            result = generate_answer(context, question)
+        if translate_lang and translate_lang != 'en':
+            with timer.time("translate"):
+                translate_from_english(result['answer'], translate_lang)
+
+def run_benchmark(pdf_paths=None, questions=None, rounds=3, gemini_latency_ms=FAKE_GEMINI_LATENCY_MS,
+                  tavily_latency_ms=FAKE_TAVILY_LATENCY_MS, jitter=FAKE_LATENCY_JITTER, fake_embeddings=False,
+                  translate_lang='hi', n_results=5, batch_size=DEFAULT_BATCH_SIZE, seed=0):
+    """Run the pipeline offline against local stand-ins and return per-stage latency percentiles.
+
+    Every round ingests the PDFs into a fresh collection in a temporary
+    ChromaDB and then answers every question. Gemini and Tavily are replaced
+    by in-process fakes with seeded, injected latency (the SDK and HTTP
+    client code is not exercised); with `fake_embeddings` the
+    HuggingFace model is replaced as well, and chunks are sized in characters
+    instead of by its tokenizer. Nothing outside the temporary
+    directory is read or written apart from the PDFs.
+    """
+    pdf_paths = list(pdf_paths or BENCHMARK_PDFS)
+    questions = list(questions or BENCHMARK_QUESTIONS)
+    timer = StageTimer()
+    gemini_latency = _FakeLatency(gemini_latency_ms, jitter, f"{seed}:gemini")
+    tavily_latency = _FakeLatency(tavily_latency_ms, jitter, f"{seed}:tavily")
+    start_time = time.time()
+
+    # Start from an empty registry so no real model, store or SDK client leaks into the run
+    shutdown_resources()
+    with tempfile.TemporaryDirectory(prefix="mini-rag-bench-") as workdir:
+        try:
+            set_model_factory(lambda model_name, generation_config=None: FakeGeminiModel(model_name, gemini_latency))
+            set_translation_memory(TranslationMemory(os.path.join(workdir, "translations.sqlite3")))
+            client = get_chroma_client(os.path.join(workdir, "chroma"))
+            registry.register("chroma_client", client)
+            registry.register("tavily", FakeTavilySearch(tavily_latency))
+            if fake_embeddings:
+                registry.register("embedding_function", HashingEmbeddings())
+                registry.register("text_splitter", character_text_splitter())
+            embedding_function = get_shared_embedding_function()
+            # Uncached, so every round measures the model rather than the query cache
+            registry.register("query_embedding_cache", embedding_function)
+
+            # The first PDF load and prompt build import their libraries; keep that out of the samples
+            build_prompt([], questions[0])
+            split_text(load_pdf(pdf_paths[0]))
+
+            chunk_count = 0
+            for round_number in range(1, rounds + 1):
+                print(f"⏱️ Benchmark round {round_number}/{rounds}")
+                collection_name = f"benchmark_{round_number}"
+                lexical_index = BM25Index(os.path.join(workdir, f"{collection_name}.bm25.json.gz"))
+                registry.register(f"lexical_index:{collection_name}", lexical_index)
+                chunk_count = _ingest_round(timer, client, collection_name, pdf_paths, embedding_function, batch_size, lexical_index)
+
+                retriever = Retriever(collection_name)
+                _query_round(timer, retriever, questions, n_results, translate_lang)
+        finally:
+            set_model_factory(None)
+            set_translation_memory(None)
+            shutdown_resources()
+
+    return {
+        'benchmark': "mini_rag_bot",
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(start_time)),
+        'elapsed_s': round(time.time() - start_time, 3),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'config': {
+            'pdfs': [os.path.basename(path) for path in pdf_paths],
+            'questions': len(questions),
+            'rounds': rounds,
+            'chunks_per_round': chunk_count,
+            'embedding_model': "hashing" if fake_embeddings else embedding_model_id(),
+            'gemini_latency_ms': gemini_latency_ms,
+            'tavily_latency_ms': tavily_latency_ms,
+            'latency_jitter': jitter,
+            'translate_lang': translate_lang,
+            'n_results': n_results,
+            'batch_size': batch_size,
+            'seed': seed,
+        },
+        'stages': timer.summary(),
+    }
+
+def run_benchmark_cli(output_path="-", **options):
+    """Run the benchmark and write its JSON report to `output_path` (`-` for stdout)."""
+    with contextlib.ExitStack() as stack:
+        if output_path == "-":
+            output = sys.stdout
+            # Keep the pipeline's progress messages out of the JSON
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        else:
+            output = stack.enter_context(open(output_path, "w", encoding="utf-8"))
+        report = run_benchmark(**options)
+        json.dump(report, output, indent=2)
+        output.write("\n")
+    print(f"✅ Benchmark finished in {report['elapsed_s']:.1f}s", file=sys.stderr)
+    return report
@@ -0,0 +1,136 @@
+import os
+import time
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+MAX_WORKERS = int(os.environ.get("MODEL_CALL_WORKERS", "8"))
+MAX_QUEUED = int(os.environ.get("MODEL_CALL_QUEUE", "16"))
+
+class TimeoutError(Exception):
+    """Custom timeout exception"""
+    pass
+
+class PoolSaturatedError(RuntimeError):
+    """Raised immediately when every worker is busy and the queue is full."""
+    pass
+
+class ModelCallPool:
+    """Bounded worker pool shared by every outbound model call.
+
+    At most `max_workers` calls run at once and at most `max_queued` wait;
+    anything beyond that is rejected straight away instead of piling up.
+    On timeout a queued call is cancelled outright. A running call cannot be
+    interrupted from outside, so callers also pass the deadline to the SDK
+    (request_options timeout), which aborts the HTTP request and frees the
+    worker at the same moment.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_queued=MAX_QUEUED):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-call")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._lock = threading.Lock()
+        self._counters = {
+            "in_flight": 0,
+            "queued": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "cancelled": 0,
+        }
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self._counters[name] += delta
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a call and return its Future, or raise PoolSaturatedError if the pool is full."""
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise PoolSaturatedError(
+                f"Model call pool saturated ({self.max_workers} running, {self.max_queued} queued)"
+            )
+        self._count("queued")
+
+        def run():
+            self._count("queued", -1)
+            self._count("in_flight")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._count("in_flight", -1)
+
+        def release(future):
+            if future.cancelled():
+                # Cancelled before it started, so run() never moved it out of the queue
+                self._count("queued", -1)
+                self._count("cancelled")
+            elif future.exception() is not None:
+                self._count("failed")
+            else:
+                self._count("completed")
+            self._slots.release()
+
+        try:
+            future = self._executor.submit(run)
+        except RuntimeError:
+            self._count("queued", -1)
+            self._slots.release()
+            raise
+        future.add_done_callback(release)
+        return future
+
+    def call(self, func, *args, timeout=None, **kwargs):
+        """Run `func` on the pool and wait up to `timeout` seconds for its result."""
+        future = self.submit(func, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count("timed_out")
+            raise TimeoutError(f"Function call timed out after {timeout}s")
+
+    def call_with_deadline(self, func, timeout):
+        """Run `func(remaining_seconds)` on the pool with an overall deadline.
+
+        Time spent waiting in the queue counts against the deadline, so the
+        SDK timeout handed to `func` ends when the caller stops waiting.
+        """
+        deadline = time.monotonic() + timeout
+
+        def run():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Deadline of {timeout}s expired while queued")
+            return func(remaining)
+
+        return self.call(run, timeout=timeout)
+
+    def metrics(self):
+        """Return a snapshot of the pool's gauges and counters."""
+        with self._lock:
+            snapshot = dict(self._counters)
+        snapshot["max_workers"] = self.max_workers
+        snapshot["max_queued"] = self.max_queued
+        return snapshot
+
+    def shutdown(self):
+        """Cancel queued calls and stop accepting new ones."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_model_call_pool():
+    """Return the process-wide model call pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ModelCallPool()
+                atexit.register(_pool.shutdown)
+    return _pool
@@ -0,0 +1,84 @@
+import os
+import re
+
+# Upper bound on the whole prompt: instructions, question and packed context
+INPUT_TOKEN_BUDGET = int(os.environ.get("INPUT_TOKEN_BUDGET", "3000"))
+# A chunk that only partly fits is truncated if at least this many tokens are left
+MIN_PARTIAL_TOKENS = 64
+# split_text overlaps neighbouring chunks by 48 tokens (about 200 characters); look a little further
+MAX_OVERLAP_CHARS = 400
+MIN_OVERLAP_CHARS = 20
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text):
+    """Estimate how many tokens Gemini will count for `text`.
+
+    Words longer than four characters usually split into several tokens, so
+    each word costs one token per started four characters and each symbol one.
+    Close enough to budget a prompt without a network round-trip.
+    """
+    return sum((len(token) + 3) // 4 for token in TOKEN_PATTERN.findall(text))
+
+def _overlap(left, right):
+    """Return the length of the longest suffix of `left` that is also a prefix of `right`."""
+    longest = min(len(left), len(right), MAX_OVERLAP_CHARS)
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+def trim_overlap(content, kept_contents):
+    """Remove text `content` shares with already packed chunks of the same source.
+
+    Neighbouring chunks repeat each other's edges; whichever side of `content`
+    repeats a kept chunk is cut so the model reads that text only once.
+    """
+    for kept in kept_contents:
+        head = _overlap(kept, content)
+        if head:
+            content = content[head:]
+        tail = _overlap(content, kept)
+        if tail:
+            content = content[:-tail]
+    return content.strip()
+
+def truncate_to_tokens(text, max_tokens):
+    """Cut `text` at a word boundary so it fits in `max_tokens`."""
+    used = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        used += (len(match.group()) + 3) // 4
+        if used > max_tokens:
+            return text[:match.start()].rstrip() + " ..."
+    return text
+
+def pack_context(context, token_budget, source_of=None, overhead_per_doc=0):
+    """Fit the highest-ranked context documents into `token_budget` tokens.
+
+    Documents are taken in rank order. Text overlapping an already packed
+    chunk of the same source is trimmed, and the first document that does
+    not fit is truncated if enough budget is left; everything after it is
+    dropped. `overhead_per_doc` reserves room for the label each document
+    gets in the prompt. Returns `(doc, content)` pairs in the original order.
+    """
+    source_of = source_of or (lambda doc: (getattr(doc, 'metadata', None) or {}).get('source'))
+    packed = []
+    kept_by_source = {}
+    remaining = token_budget
+    for doc in context:
+        content = doc.page_content if hasattr(doc, 'page_content') else str(doc)
+        source = source_of(doc)
+        if source is not None:
+            content = trim_overlap(content, kept_by_source.get(source, []))
+        if not content:
+            continue
+        tokens = count_tokens(content) + overhead_per_doc
+        if tokens > remaining:
+            if remaining - overhead_per_doc >= MIN_PARTIAL_TOKENS:
+                packed.append((doc, truncate_to_tokens(content, remaining - overhead_per_doc)))
+            break
+        packed.append((doc, content))
+        remaining -= tokens
+        if source is not None:
+            kept_by_source.setdefault(source, []).append(content)
+    return packed
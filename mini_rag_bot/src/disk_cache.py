@@ -0,0 +1,128 @@
+import os
+import time
+import sqlite3
+import threading
+
+CACHE_DIR = os.environ.get("MINI_RAG_CACHE_DIR", "cache")
+# Access times of cache hits are buffered in memory and written in one transaction
+# after this many hits, or sooner when an entry is written or the cache is closed
+ACCESS_FLUSH_EVERY = int(os.environ.get("CACHE_ACCESS_FLUSH_EVERY", "64"))
+
+class SqliteLRUCache:
+    """Small persistent key/value store with least-recently-used eviction.
+
+    Values are bytes; callers decide how to serialize. Safe to share between threads.
+    Reads never write to SQLite: the access times that drive eviction are
+    buffered and flushed in batches (see ACCESS_FLUSH_EVERY), so a hit costs
+    one SELECT rather than an UPDATE and a commit.
+    """
+
+    def __init__(self, path, max_entries=10000, access_flush_every=ACCESS_FLUSH_EVERY):
+        self.path = path
+        self.max_entries = max_entries
+        self.access_flush_every = access_flush_every
+        # key -> time of the latest hit not yet written to the entries table
+        self._accessed = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            # Track the size ourselves - COUNT(*) scans the whole table on every write
+            self._count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, key):
+        """Return the value stored under `key`, or None."""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key):
+        """Return `(value, created_at)` for `key` and mark it as recently used, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= self.access_flush_every:
+                with self._conn:
+                    self._flush_accessed()
+            return row[0], row[1]
+
+    def _flush_accessed(self):
+        """Write the buffered access times; the caller holds the lock and commits."""
+        if not self._accessed:
+            return
+        self._conn.executemany(
+            "UPDATE entries SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._accessed.items()]
+        )
+        self._accessed.clear()
+
+    def flush(self):
+        """Write buffered access times now."""
+        with self._lock, self._conn:
+            self._flush_accessed()
+
+    def set(self, key, value):
+        """Store `value` under `key`, evicting the least recently used entries if full."""
+        now = time.time()
+        with self._lock, self._conn:
+            # Eviction below must see which entries were read recently
+            self._accessed.pop(key, None)
+            self._flush_accessed()
+            exists = self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                    (self._count - self.max_entries,)
+                )
+                self._count = self.max_entries
+
+    def delete(self, key):
+        """Remove `key` if present."""
+        with self._lock, self._conn:
+            self._accessed.pop(key, None)
+            self._count -= self._conn.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock, self._conn:
+            self._accessed.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def get_meta(self, key):
+        """Return a metadata value such as the model that produced the entries."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self):
+        with self._lock:
+            with self._conn:
+                self._flush_accessed()
+            self._conn.close()
@@ -4,14 +4,39 @@ import warnings
 # Suppress the deprecation warning for HuggingFaceEmbeddings
 warnings.filterwarnings("ignore", category=DeprecationWarning, module="langchain_community.embeddings")
 
-try:
-    from langchain_huggingface import HuggingFaceEmbeddings
-    print("✅ Using langchain_huggingface.HuggingFaceEmbeddings")
-except ImportError:
-    from langchain_community.embeddings import HuggingFaceEmbeddings
-    print("⚠️ Using langchain_community.embeddings.HuggingFaceEmbeddings (consider upgrading to langchain-huggingface)")
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# "torch" runs the model with sentence-transformers; "onnx" runs the int8 export in ONNX_MODEL_DIR
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch").lower()
+ONNX_MODEL_DIR = os.environ.get("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2-onnx")
+EMBEDDING_BACKENDS = ("torch", "onnx")
 
-def get_embedding_function():
-    """Return the embedding function."""
+# Resolved on first use: importing sentence-transformers pulls in torch
+HuggingFaceEmbeddings = None
+
+def _load_embeddings_class():
+    """Import the HuggingFace embeddings wrapper the first time a model is built."""
+    global HuggingFaceEmbeddings
+    if HuggingFaceEmbeddings is None:
+        try:
+            from langchain_huggingface import HuggingFaceEmbeddings
+        except ImportError:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            print("⚠️ Using langchain_community.embeddings.HuggingFaceEmbeddings (consider upgrading to langchain-huggingface)")
+    return HuggingFaceEmbeddings
+
+def embedding_model_id(backend=None):
+    """Return a name for the configured model and backend, used to key caches of its vectors."""
+    backend = backend or EMBEDDING_BACKEND
+    return EMBEDDING_MODEL_NAME if backend == "torch" else f"{EMBEDDING_MODEL_NAME}+onnx-int8"
+
+def get_embedding_function(backend=None):
+    """Return the embedding function for `backend` (default: EMBEDDING_BACKEND)."""
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
+    if backend == "onnx":
+        from .onnx_embeddings import OnnxEmbeddings
+        print(f"🔧 Initializing int8 ONNX embeddings model from {ONNX_MODEL_DIR}...")
+        return OnnxEmbeddings(ONNX_MODEL_DIR)
     print("🔧 Initializing HuggingFace embeddings model...")
-    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    return _load_embeddings_class()(model_name=EMBEDDING_MODEL_NAME)
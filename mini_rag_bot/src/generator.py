@@ -1,89 +1,29 @@
 import os
 import time
-import threading
-import google.generativeai as genai
-from langchain.prompts import PromptTemplate
+import textwrap
 import logging
+from .call_pool import TimeoutError, PoolSaturatedError, get_model_call_pool
+from .model_registry import configure_genai, get_gemini_api_key, get_model, record_latency
+from .context_packer import INPUT_TOKEN_BUDGET, count_tokens, pack_context
+from .tracing import span
 
 # Set up logging for debugging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class TimeoutError(Exception):
-    """Custom timeout exception"""
-    pass
-
 def with_timeout(timeout_seconds=30):
-    """Cross-platform timeout decorator using threading"""
+    """Run the decorated function on the shared model call pool with a deadline."""
     def decorator(func):
         def wrapper(*args, **kwargs):
-            result = [None]
-            exception = [None]
-            
-            def target():
-                try:
-                    result[0] = func(*args, **kwargs)
-                except Exception as e:
-                    exception[0] = e
-            
-            thread = threading.Thread(target=target)
-            thread.daemon = True
-            thread.start()
-            thread.join(timeout_seconds)
-            
-            if thread.is_alive():
-                # Thread is still running, timeout occurred
-                logger.error(f"⏰ Function timed out after {timeout_seconds}s")
-                raise TimeoutError(f"Function call timed out after {timeout_seconds}s")
-            
-            if exception[0]:
-                raise exception[0]
-            
-            return result[0]
+            try:
+                return get_model_call_pool().call(func, *args, timeout=timeout_seconds, **kwargs)
+            except TimeoutError:
+                logger.error("⏰ Function timed out after %ss", timeout_seconds)
+                raise
         return wrapper
     return decorator
 
-def get_gemini_api_key():
-    """Get the Gemini API key from environment variables."""
-    return os.environ.get("GEMINI_API_KEY")
-
-def configure_genai():
-    """Configure the Generative AI client."""
-    start_time = time.time()
-    logger.info("🔧 Starting Gemini API configuration...")
-    
-    api_key = get_gemini_api_key()
-    if not api_key:
-        logger.error("❌ GEMINI_API_KEY environment variable not set.")
-        raise ValueError("GEMINI_API_KEY environment variable not set.")
-    
-    logger.info(f"🔑 API key found: {api_key[:10]}...{api_key[-4:]}")
-    
-    try:
-        # Simple configuration - timeout will be handled at the request level
-        genai.configure(api_key=api_key)
-        config_time = time.time() - start_time
-        logger.info(f"✅ Gemini API configured successfully in {config_time:.2f}s")
-    except Exception as e:
-        logger.error(f"❌ Failed to configure Gemini API: {e}")
-        raise
-
-def generate_answer(context, question, model_name='gemini-2.5-flash', timeout_seconds=45):
-    """Generate an answer using the Gemini model with enhanced women's health focus and proper citations."""
-    total_start_time = time.time()
-    logger.info("🔧 Starting answer generation with Gemini...")
-    logger.info(f"🤖 Model: {model_name}")
-    logger.info(f"⏰ Timeout: {timeout_seconds}s")
-    logger.info(f"📝 Question: {question}")
-    logger.info(f"📚 Context documents: {len(context) if context else 0}")
-    
-    # Configure API with timing
-    config_start = time.time()
-    configure_genai()
-    config_time = time.time() - config_start
-    logger.info(f"⏱️ API configuration took: {config_time:.2f}s")
-
-    prompt_template = """
+# Dedented so the indentation of this source file is not sent (and billed) with every request
+PROMPT_TEMPLATE = textwrap.dedent("""
     You are a specialized Women's Health AI Assistant with expertise in:
     - Maternal and reproductive health
     - Gender-specific health conditions
@@ -116,30 +56,48 @@ def generate_answer(context, question, model_name='gemini-2.5-flash', timeout_se
     - Always reference your sources within the answer text
 
     Answer:
-    """
+    """).strip() + "\n"
+
+# Room reserved for the "[Source n] (name): " label in front of each context document
+SOURCE_LABEL_TOKENS = 16
 
+def _document_source(doc):
+    """Return the document a context chunk came from, so overlap is only trimmed within one document."""
+    metadata = getattr(doc, 'metadata', None) or {}
+    return metadata.get('original_metadata', {}).get('source') or metadata.get('source')
+
+def build_prompt(context, question):
+    """Format the context documents and question into the final prompt.
+
+    Context is packed into INPUT_TOKEN_BUDGET in rank order, so the prompt
+    size stays bounded however much was retrieved. Returns the prompt text
+    and the per-source details used for citations (numbered as packed).
+    """
+    from langchain.prompts import PromptTemplate
     prompt = PromptTemplate(
-        template=prompt_template,
+        template=PROMPT_TEMPLATE,
         input_variables=["context", "question"]
     )
 
+    # Whatever the instructions and question leave of the input budget goes to context
+    context_budget = INPUT_TOKEN_BUDGET - count_tokens(PROMPT_TEMPLATE) - count_tokens(question)
+
     # Format context properly with detailed source information
     context_start = time.time()
-    context_text = ""
+    context_parts = []
     source_details = []
     
     if context:
-        logger.info(f"🔧 Processing {len(context)} context documents...")
-        for i, doc in enumerate(context):
-            if hasattr(doc, 'page_content'):
-                content = doc.page_content
-            else:
-                content = str(doc)
-            
+        logger.info("🔧 Processing %s context documents...", len(context))
+        packed = pack_context(context, context_budget, source_of=_document_source, overhead_per_doc=SOURCE_LABEL_TOKENS)
+        if len(packed) < len(context):
+            logger.info("✂️ Packed %s of %s context documents into %s tokens", len(packed), len(context), context_budget)
+        for i, (doc, content) in enumerate(packed):
             # Extract source information
             source_info = "Unknown Source"
             source_type = "unknown"
             source_url = None
+            raw_source = source_info
             
             if hasattr(doc, 'metadata') and doc.metadata:
                 metadata = doc.metadata
@@ -176,56 +134,131 @@ def generate_answer(context, question, model_name='gemini-2.5-flash', timeout_se
             
             # Use actual source names in the context
             display_source = source_info if source_info != "Unknown Source" else f"Document {i+1}"
-            context_text += f"[Source {i+1}] ({display_source}): {content}\n\n"
+            context_parts.append(f"[Source {i+1}] ({display_source}): {content}")
+    if context_parts:
+        context_text = "\n\n".join(context_parts)
     else:
+        # Also when nothing fitted the budget, so the model never sees an empty Context section
         context_text = "No specific context provided."
-        logger.warning("⚠️ No context provided for answer generation")
+        if context:
+            logger.warning("⚠️ No context fitted into %s tokens for answer generation", context_budget)
+        else:
+            logger.warning("⚠️ No context provided for answer generation")
     
     context_time = time.time() - context_start
-    logger.info(f"⏱️ Context processing took: {context_time:.2f}s")
-    logger.info(f"📏 Context length: {len(context_text)} characters")
+    logger.info("⏱️ Context processing took: %.2fs", context_time)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("📏 Context length: %s characters (~%s tokens)", len(context_text), count_tokens(context_text))
 
     # Format prompt with timing
     prompt_start = time.time()
     formatted_prompt = prompt.format(context=context_text, question=question)
     prompt_time = time.time() - prompt_start
-    logger.info(f"⏱️ Prompt formatting took: {prompt_time:.2f}s")
-    logger.info(f"📏 Final prompt length: {len(formatted_prompt)} characters")
+    logger.info("⏱️ Prompt formatting took: %.2fs", prompt_time)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("📏 Final prompt length: %s characters (~%s tokens)", len(formatted_prompt), count_tokens(formatted_prompt))
+    return formatted_prompt, source_details
 
-    # Initialize model with timing
-    model_start = time.time()
-    try:
-        model = genai.GenerativeModel(model_name)
-        model_time = time.time() - model_start
-        logger.info(f"⏱️ Model ({model_name}) initialization took: {model_time:.2f}s")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Gemini model {model_name}: {e}")
-        raise
+def _traced_build_prompt(context, question):
+    """build_prompt under a span recording how much context made it into the prompt."""
+    with span("build_prompt", context_docs=len(context or [])) as prompt_span:
+        formatted_prompt, source_details = build_prompt(context, question)
+        prompt_span.set(packed_docs=len(source_details), prompt_chars=len(formatted_prompt))
+    return formatted_prompt, source_details
+
+def build_citations(source_details):
+    """Create detailed citations with proper formatting."""
+    citations_start = time.time()
+    citations = []
+    if source_details:
+        logger.info("🔧 Preparing %s citations...", len(source_details))
+        for detail in source_details:
+            if detail['type'] == 'local_document':
+                # Show actual document name
+                doc_name = detail['source']
+                citations.append(f"[{detail['number']}] {doc_name}")
+            elif detail['type'] == 'web_search':
+                # Format web sources as clickable markdown links
+                title = detail['source']
+                url = detail.get('url', detail.get('raw_source', ''))
+                if url and url.startswith('http'):
+                    citations.append(f"[{detail['number']}] [{title}]({url})")
+                else:
+                    citations.append(f"[{detail['number']}] {title}")
+            else:
+                citations.append(f"[{detail['number']}] {detail['source']}")
+        citations_time = time.time() - citations_start
+        logger.info("✅ Citations prepared in %.2fs", citations_time)
+    return citations
+
+# Enhanced generation config for better responses
+GENERATION_CONFIG = {
+    "temperature": 0.3,  # Lower temperature for more factual responses
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+
+def log_api_error(e, api_time, model_name):
+    """Log a failed Gemini call with a hint at the likely cause."""
+    logger.error("❌ Gemini API call failed after %.2fs: %s", api_time, e)
+    logger.error("❌ Error type: %s", type(e).__name__)
     
-    # Enhanced generation config for better responses
-    generation_config = genai.types.GenerationConfig(
-        temperature=0.3,  # Lower temperature for more factual responses
-        top_p=0.8,
-        top_k=40,
-        max_output_tokens=2048,
-    )
-    logger.info(f"🔧 Generation config: temp={generation_config.temperature}, max_tokens={generation_config.max_output_tokens}")
+    # Log additional debug info for common errors
+    error_str = str(e).lower()
+    if "quota" in error_str or "rate limit" in error_str:
+        logger.error("💡 This might be a quota/rate limit issue")
+        logger.error("💡 Try again in a few minutes or check your API quota")
+    elif "network" in error_str or "connection" in error_str or "timeout" in error_str:
+        logger.error("💡 This might be a network connectivity issue")
+        logger.error("💡 Check your internet connection and firewall settings")
+    elif "authentication" in error_str or "api key" in error_str or "unauthorized" in error_str:
+        logger.error("💡 This might be an API key issue")
+        logger.error("💡 Verify your GEMINI_API_KEY is correct and active")
+    elif "invalid" in error_str and "model" in error_str:
+        logger.error("💡 The model '%s' might not be available", model_name)
+        logger.error("💡 Try using 'gemini-2.5-flash' or 'gemini-1.5-pro'")
+    else:
+        logger.error("💡 This might be a temporary API issue")
+        logger.error("💡 Try again in a few moments")
+
+def generate_answer(context, question, model_name='gemini-2.5-flash', timeout_seconds=45):
+    """Generate an answer using the Gemini model with enhanced women's health focus and proper citations."""
+    total_start_time = time.time()
+    logger.info("🔧 Starting answer generation with Gemini...")
+    logger.info("🤖 Model: %s", model_name)
+    logger.info("⏰ Timeout: %ss", timeout_seconds)
+    logger.info("📝 Question: %s", question)
+    logger.info("📚 Context documents: %s", len(context) if context else 0)
+    
+    # Configure API with timing
+    config_start = time.time()
+    configure_genai()
+    config_time = time.time() - config_start
+    logger.info("⏱️ API configuration took: %.2fs", config_time)
+
+    formatted_prompt, source_details = _traced_build_prompt(context, question)
+    model = get_model(model_name, GENERATION_CONFIG)
     
     # Make API call with detailed timing and error handling
     api_start = time.time()
     logger.info("🔧 Calling Gemini API...")
     logger.info("⏳ This may take 10-30 seconds depending on prompt complexity...")
-    logger.info(f"⏰ API call will timeout after {timeout_seconds}s if no response")
+    logger.info("⏰ API call will timeout after %ss if no response", timeout_seconds)
     
     try:
-        # Use the threading-based timeout as a backup
-        @with_timeout(timeout_seconds)
-        def make_api_call():
-            return model.generate_content(formatted_prompt, generation_config=generation_config)
+        # The pool bounds concurrency; the SDK deadline aborts the request itself on timeout
+        def make_api_call(remaining_seconds):
+            return model.generate_content(
+                formatted_prompt,
+                request_options={"timeout": remaining_seconds}
+            )
         
-        response = make_api_call()
+        with span("model_call", model=model_name):
+            response = get_model_call_pool().call_with_deadline(make_api_call, timeout_seconds)
         api_time = time.time() - api_start
-        logger.info(f"✅ Gemini API call completed in {api_time:.2f}s")
+        record_latency(model_name, api_time)
+        logger.info("✅ Gemini API call completed in %.2fs", api_time)
         
         # Check if response is valid
         if not response:
@@ -236,75 +269,124 @@ def generate_answer(context, question, model_name='gemini-2.5-flash', timeout_se
             logger.error("❌ Empty response text from Gemini API")
             # Try to get more info about the response
             if hasattr(response, 'candidates') and response.candidates:
-                logger.info(f"📋 Response has {len(response.candidates)} candidates")
+                logger.info("📋 Response has %s candidates", len(response.candidates))
                 for i, candidate in enumerate(response.candidates):
                     if hasattr(candidate, 'finish_reason'):
-                        logger.info(f"   Candidate {i}: finish_reason = {candidate.finish_reason}")
+                        logger.info("   Candidate %s: finish_reason = %s", i, candidate.finish_reason)
             raise ValueError("Empty response text from Gemini API")
             
-        logger.info(f"📏 Response length: {len(response.text)} characters")
+        logger.info("📏 Response length: %s characters", len(response.text))
         
     except TimeoutError as e:
         api_time = time.time() - api_start
-        logger.error(f"❌ Gemini API call timed out after {api_time:.2f}s")
+        logger.error("❌ Gemini API call timed out after %.2fs", api_time)
         raise TimeoutError(f"Gemini API call timed out after {api_time:.2f}s")
+    except PoolSaturatedError as e:
+        logger.error("❌ Gemini API call rejected: %s", e)
+        raise
     except Exception as e:
-        api_time = time.time() - api_start
-        logger.error(f"❌ Gemini API call failed after {api_time:.2f}s: {e}")
-        logger.error(f"❌ Error type: {type(e).__name__}")
-        
-        # Log additional debug info for common errors
-        error_str = str(e).lower()
-        if "quota" in error_str or "rate limit" in error_str:
-            logger.error("💡 This might be a quota/rate limit issue")
-            logger.error("💡 Try again in a few minutes or check your API quota")
-        elif "network" in error_str or "connection" in error_str or "timeout" in error_str:
-            logger.error("💡 This might be a network connectivity issue")
-            logger.error("💡 Check your internet connection and firewall settings")
-        elif "authentication" in error_str or "api key" in error_str or "unauthorized" in error_str:
-            logger.error("💡 This might be an API key issue")
-            logger.error("💡 Verify your GEMINI_API_KEY is correct and active")
-        elif "invalid" in error_str and "model" in error_str:
-            logger.error(f"💡 The model '{model_name}' might not be available")
-            logger.error("💡 Try using 'gemini-2.5-flash' or 'gemini-1.5-pro'")
-        else:
-            logger.error("💡 This might be a temporary API issue")
-            logger.error("💡 Try again in a few moments")
-        
+        log_api_error(e, time.time() - api_start, model_name)
         raise
 
     # Extract the generated text and prepare detailed citations
     answer = response.text
     logger.info("✅ Answer generated successfully")
     
-    # Create detailed citations with proper formatting
-    citations_start = time.time()
-    citations = []
-    if source_details:
-        logger.info(f"🔧 Preparing {len(source_details)} citations...")
-        for detail in source_details:
-            if detail['type'] == 'local_document':
-                # Show actual document name
-                doc_name = detail['source']
-                citations.append(f"[{detail['number']}] {doc_name}")
-            elif detail['type'] == 'web_search':
-                # Format web sources as clickable markdown links
-                title = detail['source']
-                url = detail.get('url', detail.get('raw_source', ''))
-                if url and url.startswith('http'):
-                    citations.append(f"[{detail['number']}] [{title}]({url})")
-                else:
-                    citations.append(f"[{detail['number']}] {title}")
-            else:
-                citations.append(f"[{detail['number']}] {detail['source']}")
-        citations_time = time.time() - citations_start
-        logger.info(f"✅ Citations prepared in {citations_time:.2f}s")
+    citations = build_citations(source_details)
     
     total_time = time.time() - total_start_time
-    logger.info(f"🎉 Total answer generation completed in {total_time:.2f}s")
+    logger.info("🎉 Total answer generation completed in %.2fs", total_time)
     
     return {
         "answer": answer, 
         "citations": citations,
         "source_details": source_details
     }
+
+class StreamedAnswer:
+    """A streaming answer: iterate it for text deltas, then read the full result.
+
+    Citations and source details are known before generation starts, so they
+    are available immediately; `answer` and `result()` are complete once the
+    iterator is exhausted.
+    """
+
+    def __init__(self, chunks, citations, source_details, model_name=None):
+        self._chunks = chunks
+        self._parts = []
+        self.model_name = model_name
+        self.citations = citations
+        self.source_details = source_details
+        self.first_token_time = None
+        self.done = False
+
+    def __iter__(self):
+        start_time = time.time()
+        for chunk in self._chunks:
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if self.first_token_time is None:
+                self.first_token_time = time.time() - start_time
+                logger.info("⚡ First token after %.2fs", self.first_token_time)
+            self._parts.append(text)
+            yield text
+        self.done = True
+        if self.model_name:
+            record_latency(self.model_name, time.time() - start_time)
+        if not self.answer.strip():
+            # Same outcome as generate_answer, so a blocked response is never cached as an answer
+            logger.error("❌ Empty response text from Gemini API")
+            raise ValueError("Empty response text from Gemini API")
+
+    @property
+    def answer(self):
+        return "".join(self._parts)
+
+    def result(self):
+        """Return the same dict generate_answer would have returned."""
+        return {
+            "answer": self.answer,
+            "citations": self.citations,
+            "source_details": self.source_details
+        }
+
+def _chunk_text(chunk):
+    """Return the text of a streamed response chunk, or "" for chunks without text."""
+    try:
+        return chunk.text
+    except ValueError:
+        # Chunks carrying only safety ratings or a finish reason have no text parts
+        return ""
+
+def generate_answer_stream(context, question, model_name='gemini-2.5-flash', timeout_seconds=45):
+    """Stream an answer from Gemini as text deltas.
+
+    Returns a StreamedAnswer. The request deadline is passed to the SDK so a
+    stalled stream raises instead of hanging.
+    """
+    logger.info("🔧 Starting streaming answer generation with Gemini...")
+    formatted_prompt, source_details = _traced_build_prompt(context, question)
+    model = get_model(model_name, GENERATION_CONFIG)
+    citations = build_citations(source_details)
+
+    api_start = time.time()
+    try:
+        # The pool slot covers the request up to the first chunk; the SDK
+        # deadline keeps a stalled stream from hanging after that
+        with span("model_call", model=model_name, stream=True):
+            response = get_model_call_pool().call_with_deadline(
+                lambda remaining_seconds: model.generate_content(
+                    formatted_prompt,
+                    stream=True,
+                    request_options={"timeout": remaining_seconds}
+                ),
+                timeout_seconds
+            )
+    except PoolSaturatedError as e:
+        logger.error("❌ Gemini API call rejected: %s", e)
+        raise
+    except Exception as e:
+        log_api_error(e, time.time() - api_start, model_name)
+        raise
+    return StreamedAnswer(iter(response), citations, source_details, model_name)
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import atexit
+import builtins
+import threading
+import importlib.util
+
+# Set MINI_RAG_IMPORT_REPORT=1 to print what every module cost to import when the CLI exits
+IMPORT_REPORT = os.environ.get("MINI_RAG_IMPORT_REPORT", "").lower() in ("1", "true", "yes")
+IMPORT_REPORT_TOP = int(os.environ.get("MINI_RAG_IMPORT_REPORT_TOP", "25"))
+
+def _absolute_name(name, globals, level):
+    if level == 0:
+        return name
+    package = (globals or {}).get('__package__') or ''
+    try:
+        return importlib.util.resolve_name('.' * level + name, package)
+    except (ImportError, ValueError):
+        return name
+
+class ImportTimer:
+    """Times each module's first import by wrapping `builtins.__import__`.
+
+    Inclusive time covers a module and everything it imported; self time
+    leaves out the nested imports, so the expensive leaf is easy to spot.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.started_at = None
+        self._original_import = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def install(self):
+        if self._original_import is None:
+            self.started_at = time.perf_counter()
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_name = _absolute_name(name, globals, level)
+        if module_name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with self._lock:
+                self.timings.setdefault(module_name, (elapsed, elapsed - nested))
+
+    def report(self, top=IMPORT_REPORT_TOP, stream=None):
+        """Print the `top` most expensive imports, slowest first."""
+        stream = stream or sys.stderr
+        with self._lock:
+            timings = sorted(self.timings.items(), key=lambda item: item[1][0], reverse=True)
+        total = time.perf_counter() - self.started_at if self.started_at else 0.0
+        print(f"📦 Import report: {len(timings)} modules imported, {total * 1000:.0f} ms since start", file=stream)
+        print(f"{'inclusive ms':>14} {'self ms':>10}  module", file=stream)
+        for module_name, (inclusive, own) in timings[:top]:
+            print(f"{inclusive * 1000:>14.1f} {own * 1000:>10.1f}  {module_name}", file=stream)
+
+def start_import_report():
+    """Start timing imports and print the report at exit, when IMPORT_REPORT is set."""
+    if not IMPORT_REPORT:
+        return None
+    timer = ImportTimer()
+    timer.install()
+    atexit.register(timer.report)
+    return timer
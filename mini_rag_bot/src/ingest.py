@@ -0,0 +1,324 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .loaders import PDF_PARALLEL_MIN_PAGES, iter_pdf_pages, load_html_file, pdf_page_count
+from .splitter import iter_split
+from .tracing import span
+from .vector_store import add_batch_to_collection, chunk_id, delete_stale_chunks
+
+DEFAULT_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "64"))
+CHECKPOINT_DIR = os.path.join("db", "ingest_checkpoints")
+SUPPORTED_EXTENSIONS = (".pdf", ".html", ".htm")
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, or None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+def file_fingerprint(file_path):
+    """Return a fingerprint that changes whenever the file on disk changes."""
+    stat = os.stat(file_path)
+    return f"{os.path.abspath(file_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+class IngestCheckpoint:
+    """Records how many chunks of a source have been written so a run can resume."""
+
+    def __init__(self, source, fingerprint, checkpoint_dir=CHECKPOINT_DIR):
+        self.source = source
+        self.fingerprint = fingerprint
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(checkpoint_dir, f"{key}.json")
+
+    def load(self):
+        """Return the number of chunks already written, or 0 if there is nothing to resume."""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable checkpoint {self.path}: {e}")
+            return 0
+        if state.get("fingerprint") != self.fingerprint:
+            print("⚠️ Source changed since the last run - ignoring checkpoint")
+            return 0
+        return state.get("completed", 0)
+
+    def save(self, completed):
+        """Persist progress atomically so a crash never leaves a half-written checkpoint."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "fingerprint": self.fingerprint, "completed": completed}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Remove the checkpoint once the source is fully ingested."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class IngestStats:
+    """Throughput and memory figures for one ingest run."""
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.chunks_written = 0
+        self.chunks_skipped = 0
+        self.chunks_deleted = 0
+        self.chunks_resumed = 0
+        self.batches = 0
+        self.changed_sources = set()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    @property
+    def chunks_per_second(self):
+        elapsed = self.elapsed
+        return self.chunks_written / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        """Print a one-line summary of the run."""
+        rss = peak_rss_mb()
+        rss_text = f"{rss:.1f} MB" if rss is not None else "n/a"
+        print(
+            f"📊 Ingested {self.chunks_written} new chunks in {self.batches} batches "
+            f"({self.chunks_skipped} unchanged, {self.chunks_deleted} removed, "
+            f"{self.chunks_resumed} resumed from checkpoint) in {self.elapsed:.2f}s - "
+            f"{self.chunks_per_second:.1f} chunks/s, peak RSS {rss_text}"
+        )
+
+def iter_batches(items, batch_size):
+    """Yield lists of up to `batch_size` items from any iterable."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def stream_chunks_to_collection(collection, chunks, embedding_function, batch_size=DEFAULT_BATCH_SIZE, checkpoint=None, stats=None, prune_stale=True, lexical_index=None, save_lexical_index=True):
+    """Embed chunks batch by batch, writing each batch to Chroma as soon as it is ready.
+
+    `chunks` may be any iterable, so callers can feed a generator and keep memory flat.
+    Chunks already stored under the same content hash are not re-embedded, and with
+    `prune_stale` every chunk of a source that is missing from the new version is
+    deleted once the stream is exhausted. With a checkpoint, chunks written by an
+    earlier interrupted run are skipped. A `lexical_index` is kept in step with the
+    collection and, unless `save_lexical_index` is False, saved at the end; callers
+    streaming many files turn that off and save once when they are done.
+    """
+    stats = stats or IngestStats()
+    completed = checkpoint.load() if checkpoint else 0
+    if completed:
+        print(f"🔁 Resuming after {completed} chunks already written")
+        stats.chunks_resumed += completed
+
+    seen_ids = {}
+    index = 0
+    for batch in iter_batches(chunks, batch_size):
+        batch_start = index
+        index += len(batch)
+        batch_ids = []
+        for doc in batch:
+            source = doc.metadata.get('source', 'unknown')
+            doc_id = chunk_id(source, doc.page_content)
+            seen_ids.setdefault(source, set()).add(doc_id)
+            batch_ids.append((doc_id, doc, source))
+        if lexical_index is not None:
+            # Tokenizing is cheap, so resumed batches are indexed too in case the last save was lost
+            with span("lexical_index", chunks=len(batch)):
+                for doc_id, doc, source in batch_ids:
+                    lexical_index.add(doc_id, doc.page_content, source)
+        if index <= completed:
+            continue
+        if batch_start < completed:
+            # Batch size changed between runs - only write the unfinished tail
+            batch = batch[completed - batch_start:]
+            batch_start = completed
+
+        added = add_batch_to_collection(collection, batch, embedding_function)
+        stats.chunks_written += added
+        stats.chunks_skipped += len(batch) - added
+        stats.batches += 1
+        if added:
+            stats.changed_sources.update(doc.metadata.get('source', 'unknown') for doc in batch)
+        if checkpoint:
+            checkpoint.save(batch_start + len(batch))
+        print(f"✅ Wrote batch {stats.batches} ({batch_start + len(batch)} chunks so far, {added} new)")
+
+    if prune_stale:
+        for source, keep_ids in seen_ids.items():
+            deleted = delete_stale_chunks(collection, source, keep_ids)
+            stats.chunks_deleted += deleted
+            if deleted:
+                stats.changed_sources.add(source)
+            if lexical_index is not None:
+                lexical_index.retain_source(source, keep_ids)
+
+    if lexical_index is not None and save_lexical_index:
+        lexical_index.save()
+
+    if checkpoint:
+        checkpoint.clear()
+    return stats
+
+class FileIngestResult:
+    """Outcome of ingesting one file as part of a bulk run."""
+
+    def __init__(self, file_path, source):
+        self.file_path = file_path
+        self.source = source
+        self.pages = 0
+        self.chunks = 0
+        self.written = 0
+        self.skipped = 0
+        self.error = None
+
+def find_ingestable_files(directory):
+    """Return every supported document under `directory`, sorted by path."""
+    found = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+def iter_file_chunks(file_path, source=None, workers=1):
+    """Yield the chunks of one document as its pages are extracted and split.
+
+    Large PDFs are extracted by `workers` processes in page ranges (see
+    `iter_pdf_pages`); chunks flow straight on, so the file is never fully in memory.
+    """
+    if file_path.lower().endswith(".pdf"):
+        documents = iter_pdf_pages(file_path, workers)
+        file_type = "application/pdf"
+    else:
+        documents = load_html_file(file_path, source)
+        file_type = "text/html"
+
+    for chunk in iter_split(documents):
+        if source:
+            # Uploaded files live under temp names, so cite the name the user knows
+            chunk.metadata['source'] = source
+            chunk.metadata['file_type'] = file_type
+        yield chunk
+
+def count_pages(file_path):
+    """Return the page count of a PDF; an HTML file is one page."""
+    return pdf_page_count(file_path) if file_path.lower().endswith(".pdf") else 1
+
+def load_and_split_file(file_path, source=None):
+    """Load and split one document. Runs in a worker process during bulk ingest."""
+    return count_pages(file_path), list(iter_file_chunks(file_path, source))
+
+def ingest_files(file_paths, collection, embedding_function, workers=None, batch_size=DEFAULT_BATCH_SIZE, resume=True, source_names=None, progress_callback=None, lexical_index=None):
+    """Ingest many files, parsing and splitting them in a process pool.
+
+    Embedding and writes stay in this process so a single shared model is used.
+    Files are written as soon as their chunks are ready, and `progress_callback`
+    is called with a FileIngestResult after each file. PDFs of at least
+    PDF_PARALLEL_MIN_PAGES pages are instead streamed one at a time, with
+    every worker extracting a range of their pages. One bad file does not
+    stop the run; its error is recorded on its result. The `lexical_index`
+    is saved once at the end rather than after every file.
+    """
+    source_names = source_names or {}
+    stats = IngestStats()
+    results = []
+    if not file_paths:
+        return stats, results
+
+    workers = workers or min(len(file_paths), os.cpu_count() or 1)
+    print(f"🔧 Ingesting {len(file_paths)} files with {workers} parser processes...")
+
+    def write_file(file_path, pages, chunks):
+        """Write a file's chunks, which may be a list or a stream still being extracted."""
+        result = FileIngestResult(file_path, source_names.get(file_path, file_path))
+        result.pages = pages
+        checkpoint = IngestCheckpoint(result.source, file_fingerprint(file_path), CHECKPOINT_DIR)
+        if not resume:
+            checkpoint.clear()
+        written_before = stats.chunks_written
+        skipped_before = stats.chunks_skipped
+        resumed_before = stats.chunks_resumed
+        stream_chunks_to_collection(collection, chunks, embedding_function, batch_size, checkpoint, stats, lexical_index=lexical_index, save_lexical_index=False)
+        result.written = stats.chunks_written - written_before
+        result.skipped = stats.chunks_skipped - skipped_before
+        result.chunks = result.written + result.skipped + stats.chunks_resumed - resumed_before
+        return result
+
+    def finish(result):
+        results.append(result)
+        if result.error:
+            print(f"❌ [{len(results)}/{len(file_paths)}] {result.source}: {result.error}")
+        else:
+            print(f"✅ [{len(results)}/{len(file_paths)}] {result.source}: {result.pages} pages, {result.chunks} chunks ({result.written} new)")
+        if progress_callback:
+            progress_callback(result)
+
+    def fail(file_path, error):
+        result = FileIngestResult(file_path, source_names.get(file_path, file_path))
+        result.error = str(error)
+        finish(result)
+
+    try:
+        if workers == 1:
+            for file_path in file_paths:
+                try:
+                    pages = count_pages(file_path)
+                    finish(write_file(file_path, pages, iter_file_chunks(file_path, source_names.get(file_path))))
+                except Exception as e:
+                    fail(file_path, e)
+            return stats, results
+
+        small_files, large_pdfs = [], []
+        for file_path in file_paths:
+            try:
+                pages = count_pages(file_path)
+            except Exception as e:
+                fail(file_path, e)
+                continue
+            (large_pdfs if pages >= PDF_PARALLEL_MIN_PAGES else small_files).append((file_path, pages))
+
+        if small_files:
+            # Spawned workers do not inherit the model, Chroma or torch threads from this process
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=min(workers, len(small_files)), mp_context=context) as pool:
+                futures = {
+                    pool.submit(load_and_split_file, file_path, source_names.get(file_path)): file_path
+                    for file_path, _ in small_files
+                }
+                for future in as_completed(futures):
+                    file_path = futures[future]
+                    try:
+                        pages, chunks = future.result()
+                        finish(write_file(file_path, pages, chunks))
+                    except Exception as e:
+                        fail(file_path, e)
+
+        for file_path, pages in large_pdfs:
+            print(f"📄 Streaming {pages} pages of {source_names.get(file_path, file_path)} with {workers} page-range workers...")
+            try:
+                finish(write_file(file_path, pages, iter_file_chunks(file_path, source_names.get(file_path), workers)))
+            except Exception as e:
+                fail(file_path, e)
+        return stats, results
+    finally:
+        if lexical_index is not None:
+            lexical_index.save()
@@ -0,0 +1,95 @@
+import re
+import unicodedata
+
+# Share of letters that must be Latin script for a mixed-script question
+# (e.g. English with a Hindi word or two) to be classified by its Latin words
+ENGLISH_MIXED_THRESHOLD = 0.6
+
+# Unicode ranges for scripts that identify a language on their own
+SCRIPT_RANGES = [
+    ('hi', 0x0900, 0x097F),  # Devanagari
+    ('bn', 0x0980, 0x09FF),  # Bengali
+    ('ru', 0x0400, 0x04FF),  # Cyrillic
+    ('ja', 0x3040, 0x30FF),  # Hiragana and Katakana
+    ('ko', 0xAC00, 0xD7AF),  # Hangul syllables
+    ('ko', 0x1100, 0x11FF),  # Hangul jamo
+    ('zh', 0x4E00, 0x9FFF),  # CJK ideographs (also used by Japanese)
+]
+
+# Frequent function words used to tell Latin-script languages apart
+STOPWORDS = {
+    'en': {"the", "is", "are", "what", "how", "why", "when", "which", "who", "of", "and", "to", "in",
+           "for", "with", "can", "do", "does", "i", "my", "should", "about", "it", "be", "a", "an",
+           "symptoms", "during", "after", "before", "there", "this", "that", "or", "not"},
+    'es': {"el", "la", "los", "las", "es", "qué", "que", "cómo", "como", "de", "y", "en", "para", "con",
+           "por", "una", "un", "mi", "son", "durante", "puedo", "del"},
+    'fr': {"le", "la", "les", "est", "quoi", "quels", "quelles", "comment", "de", "et", "en", "pour",
+           "avec", "une", "un", "mon", "ma", "sont", "pendant", "des", "du", "je"},
+    'de': {"der", "die", "das", "ist", "was", "wie", "und", "in", "für", "mit", "ein", "eine", "mein",
+           "sind", "während", "ich", "nach", "vor", "welche"},
+    'it': {"il", "lo", "la", "gli", "le", "è", "cosa", "come", "di", "e", "in", "per", "con", "una",
+           "un", "mio", "sono", "durante", "quali", "della"},
+    'pt': {"o", "a", "os", "as", "é", "que", "como", "de", "e", "em", "para", "com", "uma", "um",
+           "meu", "são", "durante", "quais", "da", "do"},
+    # Romanized Hindi, which the Streamlit users type as often as Devanagari
+    'hi': {"kya", "hai", "hain", "ke", "ki", "ka", "mein", "mujhe", "kaise", "aur", "nahi", "kyu",
+           "kyon", "karna", "chahiye", "liye", "se", "ko", "baare"},
+}
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+def _script_of(char):
+    """Return the language code a character's script implies, 'latin', or None."""
+    code_point = ord(char)
+    for lang, start, end in SCRIPT_RANGES:
+        if start <= code_point <= end:
+            return lang
+    if char.isalpha() and unicodedata.name(char, "").startswith("LATIN"):
+        return 'latin'
+    return None
+
+def _latin_language(words):
+    """Score Latin-script words against each stopword list; return the best code or None."""
+    scores = {lang: sum(word in stopwords for word in words) for lang, stopwords in STOPWORDS.items()}
+    best = max(scores, key=scores.get)
+    if scores[best] == 0:
+        return None
+    # On a tie prefer English, the language the knowledge base is written in
+    if scores['en'] == scores[best]:
+        return 'en'
+    return best
+
+def detect_language(text, fallback='en'):
+    """Identify the language of `text` without any network call.
+
+    Non-Latin scripts are recognised from their Unicode ranges and Latin
+    text from common function words. A question that mixes scripts but is
+    mostly Latin-script English is reported as English. Text that gives no
+    signal (e.g. a bare medical term) returns `fallback`, normally the
+    language the user selected.
+    """
+    counts = {}
+    for char in text:
+        script = _script_of(char)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    total = sum(counts.values())
+    if not total:
+        return fallback
+
+    latin_share = counts.get('latin', 0) / total
+    words = WORD_PATTERN.findall(text.casefold())
+    latin_words = [word for word in words if all(_script_of(char) == 'latin' for char in word)]
+    latin_language = _latin_language(latin_words) if latin_words else None
+
+    if latin_share >= ENGLISH_MIXED_THRESHOLD and latin_language:
+        return latin_language
+
+    scripts = {script: count for script, count in counts.items() if script != 'latin'}
+    if scripts:
+        # Kana marks Japanese even when most characters are shared CJK ideographs
+        if 'ja' in scripts:
+            return 'ja'
+        return max(scripts, key=scripts.get)
+
+    return latin_language or fallback
@@ -0,0 +1,190 @@
+import os
+import re
+import gzip
+import json
+import math
+import threading
+
+LEXICAL_INDEX_DIR = os.environ.get("LEXICAL_INDEX_DIR", "db")
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "my", "of", "on", "or", "should", "that", "the", "this", "to", "was", "what",
+    "when", "which", "who", "why", "will", "with",
+}
+
+def tokenize(text):
+    """Lower-case word tokens without stopwords; acronyms such as PCOS or IUD survive as-is."""
+    return [token for token in TOKEN_PATTERN.findall(text.casefold()) if token not in STOPWORDS]
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuse several ranked ID lists; return `(id, score)` pairs, best first.
+
+    Only ranks are used, so BM25 scores and vector distances need no calibration.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+class BM25Index:
+    """Inverted index over the chunks of one Chroma collection, scored with BM25.
+
+    Chunks are keyed by the same IDs as in Chroma, so hits can be fetched from
+    the collection. The index is kept in memory and saved as gzip-compressed
+    JSON with delta-encoded postings.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._docs = {}
+        self._postings = {}
+        self._total_length = 0
+        self.dirty = False
+        self.load()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def load(self):
+        """Read the index from disk, leaving it empty if there is no file yet."""
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        doc_ids = data["doc_ids"]
+        sources = data["sources"]
+        with self._lock:
+            self._docs = {
+                doc_id: (sources[source], length)
+                for doc_id, source, length in zip(doc_ids, data["doc_sources"], data["lengths"])
+            }
+            self._postings = {}
+            for term, encoded in data["postings"].items():
+                postings = {}
+                ordinal = 0
+                for i in range(0, len(encoded), 2):
+                    ordinal += encoded[i]
+                    postings[doc_ids[ordinal]] = encoded[i + 1]
+                self._postings[term] = postings
+            self._total_length = sum(length for _, length in self._docs.values())
+            self.dirty = False
+
+    def save(self):
+        """Write the index to disk atomically if it changed since the last save."""
+        with self._lock:
+            if not self.dirty:
+                return
+            doc_ids = list(self._docs)
+            ordinals = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+            sources = sorted({source for source, _ in self._docs.values()})
+            source_ordinals = {source: i for i, source in enumerate(sources)}
+            postings = {}
+            for term, term_postings in self._postings.items():
+                encoded = []
+                previous = 0
+                for ordinal, frequency in sorted((ordinals[doc_id], tf) for doc_id, tf in term_postings.items()):
+                    encoded.extend((ordinal - previous, frequency))
+                    previous = ordinal
+                postings[term] = encoded
+            data = {
+                "version": 1,
+                "doc_ids": doc_ids,
+                "sources": sources,
+                "doc_sources": [source_ordinals[self._docs[doc_id][0]] for doc_id in doc_ids],
+                "lengths": [self._docs[doc_id][1] for doc_id in doc_ids],
+                "postings": postings,
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def add(self, doc_id, text, source):
+        """Index one chunk; chunks already indexed under `doc_id` are left alone."""
+        with self._lock:
+            if doc_id in self._docs:
+                return False
+            tokens = tokenize(text)
+            frequencies = {}
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + 1
+            for term, frequency in frequencies.items():
+                self._postings.setdefault(term, {})[doc_id] = frequency
+            self._docs[doc_id] = (source, len(tokens))
+            self._total_length += len(tokens)
+            self.dirty = True
+            return True
+
+    def remove(self, doc_ids):
+        """Drop chunks from the index; return how many were removed."""
+        with self._lock:
+            doc_ids = {doc_id for doc_id in doc_ids if doc_id in self._docs}
+            if not doc_ids:
+                return 0
+            for doc_id in doc_ids:
+                self._total_length -= self._docs.pop(doc_id)[1]
+            for term in list(self._postings):
+                postings = self._postings[term]
+                for doc_id in doc_ids & postings.keys():
+                    del postings[doc_id]
+                if not postings:
+                    del self._postings[term]
+            self.dirty = True
+            return len(doc_ids)
+
+    def retain_source(self, source, keep_ids):
+        """Drop chunks of `source` that are not in `keep_ids`, mirroring `delete_stale_chunks`."""
+        with self._lock:
+            stale_ids = [doc_id for doc_id, (doc_source, _) in self._docs.items() if doc_source == source and doc_id not in keep_ids]
+        return self.remove(stale_ids)
+
+    def search(self, query_text, n_results=10):
+        """Return up to `n_results` `(doc_id, score)` pairs ranked by BM25."""
+        terms = set(tokenize(query_text))
+        with self._lock:
+            if not self._docs or not terms:
+                return []
+            doc_count = len(self._docs)
+            average_length = self._total_length / doc_count or 1.0
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    length = self._docs[doc_id][1]
+                    norm = frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (BM25_K1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+    def rebuild_from_collection(self, collection, page_size=500):
+        """Index every chunk already stored in `collection`; used for stores built before the index existed."""
+        offset = 0
+        while True:
+            page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+            for doc_id, text, metadata in zip(page['ids'], page['documents'], page['metadatas']):
+                self.add(doc_id, text or "", (metadata or {}).get('source', 'unknown'))
+            offset += len(page['ids'])
+        self.save()
+        return len(self)
+
+def lexical_index_path(collection_name):
+    """Return where the BM25 index of a collection is stored."""
+    return os.path.join(LEXICAL_INDEX_DIR, f"{collection_name}.bm25.json.gz")
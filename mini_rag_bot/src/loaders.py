@@ -1,15 +1,102 @@
-import requests
-from bs4 import BeautifulSoup
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain.docstore.document import Document
+import os
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# The parsers are imported inside each loader so importing this module stays cheap
+
+# Pages each worker process extracts per task when a PDF is split into page ranges
+PDF_PAGES_PER_RANGE = int(os.environ.get("PDF_PAGES_PER_RANGE", "16"))
+# Smaller PDFs are extracted in-process; starting workers would cost more than it saves
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "64"))
+
+def pdf_page_count(file_path):
+    """Return the number of pages in a PDF without extracting any text."""
+    from pypdf import PdfReader
+    return len(PdfReader(file_path).pages)
+
+def _page_label(reader, page_number):
+    try:
+        return reader.page_labels[page_number]
+    except (IndexError, KeyError, ValueError):
+        return str(page_number + 1)
+
+def _extract_page_range(file_path, start, stop):
+    """Extract pages [start, stop) as (page number, label, text) tuples. Runs in a worker process."""
+    from pypdf import PdfReader
+    reader = PdfReader(file_path)
+    # Same text as PyPDFLoader, so chunk IDs of documents ingested before stay valid
+    return [
+        (page_number, _page_label(reader, page_number), reader.pages[page_number].extract_text().strip())
+        for page_number in range(start, stop)
+    ]
+
+def _page_document(source, page_number, page_label, text, total_pages):
+    from langchain.docstore.document import Document
+    return Document(page_content=text, metadata={
+        'source': source,
+        'page': page_number,
+        'page_label': page_label,
+        'total_pages': total_pages,
+    })
+
+def iter_pdf_pages(file_path, workers=None, pages_per_range=PDF_PAGES_PER_RANGE, source=None):
+    """Yield the pages of a PDF as Documents, in page order, as they are extracted.
+
+    PDFs of at least PDF_PARALLEL_MIN_PAGES pages are cut into page ranges
+    that worker processes extract in parallel (`workers` defaults to one per
+    CPU); smaller ones, or `workers=1`, are read page by page in this process.
+    Only a few ranges are in flight at a time, so memory stays flat however
+    large the file and however slowly the caller consumes pages.
+    """
+    from pypdf import PdfReader
+    source = source or file_path
+    reader = PdfReader(file_path)
+    total_pages = len(reader.pages)
+    range_count = -(-total_pages // pages_per_range)
+    workers = min(workers or os.cpu_count() or 1, range_count)
+    if workers <= 1 or total_pages < PDF_PARALLEL_MIN_PAGES:
+        for page_number, page in enumerate(reader.pages):
+            yield _page_document(source, page_number, _page_label(reader, page_number), page.extract_text().strip(), total_pages)
+        return
+
+    del reader
+    ranges = iter((start, min(start + pages_per_range, total_pages)) for start in range(0, total_pages, pages_per_range))
+    # Spawned workers do not inherit the model, Chroma or torch threads from the parent
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque(pool.submit(_extract_page_range, file_path, start, stop) for start, stop in itertools.islice(ranges, workers * 2))
+        try:
+            while pending:
+                pages = pending.popleft().result()
+                next_range = next(ranges, None)
+                if next_range is not None:
+                    pending.append(pool.submit(_extract_page_range, file_path, *next_range))
+                for page_number, page_label, text in pages:
+                    yield _page_document(source, page_number, page_label, text, total_pages)
+        finally:
+            # The caller stopped early (or failed): do not extract ranges nobody will read
+            for future in pending:
+                future.cancel()
 
 def load_pdf(file_path):
-    """Load a PDF file and return a list of Document objects."""
-    loader = PyPDFLoader(file_path)
-    return loader.load()
+    """Load a PDF file and return a list of Document objects, one per page."""
+    return list(iter_pdf_pages(file_path, workers=1))
+
+def load_html_file(file_path, source=None):
+    """Load a local HTML file and return a list of Document objects."""
+    from bs4 import BeautifulSoup
+    from langchain.docstore.document import Document
+    with open(file_path, 'r', encoding='utf-8') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+    metadata = {"source": source or file_path}
+    return [Document(page_content=soup.get_text(), metadata=metadata)]
 
 def load_html(url):
     """Load an HTML document from a URL and return a list of Document objects."""
+    import requests
+    from bs4 import BeautifulSoup
+    from langchain.docstore.document import Document
     try:
         response = requests.get(url)
         response.raise_for_status()  # Raise an exception for bad status codes
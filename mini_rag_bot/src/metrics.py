@@ -0,0 +1,101 @@
+import bisect
+import threading
+
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0)
+
+def percentile(values, q):
+    """Return the `q` quantile (0-1) of `values`, interpolating between the nearest samples."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+class Histogram:
+    """Thread-safe cumulative histogram of observed values, e.g. latencies in seconds."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self):
+        """Return count, sum and cumulative bucket counts keyed by upper bound."""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative[bound] = running
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        snapshot = self.snapshot()
+        if not snapshot["count"]:
+            return None
+        target = q * snapshot["count"]
+        for bound, running in snapshot["buckets"].items():
+            if running >= target:
+                return bound
+        return float("inf")
+
+class Counter:
+    """Thread-safe monotonically increasing counter."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        with self._lock:
+            return self._value
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for key, value in sorted(labels.items())
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def format_prometheus(name, kind, help_text, series):
+    """Render one metric family in the Prometheus text exposition format.
+
+    `series` is a list of `(labels, metric)` pairs, where each metric is a
+    Counter (kind "counter") or a Histogram (kind "histogram").
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, metric in series:
+        if kind == "counter":
+            lines.append(f"{name}{_format_labels(labels)} {_format_number(metric.value)}")
+            continue
+        snapshot = metric.snapshot()
+        for bound, running in snapshot["buckets"].items():
+            lines.append(f"{name}_bucket{_format_labels(dict(labels, le=_format_number(bound)))} {running}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(snapshot['sum'])}")
+        lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return "\n".join(lines) + "\n"
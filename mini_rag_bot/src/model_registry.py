@@ -0,0 +1,109 @@
+import os
+import time
+import threading
+import logging
+from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_configured_api_key = None
+_models = {}
+_latencies = {}
+# google.generativeai takes seconds to import; it is loaded on first configuration
+genai = None
+# When set, models are built by this callable instead of the Gemini SDK
+_model_factory = None
+
+def get_gemini_api_key():
+    """Get the Gemini API key from environment variables."""
+    return os.environ.get("GEMINI_API_KEY")
+
+def _load_genai():
+    """Import the Gemini SDK the first time it is needed."""
+    global genai
+    if genai is None:
+        import google.generativeai as genai
+    return genai
+
+def set_model_factory(factory):
+    """Build models with `factory(model_name, generation_config)` instead of Gemini; None restores the SDK.
+
+    Used to run the pipeline offline against local stand-ins.
+    """
+    global _model_factory
+    with _lock:
+        _model_factory = factory
+        _models.clear()
+
+def configure_genai():
+    """Configure the Generative AI client once per process (again only if the key changes)."""
+    global _configured_api_key
+    if _model_factory is not None:
+        return
+    api_key = get_gemini_api_key()
+    if not api_key:
+        logger.error("❌ GEMINI_API_KEY environment variable not set.")
+        raise ValueError("GEMINI_API_KEY environment variable not set.")
+    if api_key == _configured_api_key:
+        return
+
+    with _lock:
+        if api_key == _configured_api_key:
+            return
+        start_time = time.time()
+        logger.info("🔧 Starting Gemini API configuration...")
+        logger.info("🔑 API key found: %s...%s", api_key[:10], api_key[-4:])
+        try:
+            # Simple configuration - timeout will be handled at the request level
+            _load_genai().configure(api_key=api_key)
+        except Exception as e:
+            logger.error("❌ Failed to configure Gemini API: %s", e)
+            raise
+        # Models created under the previous key must not be reused
+        _models.clear()
+        _configured_api_key = api_key
+        logger.info("✅ Gemini API configured successfully in %.2fs", time.time() - start_time)
+
+def _config_key(generation_config):
+    return tuple(sorted((generation_config or {}).items()))
+
+def get_model(model_name, generation_config=None):
+    """Return a reusable GenerativeModel for this model name and generation config.
+
+    `generation_config` is a plain dict so it can be part of the cache key.
+    """
+    configure_genai()
+    key = (model_name, _config_key(generation_config))
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            model_start = time.time()
+            try:
+                if _model_factory is not None:
+                    model = _model_factory(model_name, generation_config)
+                else:
+                    model = _load_genai().GenerativeModel(model_name, generation_config=generation_config)
+            except Exception as e:
+                logger.error("❌ Failed to initialize Gemini model %s: %s", model_name, e)
+                raise
+            _models[key] = model
+            logger.info("⏱️ Model (%s) initialization took: %.2fs", model_name, time.time() - model_start)
+    return model
+
+def record_latency(model_name, seconds):
+    """Record how long one call to `model_name` took."""
+    histogram = _latencies.get(model_name)
+    if histogram is None:
+        with _lock:
+            histogram = _latencies.setdefault(model_name, Histogram())
+    histogram.observe(seconds)
+
+def latency_histograms():
+    """Return the per-model latency histograms."""
+    with _lock:
+        return dict(_latencies)
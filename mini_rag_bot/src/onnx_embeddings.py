@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import contextlib
+import numpy as np
+from .embeddings import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR
+from .metrics import percentile
+
+# all-MiniLM-L6-v2 embeds at most 256 word pieces, [CLS] and [SEP] included
+MAX_SEQ_LENGTH = 256
+ONNX_MODEL_FILE = "model_int8.onnx"
+ONNX_CONFIG_FILE = "embedding_config.json"
+ONNX_BATCH_SIZE = int(os.environ.get("ONNX_BATCH_SIZE", "32"))
+# 0 lets onnxruntime use one thread per physical core
+ONNX_THREADS = int(os.environ.get("ONNX_THREADS", "0"))
+# The parity check fails when any text's ONNX vector is less similar than this to the PyTorch one
+ONNX_PARITY_MIN_COSINE = float(os.environ.get("ONNX_PARITY_MIN_COSINE", "0.99"))
+_INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+class OnnxEmbeddings:
+    """The embedding model exported to int8 ONNX and run with onnxruntime on the CPU.
+
+    Mean pooling and L2 normalization follow the sentence-transformers
+    pipeline, so vectors have the same dimension and scale as
+    HuggingFaceEmbeddings and can be stored in the same collection.
+    """
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, batch_size=ONNX_BATCH_SIZE, threads=ONNX_THREADS):
+        import onnxruntime
+        from tokenizers import Tokenizer
+        config_path = os.path.join(model_dir, ONNX_CONFIG_FILE)
+        if not os.path.exists(config_path):
+            raise FileNotFoundError(f"No exported ONNX model in {model_dir} - run the export-onnx command first")
+        with open(config_path, encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config['max_seq_length'])
+        self.tokenizer.enable_padding(pad_id=self.config['pad_id'], pad_token=self.config['pad_token'])
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, self.config['model_file']), options, providers=["CPUExecutionProvider"]
+        )
+        # The exporter drops inputs the graph does not use
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        inputs = {
+            'input_ids': np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            'attention_mask': attention_mask,
+            'token_type_ids': np.array([encoding.type_ids for encoding in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts):
+        """Embed `texts` in batches of similar length, so little time is spent on padding."""
+        texts = list(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            for i, vector in zip(batch, self._embed_batch([texts[i] for i in batch])):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed_batch([text])[0].tolist()
+
+def _last_hidden_state_module(model):
+    """Wrap a transformers model so the exporter sees plain tensors in and out."""
+    import torch
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids).last_hidden_state
+
+    return LastHiddenState()
+
+def export_onnx_model(output_dir=ONNX_MODEL_DIR, model_name=EMBEDDING_MODEL_NAME, max_seq_length=MAX_SEQ_LENGTH):
+    """Export the embedding model to ONNX, quantize its weights to int8 and save it with its tokenizer.
+
+    Needs torch, transformers and onnx; the int8 model then only needs
+    onnxruntime and tokenizers to run.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    print(f"🔧 Exporting {model_name} to ONNX...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["A sample sentence to trace the model with."], return_tensors="pt")
+    sample_inputs = tuple(sample.get(name, torch.zeros_like(sample['input_ids'])) for name in _INPUT_NAMES)
+
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fp32_path = os.path.join(tmp_dir, "model.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                _last_hidden_state_module(model), sample_inputs, fp32_path,
+                input_names=_INPUT_NAMES,
+                output_names=["last_hidden_state"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in _INPUT_NAMES + ["last_hidden_state"]},
+                opset_version=17,
+                dynamo=False
+            )
+        print("🔧 Quantizing weights to int8...")
+        quantize_dynamic(fp32_path, os.path.join(output_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)
+    config = {
+        'model_name': model_name,
+        'model_file': ONNX_MODEL_FILE,
+        'max_seq_length': max_seq_length,
+        'dimension': model.config.hidden_size,
+        'pad_token': tokenizer.pad_token,
+        'pad_id': tokenizer.pad_token_id,
+    }
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    size_mb = os.path.getsize(os.path.join(output_dir, ONNX_MODEL_FILE)) / 1e6
+    print(f"✅ Saved int8 ONNX model to {output_dir} ({size_mb:.1f} MB)")
+    return output_dir
+
+def cosine_parity(reference_vectors, candidate_vectors, min_cosine=ONNX_PARITY_MIN_COSINE):
+    """Compare two embeddings of the same texts, row by row."""
+    reference = np.asarray(reference_vectors, dtype=np.float32)
+    candidate = np.asarray(candidate_vectors, dtype=np.float32)
+    if reference.shape != candidate.shape:
+        return {'texts': len(reference), 'shape_match': False, 'reference_shape': list(reference.shape),
+                'candidate_shape': list(candidate.shape), 'passed': False}
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosines = (reference * candidate).sum(axis=1) / np.clip(norms, 1e-12, None)
+    return {
+        'texts': len(cosines),
+        'shape_match': True,
+        'dimension': reference.shape[1],
+        'mean_cosine': round(float(cosines.mean()), 6),
+        'min_cosine': round(float(cosines.min()), 6),
+        'p01_cosine': round(float(percentile(cosines.tolist(), 0.01)), 6),
+        'max_drift': round(float(1 - cosines.min()), 6),
+        'min_cosine_required': min_cosine,
+        'passed': bool(cosines.min() >= min_cosine),
+    }
+
+def embedding_throughput(embedding_function, texts, repeats=3, queries=32):
+    """Measure bulk throughput (texts per second) and single-query latency of an embedding model."""
+    embedding_function.embed_documents(texts[:8])
+    best = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        embedding_function.embed_documents(texts)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+
+    latencies = []
+    for text in texts[:queries]:
+        start_time = time.perf_counter()
+        embedding_function.embed_query(text)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return {
+        'texts_per_second': round(len(texts) / best, 2) if best else None,
+        'query_p50_ms': round(percentile(latencies, 0.5), 3) if latencies else None,
+        'query_p95_ms': round(percentile(latencies, 0.95), 3) if latencies else None,
+    }
+
+def compare_embedding_backends(texts, reference, candidate, repeats=3):
+    """Report the cosine drift of `candidate` against `reference` and the throughput of both."""
+    texts = list(texts)
+    parity = cosine_parity(reference.embed_documents(texts), candidate.embed_documents(texts))
+    reference_speed = embedding_throughput(reference, texts, repeats)
+    candidate_speed = embedding_throughput(candidate, texts, repeats)
+    speedup = None
+    if reference_speed['texts_per_second'] and candidate_speed['texts_per_second']:
+        speedup = round(candidate_speed['texts_per_second'] / reference_speed['texts_per_second'], 2)
+    return {
+        'texts': len(texts),
+        'parity': parity,
+        'throughput': {'torch': reference_speed, 'onnx_int8': candidate_speed, 'speedup': speedup},
+    }
+
+def load_comparison_texts(pdf_paths=None, limit=256):
+    """Return up to `limit` chunk texts from the benchmark PDFs, as ingest would produce them."""
+    from .benchmark import BENCHMARK_PDFS
+    from .loaders import iter_pdf_pages
+    from .splitter import iter_split
+    texts = []
+    for pdf_path in pdf_paths or BENCHMARK_PDFS:
+        for chunk in iter_split(iter_pdf_pages(pdf_path)):
+            texts.append(chunk.page_content)
+            if len(texts) >= limit:
+                return texts
+    return texts
+
+def run_comparison(model_dir=ONNX_MODEL_DIR, pdf_paths=None, limit=256, repeats=3):
+    """Compare the int8 ONNX model in `model_dir` with the PyTorch model on benchmark chunks."""
+    from .embeddings import get_embedding_function
+    texts = load_comparison_texts(pdf_paths, limit)
+    print(f"⏱️ Comparing embedding backends on {len(texts)} chunks...")
+    report = compare_embedding_backends(texts, get_embedding_function("torch"), OnnxEmbeddings(model_dir), repeats)
+    report['model'] = EMBEDDING_MODEL_NAME
+    report['model_dir'] = model_dir
+    parity = report['parity']
+    if parity['passed']:
+        print(f"✅ Parity OK: min cosine {parity['min_cosine']:.4f}, {report['throughput']['speedup']}x throughput")
+    else:
+        print(f"⚠️ Parity check failed: {parity}")
+    return report
+
+def run_comparison_cli(output_path="-", **options):
+    """Run the comparison and write its JSON report to `output_path` (`-` for stdout)."""
+    with contextlib.ExitStack() as stack:
+        if output_path == "-":
+            output = sys.stdout
+            # Keep the progress messages out of the JSON
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+        else:
+            output = stack.enter_context(open(output_path, "w", encoding="utf-8"))
+        report = run_comparison(**options)
+        json.dump(report, output, indent=2)
+        output.write("\n")
+    return report
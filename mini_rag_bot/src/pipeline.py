@@ -0,0 +1,97 @@
+import time
+from .generator import generate_answer, generate_answer_stream
+from .language_detect import detect_language
+from .resources import get_shared_answer_cache, get_shared_retriever
+from .translator import translate_to_english, translate_from_english
+from .tracing import span
+
+def answer_question(question, lang='en', on_delta=None, on_stage=None, english_question=None, context=None, generate_without_context=True, detect=True):
+    """Answer one question: detect, translate, retrieve, look up the answer cache, generate, store and translate back.
+
+    This is the whole ask pipeline shared by the CLI, Streamlit, ask-batch
+    and the HTTP server. Each stage runs in a span of the caller's request.
+
+    - `on_delta` receives text deltas as Gemini streams an English answer;
+      cached or translated answers are never streamed, see `streamed`.
+    - `on_stage` is called with a stage name before each stage runs.
+    - `lang` is the language the user selected and is only used when the
+      question gives no signal; callers that already ran `detect_language`
+      pass its result with `detect=False`.
+    - `english_question` and `context` skip detection, translation and
+      retrieval when the caller already did them (ask-batch does them for a
+      whole chunk at once); `lang` is then taken as given.
+    - Without `generate_without_context`, nothing is generated when
+      retrieval finds no documents and `answer` is None.
+
+    Returns a dict with the answer, citations, source details, the language
+    and English question, whether the answer was cached or streamed, the
+    number of context documents and per-stage timings in seconds.
+    """
+    notify = on_stage or (lambda stage: None)
+    timings = {}
+
+    if english_question is None:
+        if detect:
+            lang = detect_language(question, lang)
+        english_question = question
+        if lang != 'en':
+            notify("translate_question")
+            stage_start = time.time()
+            with span("translate_question"):
+                english_question = translate_to_english(question, lang)
+            timings['question_translation_s'] = time.time() - stage_start
+
+    retriever = get_shared_retriever()
+    if context is None:
+        notify("retrieve")
+        stage_start = time.time()
+        with span("retrieve") as retrieve_span:
+            context = retriever.query(english_question)
+            retrieve_span.set(documents=len(context))
+        timings['retrieval_s'] = time.time() - stage_start
+
+    response = {
+        'answer': None, 'citations': [], 'source_details': [], 'lang': lang, 'english_question': english_question,
+        'cached': False, 'streamed': False, 'context_documents': len(context), 'timings': timings,
+    }
+    if not context and not generate_without_context:
+        return response
+
+    notify("generate")
+    stage_start = time.time()
+    result = None
+    question_embedding = None
+    answer_cache = get_shared_answer_cache()
+    if context:
+        # Similar questions over the same retrieved context reuse the earlier answer
+        with span("answer_cache_lookup") as lookup_span:
+            question_embedding = retriever.embedding_function.embed_query(english_question)
+            result = answer_cache.lookup(question_embedding, context)
+            lookup_span.set(hit=result is not None)
+    response['cached'] = result is not None
+
+    if result is None:
+        stream = on_delta is not None and lang == 'en'
+        with span("generate", stream=stream):
+            if stream:
+                streamed = generate_answer_stream(context, english_question)
+                for delta in streamed:
+                    on_delta(delta)
+                result = streamed.result()
+            else:
+                result = generate_answer(context, english_question)
+        response['streamed'] = stream
+        if context:
+            answer_cache.store(english_question, question_embedding, context, result)
+    timings['generation_s'] = time.time() - stage_start
+
+    answer = result['answer']
+    if lang != 'en':
+        notify("translate_answer")
+        stage_start = time.time()
+        with span("translate_answer"):
+            answer = translate_from_english(answer, lang)
+        timings['answer_translation_s'] = time.time() - stage_start
+
+    response.update(answer=answer, citations=result['citations'], source_details=result.get('source_details', []))
+    return response
@@ -0,0 +1,132 @@
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from .disk_cache import CACHE_DIR, SqliteLRUCache
+from .tracing import increment
+
+def normalize_query(text):
+    """Normalize a question so trivially different spellings share a cache entry."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!.。। ").strip()
+
+class QueryEmbeddingCache:
+    """Caches query embeddings in memory and on disk in front of an embedding model.
+
+    Lookups go to a bounded in-memory LRU first, then to a persistent SQLite LRU,
+    and only then to the model. The disk layer is wiped when the model changes.
+    Exposes the same embed_query/embed_documents interface as the wrapped model.
+    """
+
+    def __init__(self, embedding_function, model_name, path=None, max_memory_entries=1024, max_disk_entries=50000):
+        self.embedding_function = embedding_function
+        self.model_name = model_name
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._disk = SqliteLRUCache(path or os.path.join(CACHE_DIR, "query_embeddings.sqlite3"), max_disk_entries)
+        if self._disk.get_meta("model_name") != model_name:
+            if len(self._disk):
+                print(f"⚠️ Embedding model changed to {model_name} - clearing query embedding cache")
+            self._disk.clear()
+            self._disk.set_meta("model_name", model_name)
+
+    def _key(self, text):
+        return hashlib.sha256(normalize_query(text).encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, text):
+        """Return the cached embedding for `text`, or None."""
+        key = self._key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                increment("rag_cache_lookups_total", cache="query_embedding", result="memory_hit")
+                return vector
+
+        blob = self._disk.get(key)
+        if blob is None:
+            return None
+        vector = array("f")
+        vector.frombytes(blob)
+        vector = vector.tolist()
+        self._remember(key, vector)
+        with self._lock:
+            self.disk_hits += 1
+        increment("rag_cache_lookups_total", cache="query_embedding", result="disk_hit")
+        return vector
+
+    def put(self, text, vector):
+        """Store the embedding for `text` in both layers."""
+        key = self._key(text)
+        self._remember(key, list(vector))
+        self._disk.set(key, array("f", vector).tobytes())
+
+    def embed_query(self, text):
+        """Return the embedding for a question, computing it only on a cache miss."""
+        vector = self.get(text)
+        if vector is not None:
+            return vector
+        with self._lock:
+            self.misses += 1
+        increment("rag_cache_lookups_total", cache="query_embedding", result="miss")
+        vector = self.embedding_function.embed_query(text)
+        self.put(text, vector)
+        return vector
+
+    def embed_queries(self, texts):
+        """Return embeddings for many questions, computing every cache miss in one batched model call."""
+        vectors = [self.get(text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+            increment("rag_cache_lookups_total", len(missing), cache="query_embedding", result="miss")
+            # The query and document encodings are the same for the sentence-transformers models used here
+            computed = self.embedding_function.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = list(vector)
+                self.put(texts[i], vectors[i])
+        return vectors
+
+    def embed_documents(self, texts):
+        """Documents are not cached; they go straight to the model."""
+        return self.embedding_function.embed_documents(texts)
+
+    def invalidate(self):
+        """Drop every cached embedding."""
+        with self._lock:
+            self._memory.clear()
+        self._disk.clear()
+
+    def stats(self):
+        """Return hit/miss counters and cache sizes."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk),
+            }
+
+    def close(self):
+        self._disk.close()
@@ -0,0 +1,88 @@
+import os
+import time
+import numpy as np
+
+MMR_LAMBDA = float(os.environ.get("MMR_LAMBDA", "0.7"))
+# Candidates at least this similar to an already selected chunk are dropped outright
+DUPLICATE_SIMILARITY = float(os.environ.get("DUPLICATE_SIMILARITY", "0.95"))
+# Optional CPU cross-encoder, e.g. cross-encoder/ms-marco-MiniLM-L-6-v2; empty disables it
+RERANKER_MODEL = os.environ.get("RERANKER_MODEL", "")
+RERANKER_BUDGET_MS = float(os.environ.get("RERANKER_BUDGET_MS", "150"))
+RERANKER_BATCH_SIZE = int(os.environ.get("RERANKER_BATCH_SIZE", "4"))
+
+def mmr_select(relevance, embeddings, k, lambda_mult=MMR_LAMBDA, duplicate_threshold=DUPLICATE_SIMILARITY):
+    """Pick up to `k` candidate indices by maximal marginal relevance.
+
+    `relevance` scores the candidates against the query and `embeddings` are
+    their stored vectors (None where unknown). Each step takes the candidate
+    that best balances relevance against similarity to what is already
+    chosen; near-duplicates of a chosen chunk are never taken, so fewer than
+    `k` indices may come back.
+    """
+    if not relevance:
+        return []
+    relevance = np.asarray(relevance, dtype=np.float32)
+    if relevance.max() > 0:
+        relevance = relevance / relevance.max()
+
+    dimension = next((len(e) for e in embeddings if e is not None), 0)
+    vectors = np.stack([
+        np.asarray(e, dtype=np.float32) if e is not None else np.zeros(dimension, dtype=np.float32)
+        for e in embeddings
+    ]) if dimension else np.zeros((len(embeddings), 1), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = vectors @ vectors.T
+
+    selected = []
+    remaining = list(range(len(relevance)))
+    while remaining and len(selected) < k:
+        if selected:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining), dtype=np.float32)
+        scores = lambda_mult * relevance[remaining] - (1 - lambda_mult) * redundancy
+        best = int(np.argmax(scores))
+        selected.append(remaining.pop(best))
+        # Drop everything that is a near-copy of the chunk just chosen
+        remaining = [i for i in remaining if similarity[i, selected[-1]] < duplicate_threshold]
+    return selected
+
+class CrossEncoderReranker:
+    """Reorders candidates with a small CPU cross-encoder, within a time budget.
+
+    Candidates are scored best-first in small batches; once the budget is
+    spent the unscored tail keeps its incoming order after the scored head.
+    """
+
+    def __init__(self, model_name=RERANKER_MODEL, budget_ms=RERANKER_BUDGET_MS, batch_size=RERANKER_BATCH_SIZE):
+        from sentence_transformers import CrossEncoder
+        print(f"🔧 Loading reranker {model_name}...")
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self.budget_exhausted = 0
+
+    def rerank(self, query_text, texts):
+        """Return the indices of `texts` in reranked order."""
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        scores = []
+        for start in range(0, len(texts), self.batch_size):
+            if time.perf_counter() >= deadline:
+                self.budget_exhausted += 1
+                print(f"⏰ Reranker budget of {self.budget_ms:.0f}ms spent after {len(scores)} of {len(texts)} chunks")
+                break
+            batch = texts[start:start + self.batch_size]
+            scores.extend(float(score) for score in self.model.predict([(query_text, text) for text in batch]))
+        head = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return head + list(range(len(scores), len(texts)))
+
+def create_reranker():
+    """Return the configured cross-encoder reranker, or None when none is configured or it fails to load."""
+    if not RERANKER_MODEL:
+        return None
+    try:
+        return CrossEncoderReranker()
+    except Exception as e:
+        print(f"⚠️ Reranker not available - using MMR only: {e}")
+        return None
@@ -0,0 +1,215 @@
+import os
+import time
+import atexit
+import threading
+from .vector_store import get_chroma_client, create_collection
+from .embeddings import embedding_model_id, get_embedding_function
+from .splitter import create_text_splitter
+from .query_cache import QueryEmbeddingCache
+from .answer_cache import SemanticAnswerCache
+from .lexical_index import BM25Index, lexical_index_path
+from .reranker import create_reranker
+from .web_cache import WEB_SEARCH_REPLAY, CachedTavilySearch
+
+class ResourceRegistry:
+    """Process-wide registry of expensive, shareable resources.
+
+    Each resource is created lazily on first use, handed out to every caller
+    afterwards and released by `shutdown()`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._resources = {}
+        self._closers = {}
+        self._cold_start_times = {}
+
+    def get_or_create(self, key, factory, closer=None):
+        """Return the resource stored under `key`, building it with `factory` on first use."""
+        if key in self._resources:
+            return self._resources[key]
+
+        # One lock per key so a slow model load does not block unrelated resources
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if key not in self._resources:
+                print(f"🔧 Cold start: {key}")
+                start_time = time.time()
+                resource = factory()
+                elapsed = time.time() - start_time
+                with self._lock:
+                    self._resources[key] = resource
+                    self._cold_start_times[key] = elapsed
+                    if closer:
+                        self._closers[key] = closer
+                print(f"✅ {key} ready in {elapsed:.2f}s")
+            return self._resources[key]
+
+    def register(self, key, resource, closer=None):
+        """Install a ready-made resource under `key`, e.g. a stand-in for benchmarks."""
+        with self._lock:
+            self._resources[key] = resource
+            self._cold_start_times[key] = 0.0
+            if closer:
+                self._closers[key] = closer
+            else:
+                self._closers.pop(key, None)
+
+    def is_loaded(self, key):
+        """Return True if the resource has already been created."""
+        return key in self._resources
+
+    def cold_start_times(self):
+        """Return a mapping of resource key to cold start time in seconds."""
+        with self._lock:
+            return dict(self._cold_start_times)
+
+    def shutdown(self):
+        """Release every resource, newest first, and forget about them."""
+        with self._lock:
+            keys = list(self._resources)[::-1]
+            resources = self._resources
+            closers = self._closers
+            self._resources = {}
+            self._closers = {}
+            self._cold_start_times = {}
+
+        for key in keys:
+            closer = closers.get(key)
+            if closer is None:
+                continue
+            try:
+                closer(resources[key])
+            except Exception as e:
+                print(f"⚠️ Failed to close {key}: {e}")
+
+
+registry = ResourceRegistry()
+atexit.register(registry.shutdown)
+
+
+def create_tavily_search():
+    """Return a configured TavilySearch tool, or None if web search is unavailable."""
+    tavily_api_key = os.environ.get("TAVILY_API_KEY")
+    if not (tavily_api_key and tavily_api_key != "dummy_key" and len(tavily_api_key) > 10):
+        print("⚠️ TAVILY_API_KEY not set or invalid - web search disabled")
+        return None
+
+    try:
+        print("🔧 Initializing Tavily search...")
+        from langchain_tavily import TavilySearch
+        tavily = TavilySearch(
+            api_key=tavily_api_key,
+            max_results=3,
+            include_answer=True,
+            search_depth="advanced"
+        )
+        print("✅ Tavily search initialized successfully")
+        return tavily
+    except Exception as e:
+        print(f"⚠️ Tavily search not available: {e}")
+        return None
+
+
+def _close_chroma_client(client):
+    """Close the client so its files are released (older chromadb has no close())."""
+    close = getattr(client, "close", None)
+    if close is not None:
+        close()
+
+
+def get_shared_embedding_function():
+    """Return the process-wide embedding model."""
+    return registry.get_or_create("embedding_function", get_embedding_function)
+
+
+def get_shared_splitter():
+    """Return the process-wide text splitter, so its tokenizer is loaded once."""
+    return registry.get_or_create("text_splitter", create_text_splitter)
+
+
+def get_shared_query_embedder():
+    """Return the embedding model wrapped in the process-wide query embedding cache."""
+    return registry.get_or_create(
+        "query_embedding_cache",
+        lambda: QueryEmbeddingCache(get_shared_embedding_function(), embedding_model_id()),
+        closer=lambda cache: cache.close()
+    )
+
+
+def get_shared_answer_cache():
+    """Return the process-wide semantic answer cache."""
+    return registry.get_or_create("answer_cache", SemanticAnswerCache, closer=lambda cache: cache.close())
+
+
+def get_shared_chroma_client():
+    """Return the process-wide ChromaDB client."""
+    return registry.get_or_create("chroma_client", get_chroma_client, closer=_close_chroma_client)
+
+
+def get_shared_collection(name="women_health"):
+    """Return the process-wide handle for a ChromaDB collection."""
+    return registry.get_or_create(
+        f"collection:{name}",
+        lambda: create_collection(get_shared_chroma_client(), name)
+    )
+
+
+def create_lexical_index(name):
+    """Load the BM25 index of a collection, building it from Chroma if it is missing."""
+    index = BM25Index(lexical_index_path(name))
+    if not len(index):
+        collection = get_shared_collection(name)
+        if collection.count():
+            print(f"🔧 Building lexical index for {collection.count()} stored chunks...")
+            index.rebuild_from_collection(collection)
+    return index
+
+
+def get_shared_lexical_index(name="women_health"):
+    """Return the process-wide BM25 index of a collection; it is saved on shutdown."""
+    return registry.get_or_create(
+        f"lexical_index:{name}",
+        lambda: create_lexical_index(name),
+        closer=lambda index: index.save()
+    )
+
+
+def get_shared_reranker():
+    """Return the process-wide cross-encoder reranker, or None if none is configured."""
+    return registry.get_or_create("reranker", create_reranker)
+
+
+def create_cached_tavily_search():
+    """Return the Tavily tool behind the on-disk response cache, or None if web search is disabled."""
+    if WEB_SEARCH_REPLAY:
+        print("🔁 Web search replay mode - serving recorded Tavily results only")
+        return CachedTavilySearch(None)
+    tavily = create_tavily_search()
+    return CachedTavilySearch(tavily) if tavily is not None else None
+
+
+def get_shared_tavily():
+    """Return the process-wide Tavily search tool, or None if web search is disabled."""
+    return registry.get_or_create(
+        "tavily",
+        create_cached_tavily_search,
+        closer=lambda tavily: tavily.close() if tavily is not None else None
+    )
+
+
+def get_shared_retriever(collection_name="women_health"):
+    """Return a process-wide Retriever built on the shared resources."""
+    from .retriever import Retriever
+    return registry.get_or_create(
+        f"retriever:{collection_name}",
+        lambda: Retriever(collection_name)
+    )
+
+
+def shutdown_resources():
+    """Release every shared resource. They are re-created lazily on next use."""
+    registry.shutdown()
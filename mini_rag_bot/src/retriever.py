@@ -1,146 +1,436 @@
 import os
-from .vector_store import get_chroma_client, create_collection
-from .embeddings import get_embedding_function
-from langchain_tavily import TavilySearch
+import re
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from .resources import get_shared_chroma_client, get_shared_collection, get_shared_lexical_index, get_shared_query_embedder, get_shared_reranker, get_shared_tavily
+from .lexical_index import reciprocal_rank_fusion
+from .reranker import mmr_select
+from .vector_store import chunk_id
+from .tracing import span
 from langchain.docstore.document import Document
 
+logger = logging.getLogger(__name__)
+
+LOCAL_SEARCH_TIMEOUT = float(os.environ.get("LOCAL_SEARCH_TIMEOUT", "10"))
+WEB_SEARCH_TIMEOUT = float(os.environ.get("WEB_SEARCH_TIMEOUT", "15"))
+# Each local ranking looks this many times deeper than the final result count before fusion
+LOCAL_CANDIDATE_MULTIPLIER = int(os.environ.get("LOCAL_CANDIDATE_MULTIPLIER", "3"))
+# Web search is skipped when at least this many local chunks are within this
+# Chroma (squared L2) distance; 0.9 is a cosine similarity of about 0.55 for
+# the normalized MiniLM embeddings
+CONFIDENT_DISTANCE = float(os.environ.get("WEB_GATE_MAX_DISTANCE", "0.9"))
+CONFIDENT_HITS = int(os.environ.get("WEB_GATE_MIN_HITS", "2"))
+
+# Searches run here rather than in the event loop's default executor, which
+# asyncio.run() joins on exit - that would make a timed-out search block again
+_search_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="retriever-search")
+
+def run_sync(coroutine):
+    """Run a coroutine to completion from synchronous code.
+
+    Uses a private thread when the caller is already inside an event loop,
+    where asyncio.run() is not allowed.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    result = {}
+    # Carry the caller's context (the current trace span) into the private thread
+    context = contextvars.copy_context()
+    def runner():
+        try:
+            result['value'] = context.run(asyncio.run, coroutine)
+        except BaseException as e:
+            result['error'] = e
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+class WebSearchStats:
+    """Counters for the web search gate, shared by every Retriever in the process.
+
+    Latency saved is estimated from the running average of web searches that did run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.searched_concurrently = 0
+        self.searched_after_low_confidence = 0
+        self.skipped_confident = 0
+        self.skipped_unavailable = 0
+        self.web_latency_total = 0.0
+        self.latency_saved = 0.0
+
+    def record_search(self, concurrent, elapsed):
+        with self._lock:
+            if concurrent:
+                self.searched_concurrently += 1
+            else:
+                self.searched_after_low_confidence += 1
+            self.web_latency_total += elapsed
+
+    def record_skip(self, unavailable=False):
+        with self._lock:
+            if unavailable:
+                self.skipped_unavailable += 1
+                return
+            self.skipped_confident += 1
+            searches = self.searched_concurrently + self.searched_after_low_confidence
+            if searches:
+                self.latency_saved += self.web_latency_total / searches
+
+    def snapshot(self):
+        """Return the counters as a dict."""
+        with self._lock:
+            searches = self.searched_concurrently + self.searched_after_low_confidence
+            return {
+                "searched_concurrently": self.searched_concurrently,
+                "searched_after_low_confidence": self.searched_after_low_confidence,
+                "skipped_confident": self.skipped_confident,
+                "skipped_unavailable": self.skipped_unavailable,
+                "average_web_latency": self.web_latency_total / searches if searches else 0.0,
+                "estimated_latency_saved": self.latency_saved,
+            }
+
+web_search_stats = WebSearchStats()
+
 class Retriever:
     def __init__(self, collection_name="women_health"):
         print("🔧 Initializing Retriever...")
-        self.client = get_chroma_client()
-        self.collection = create_collection(self.client, collection_name)
-        self.embedding_function = get_embedding_function()
-        
-        # Initialize Tavily search with better error handling
-        tavily_api_key = os.environ.get("TAVILY_API_KEY")
-        if tavily_api_key and tavily_api_key != "dummy_key" and len(tavily_api_key) > 10:
-            try:
-                print("🔧 Initializing Tavily search...")
-                self.tavily = TavilySearch(
-                    api_key=tavily_api_key, 
-                    max_results=3, 
-                    include_answer=True,
-                    search_depth="advanced"
-                )
-                self.tavily_available = True
-                print("✅ Tavily search initialized successfully")
-            except Exception as e:
-                print(f"⚠️ Tavily search not available: {e}")
-                self.tavily_available = False
-        else:
-            print("⚠️ TAVILY_API_KEY not set or invalid - web search disabled")
-            self.tavily_available = False
+        # Heavy handles come from the process-wide registry, so building a
+        # Retriever per request no longer reloads the model or reopens the DB
+        self.client = get_shared_chroma_client()
+        self.collection = get_shared_collection(collection_name)
+        self.embedding_function = get_shared_query_embedder()
+        self.lexical_index = get_shared_lexical_index(collection_name)
+        self.reranker = get_shared_reranker()
+        self.tavily = get_shared_tavily()
+        self.tavily_available = self.tavily is not None
         
         print("✅ Retriever initialized successfully")
 
     def query(self, query_text, n_results=5):
-        """Enhanced query with women's health focus and proper citation tracking."""
-        print(f"🔍 Processing query: '{query_text}'")
+        """Enhanced query with women's health focus and proper citation tracking.
+
+        Thin synchronous wrapper around `aquery`.
+        """
+        return run_sync(self.aquery(query_text, n_results))
+
+    async def aquery(self, query_text, n_results=5, local_timeout=LOCAL_SEARCH_TIMEOUT, web_timeout=WEB_SEARCH_TIMEOUT):
+        """Search the local store, and the web only when it is likely to help.
+
+        Questions with recency cues search both sources concurrently. Otherwise
+        the local store answers first and Tavily is called only if fewer than
+        CONFIDENT_HITS local chunks are within CONFIDENT_DISTANCE. Each source
+        has its own deadline; a source that misses it contributes no documents
+        instead of failing the request.
+        """
+        logger.info("🔍 Processing query: '%s'", query_text)
+        enhanced_query = self._enhance_query_for_womens_health(query_text)
+
+        local_task = asyncio.create_task(
+            self._with_deadline("Local search", local_timeout, self._search_local, query_text, n_results)
+        )
+        if not self.tavily_available:
+            logger.info("⚠️ Web search not available - using only local knowledge base")
+            web_search_stats.record_skip(unavailable=True)
+            documents = await local_task
+        elif self._needs_current_info(query_text):
+            logger.info("🕒 Question asks for current information - searching the web in parallel")
+            web_task = asyncio.create_task(self._timed_web_search(enhanced_query, web_timeout, concurrent=True))
+            documents = await local_task
+            documents = documents + await web_task
+        else:
+            documents = await local_task
+            if self._local_results_confident(documents):
+                logger.info("✅ Local results are confident - skipping web search")
+                web_search_stats.record_skip()
+            else:
+                logger.info("🔧 Local results are weak - falling back to web search")
+                documents = documents + await self._timed_web_search(enhanced_query, web_timeout, concurrent=False)
+
+        return self._merge_results(documents, enhanced_query, n_results)
+
+    def query_batch(self, query_texts, n_results=5):
+        """Answer-ready context for many questions; synchronous wrapper around `aquery_batch`."""
+        return run_sync(self.aquery_batch(query_texts, n_results))
+
+    async def aquery_batch(self, query_texts, n_results=5, local_timeout=LOCAL_SEARCH_TIMEOUT, web_timeout=WEB_SEARCH_TIMEOUT):
+        """Search for many questions at once, with the same web gating as `aquery`.
+
+        Local search is one batched embedding call and one Chroma query. Web
+        searches for questions with recency cues start straight away, those
+        for questions with weak local results once local search is done; all
+        of them run concurrently. Returns one Document list per question.
+        """
+        logger.info("🔍 Processing %s queries in one batch", len(query_texts))
+        enhanced_queries = [self._enhance_query_for_womens_health(query_text) for query_text in query_texts]
+
+        local_task = asyncio.create_task(
+            self._with_deadline("Local batch search", local_timeout, self._search_local_batch, query_texts, n_results)
+        )
+        web_tasks = {}
+        if self.tavily_available:
+            for i, query_text in enumerate(query_texts):
+                if self._needs_current_info(query_text):
+                    web_tasks[i] = asyncio.create_task(self._timed_web_search(enhanced_queries[i], web_timeout, concurrent=True))
+
+        local_documents = await local_task or [[] for _ in query_texts]
+        for i, documents in enumerate(local_documents):
+            if not self.tavily_available:
+                web_search_stats.record_skip(unavailable=True)
+            elif i in web_tasks:
+                continue
+            elif self._local_results_confident(documents):
+                web_search_stats.record_skip()
+            else:
+                web_tasks[i] = asyncio.create_task(self._timed_web_search(enhanced_queries[i], web_timeout, concurrent=False))
+        if web_tasks:
+            logger.info("🔧 Searching the web for %s of %s questions...", len(web_tasks), len(query_texts))
+
+        results = []
+        for i, documents in enumerate(local_documents):
+            if i in web_tasks:
+                documents = documents + await web_tasks[i]
+            results.append(self._merge_results(documents, enhanced_queries[i], n_results))
+        return results
+
+    def _local_results_confident(self, documents):
+        """Return True when enough local chunks are close to the query in vector space."""
+        close_hits = [
+            doc for doc in documents
+            if doc.metadata.get('score') is not None and doc.metadata['score'] <= CONFIDENT_DISTANCE
+        ]
+        return len(close_hits) >= CONFIDENT_HITS
+
+    async def _timed_web_search(self, enhanced_query, web_timeout, concurrent):
+        """Run the web search under its deadline and record how long it took."""
+        start_time = time.time()
+        documents = await self._with_deadline("Web search", web_timeout, self._search_web, enhanced_query)
+        web_search_stats.record_search(concurrent, time.time() - start_time)
+        return documents
+
+    async def _with_deadline(self, label, timeout, func, *args):
+        """Run a blocking search in a worker thread, giving up on it after `timeout` seconds."""
+        start_time = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            # run_in_executor does not copy context variables, so spans would lose their request
+            context = contextvars.copy_context()
+            documents = await asyncio.wait_for(loop.run_in_executor(_search_executor, context.run, func, *args), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("⏰ %s missed its %.1fs deadline - continuing without it", label, timeout)
+            return []
+        logger.info("⏱️ %s took %.2fs", label, time.time() - start_time)
+        return documents
+
+    def _search_local(self, query_text, n_results):
+        """Search the local store and return Documents tagged as local.
+
+        Vector similarity and BM25 each rank an over-fetched candidate set and
+        the two rankings are fused with reciprocal rank fusion, so exact terms
+        and acronyms (PCOS, HPV, IUD) are found even when embeddings miss them.
+        The fused list is then reranked (see `_rerank`) down to at most
+        `n_results` distinct chunks.
+        """
+        logger.info("🔧 Searching local knowledge base...")
+        try:
+            with span("query_embed"):
+                query_embedding = self.embedding_function.embed_query(query_text)
+            with span("local_search") as search_span:
+                with span("vector_search"):
+                    results = self._query_collection([query_embedding], n_results)
+                documents = self._local_documents(query_text, results, 0, n_results)
+                search_span.set(documents=len(documents))
+            return documents
+        except Exception as e:
+            logger.error("❌ Error querying local vector store: %s", e)
+            return []
+
+    def _search_local_batch(self, query_texts, n_results):
+        """Search the local store for many questions at once.
+
+        All questions are embedded in one batched model call and looked up
+        with a single multi-embedding `collection.query`; fusion and
+        reranking then run per question. Returns one Document list per question.
+        """
+        logger.info("🔧 Searching local knowledge base for %s questions...", len(query_texts))
+        try:
+            if hasattr(self.embedding_function, 'embed_queries'):
+                query_embeddings = self.embedding_function.embed_queries(query_texts)
+            else:
+                query_embeddings = self.embedding_function.embed_documents(query_texts)
+            results = self._query_collection(query_embeddings, n_results)
+            return [
+                self._local_documents(query_text, results, row, n_results)
+                for row, query_text in enumerate(query_texts)
+            ]
+        except Exception as e:
+            logger.error("❌ Error querying local vector store: %s", e)
+            return [[] for _ in query_texts]
+
+    def _query_collection(self, query_embeddings, n_results):
+        """Run one Chroma query for any number of embeddings, over-fetching candidates for reranking."""
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results * LOCAL_CANDIDATE_MULTIPLIER,
+            include=["documents", "metadatas", "distances", "embeddings"]
+        )
+
+    def _local_documents(self, query_text, results, row, n_results):
+        """Turn row `row` of a Chroma query result into fused, reranked local Documents."""
+        documents = []
+        n_candidates = n_results * LOCAL_CANDIDATE_MULTIPLIER
+        embeddings = results.get('embeddings')
+        
+        # Candidate chunks by ID: (text, metadata, vector distance, stored embedding)
+        candidates = {}
+        vector_ranking = []
+        for i, doc in enumerate(results['documents'][row] if results['documents'] else []):
+            if doc.strip():  # Only add non-empty documents
+                metadata = results['metadatas'][row][i] if results.get('metadatas') and results['metadatas'][row] else {}
+                doc_id = results['ids'][row][i] if results.get('ids') else chunk_id(metadata.get('source', 'unknown'), doc)
+                distance = results['distances'][row][i] if results.get('distances') else 0.0
+                embedding = embeddings[row][i] if embeddings is not None else None
+                candidates[doc_id] = (doc, metadata, distance, embedding)
+                vector_ranking.append(doc_id)
+        
+        lexical_hits = self.lexical_index.search(query_text, n_candidates) if self.lexical_index is not None else []
+        lexical_scores = dict(lexical_hits)
+        missing_ids = [doc_id for doc_id, _ in lexical_hits if doc_id not in candidates]
+        if missing_ids:
+            fetched = self.collection.get(ids=missing_ids, include=["documents", "metadatas", "embeddings"])
+            fetched_embeddings = fetched.get('embeddings')
+            for i, (doc_id, doc, metadata) in enumerate(zip(fetched['ids'], fetched['documents'], fetched['metadatas'])):
+                if doc and doc.strip():
+                    embedding = fetched_embeddings[i] if fetched_embeddings is not None else None
+                    candidates[doc_id] = (doc, metadata or {}, None, embedding)
+        lexical_ranking = [doc_id for doc_id, _ in lexical_hits if doc_id in candidates]
+        
+        fused = self._rerank(query_text, reciprocal_rank_fusion([vector_ranking, lexical_ranking]), candidates, n_results)
+        if fused:
+            logger.info("✅ Found %s relevant documents in local knowledge base (%s vector, %s keyword candidates)",
+                        len(fused), len(vector_ranking), len(lexical_ranking))
+            
+            for i, (doc_id, fused_score) in enumerate(fused):
+                doc, original_metadata, distance, _ = candidates[doc_id]
+                
+                # Get the original source name, preserving file names
+                source_name = original_metadata.get('source', f'Local Document {i+1}')
+                
+                # Clean up source names to show actual document names
+                if source_name and source_name != f'Local Document {i+1}':
+                    # Keep the original source name as is (e.g., "C. Women and health.pdf")
+                    pass
+                else:
+                    # Fallback to a more descriptive name
+                    if original_metadata.get('file_type') == 'application/pdf':
+                        source_name = f"PDF Document (Chunk {original_metadata.get('chunk_id', i+1)})"
+                    else:
+                        source_name = f"Document {i+1}"
+                
+                documents.append(Document(
+                    page_content=doc, 
+                    metadata={
+                        'source': source_name,
+                        'source_type': 'local_document',
+                        # Vector distance; None for chunks found only by keyword
+                        'score': distance,
+                        'bm25_score': lexical_scores.get(doc_id, 0.0),
+                        'rrf_score': fused_score,
+                        'chunk_id': i,
+                        'original_metadata': original_metadata
+                    }
+                ))
+        else:
+            logger.info("⚠️ No relevant documents found in local knowledge base")
+        return documents
+
+    def _rerank(self, query_text, fused, candidates, n_results):
+        """Cut the fused `(id, score)` list down to at most `n_results` distinct, relevant chunks.
+
+        MMR over the stored embeddings drops near-duplicates (neighbouring chunks
+        share a 200-character overlap) in favour of chunks that add something,
+        then the optional cross-encoder reorders the survivors within its budget.
+        """
+        fused = fused[:n_results * LOCAL_CANDIDATE_MULTIPLIER]
+        selected = mmr_select([score for _, score in fused], [candidates[doc_id][3] for doc_id, _ in fused], n_results)
+        reranked = [fused[i] for i in selected]
+        if len(selected) < len(fused):
+            logger.info("✂️ Dropped %s redundant or lower-ranked local candidates", len(fused) - len(selected))
+        if self.reranker is not None and len(reranked) > 1:
+            with span("cross_encoder_rerank", candidates=len(reranked)):
+                order = self.reranker.rerank(query_text, [candidates[doc_id][0] for doc_id, _ in reranked])
+            reranked = [reranked[i] for i in order]
+        return reranked
+
+    def _search_web(self, enhanced_query):
+        """Search the web with Tavily and return Documents tagged as web results."""
         documents = []
         
-        # Step 1: Query local vector store
-        print("🔧 Searching local knowledge base...")
+        logger.info("🔧 Searching web for additional context...")
         try:
-            query_embedding = self.embedding_function.embed_query(query_text)
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results
-            )
+            # Use the correct method for Tavily search
+            with span("web_search") as search_span:
+                tavily_response = self.tavily.invoke(enhanced_query)
+                search_span.set(results=len(tavily_response.get('results', [])) if isinstance(tavily_response, dict) else None)
             
-            if results['documents'] and results['documents'][0]:
-                local_docs_found = len([doc for doc in results['documents'][0] if doc.strip()])
-                print(f"✅ Found {local_docs_found} relevant documents in local knowledge base")
+            # Handle the response format - Tavily returns a dict with 'results' key
+            if isinstance(tavily_response, dict) and 'results' in tavily_response:
+                tavily_results = tavily_response['results']
+                results_to_process = tavily_results[:3]  # Limit to 3 results
+                web_results_count = len(results_to_process)
+                logger.info("✅ Found %s relevant web results", web_results_count)
+                
+                for i, res in enumerate(results_to_process):
+                    if isinstance(res, dict) and 'content' in res:
+                        documents.append(Document(
+                            page_content=res['content'], 
+                            metadata={
+                                'source': res.get('url', 'Unknown URL'),
+                                'title': res.get('title', 'Web Result'),
+                                'source_type': 'web_search',
+                                'search_engine': 'Tavily'
+                            }
+                        ))
+            elif isinstance(tavily_response, list):
+                # Fallback for list format
+                results_to_process = tavily_response[:3]
+                web_results_count = len(results_to_process)
+                logger.info("✅ Found %s relevant web results", web_results_count)
                 
-                for i, doc in enumerate(results['documents'][0]):
-                    if doc.strip():  # Only add non-empty documents
-                        # Extract original metadata if available
-                        original_metadata = results['metadatas'][0][i] if results.get('metadatas') and results['metadatas'][0] else {}
-                        
-                        # Get the original source name, preserving file names
-                        source_name = original_metadata.get('source', f'Local Document {i+1}')
-                        
-                        # Clean up source names to show actual document names
-                        if source_name and source_name != f'Local Document {i+1}':
-                            # Keep the original source name as is (e.g., "C. Women and health.pdf")
-                            pass
-                        else:
-                            # Fallback to a more descriptive name
-                            if original_metadata.get('file_type') == 'application/pdf':
-                                source_name = f"PDF Document (Chunk {original_metadata.get('chunk_id', i+1)})"
-                            else:
-                                source_name = f"Document {i+1}"
-                        
+                for i, res in enumerate(results_to_process):
+                    if isinstance(res, dict) and 'content' in res:
                         documents.append(Document(
-                            page_content=doc, 
+                            page_content=res['content'], 
                             metadata={
-                                'source': source_name,
-                                'source_type': 'local_document',
-                                'score': results['distances'][0][i] if results.get('distances') else 0.0,
-                                'chunk_id': i,
-                                'original_metadata': original_metadata
+                                'source': res.get('url', 'Unknown URL'),
+                                'title': res.get('title', 'Web Result'),
+                                'source_type': 'web_search',
+                                'search_engine': 'Tavily'
                             }
                         ))
             else:
-                print("⚠️ No relevant documents found in local knowledge base")
-        except Exception as e:
-            print(f"❌ Error querying local vector store: {e}")
-
-        # Step 2: Enhance query for women's health context
-        enhanced_query = self._enhance_query_for_womens_health(query_text)
-        
-        # Step 3: Always use Tavily search for additional context if available
-        if self.tavily_available:
-            print("🔧 Searching web for additional context...")
-            try:
-                # Use the correct method for Tavily search
-                tavily_response = self.tavily.invoke(enhanced_query)
+                logger.warning("⚠️ Unexpected Tavily response format: %s", type(tavily_response))
                 
-                # Handle the response format - Tavily returns a dict with 'results' key
-                if isinstance(tavily_response, dict) and 'results' in tavily_response:
-                    tavily_results = tavily_response['results']
-                    results_to_process = tavily_results[:3]  # Limit to 3 results
-                    web_results_count = len(results_to_process)
-                    print(f"✅ Found {web_results_count} relevant web results")
-                    
-                    for i, res in enumerate(results_to_process):
-                        if isinstance(res, dict) and 'content' in res:
-                            documents.append(Document(
-                                page_content=res['content'], 
-                                metadata={
-                                    'source': res.get('url', 'Unknown URL'),
-                                    'title': res.get('title', 'Web Result'),
-                                    'source_type': 'web_search',
-                                    'search_engine': 'Tavily'
-                                }
-                            ))
-                elif isinstance(tavily_response, list):
-                    # Fallback for list format
-                    results_to_process = tavily_response[:3]
-                    web_results_count = len(results_to_process)
-                    print(f"✅ Found {web_results_count} relevant web results")
-                    
-                    for i, res in enumerate(results_to_process):
-                        if isinstance(res, dict) and 'content' in res:
-                            documents.append(Document(
-                                page_content=res['content'], 
-                                metadata={
-                                    'source': res.get('url', 'Unknown URL'),
-                                    'title': res.get('title', 'Web Result'),
-                                    'source_type': 'web_search',
-                                    'search_engine': 'Tavily'
-                                }
-                            ))
-                else:
-                    print(f"⚠️ Unexpected Tavily response format: {type(tavily_response)}")
-                    
-            except Exception as e:
-                print(f"⚠️ Web search failed: {e}")
-        else:
-            print("⚠️ Web search not available - using only local knowledge base")
+        except Exception as e:
+            logger.warning("⚠️ Web search failed: %s", e)
+        return documents
 
+    def _merge_results(self, documents, enhanced_query, n_results):
+        """Mix local and web documents into the final ranked list."""
         # Step 4: If still insufficient results, try Context7 MCP (if available)
         if len(documents) < 2:
-            print("🔧 Attempting to find additional context...")
+            logger.info("🔧 Attempting to find additional context...")
             context7_docs = self._try_context7_search(enhanced_query)
             documents.extend(context7_docs)
 
@@ -148,7 +438,7 @@ class Retriever:
         local_docs = [doc for doc in documents if doc.metadata.get('source_type') == 'local_document']
         web_docs = [doc for doc in documents if doc.metadata.get('source_type') == 'web_search']
         
-        print(f"📊 Retrieved {len(local_docs)} local documents and {len(web_docs)} web documents")
+        logger.info("📊 Retrieved %s local documents and %s web documents", len(local_docs), len(web_docs))
         
         # Return a balanced mix, prioritizing local but including web sources
         final_documents = []
@@ -167,7 +457,10 @@ class Retriever:
             final_documents.extend(local_docs[3:3+remaining_slots])
         
         final_count = len(final_documents)
-        print(f"✅ Query completed - returning {final_count} documents ({len([d for d in final_documents if d.metadata.get('source_type') == 'local_document'])} local, {len([d for d in final_documents if d.metadata.get('source_type') == 'web_search'])} web)")
+        if logger.isEnabledFor(logging.INFO):
+            source_types = [doc.metadata.get('source_type') for doc in final_documents]
+            logger.info("✅ Query completed - returning %s documents (%s local, %s web)",
+                        final_count, source_types.count('local_document'), source_types.count('web_search'))
         return final_documents
 
     def _enhance_query_for_womens_health(self, query_text):
@@ -192,7 +485,9 @@ class Retriever:
             "latest", "recent", "current", "new", "2024", "2023", 
             "guidelines", "recommendations", "statistics", "data"
         ]
-        return any(indicator in query_text.lower() for indicator in current_info_indicators)
+        # Whole words only, so "newborn" or "database" are not recency cues
+        words = set(re.findall(r"\w+", query_text.lower()))
+        return any(indicator in words for indicator in current_info_indicators)
 
     def _try_context7_search(self, query_text):
         """Try to get information from Context7 MCP if available."""
@@ -202,6 +497,6 @@ class Retriever:
             # For now, return empty list
             pass
         except Exception as e:
-            print(f"Context7 search not available: {e}")
+            logger.debug("Context7 search not available: %s", e)
         
         return documents
@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from .call_pool import TimeoutError, PoolSaturatedError, get_model_call_pool
+from .ingest import SUPPORTED_EXTENSIONS, ingest_files
+from .model_registry import latency_histograms
+from .pipeline import answer_question
+from .query_cache import normalize_query
+from .resources import (
+    get_shared_answer_cache, get_shared_collection, get_shared_embedding_function,
+    get_shared_lexical_index, get_shared_retriever, registry, shutdown_resources
+)
+from .retriever import web_search_stats
+from .tracing import prometheus_text, trace_request
+
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", "8000"))
+# Threads for the blocking retrieval, generation and ingest work behind the event loop
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", "16"))
+
+class RequestCoalescer:
+    """Lets concurrent identical requests share one execution.
+
+    The first caller for a key runs the work; callers arriving while it is
+    in flight await the same result (or exception) instead of repeating it.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def run(self, key, work):
+        """Return the result of `await work()`, shared with any in-flight call for `key`."""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.executed += 1
+        try:
+            result = await work()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting for it
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+class StreamBroadcast:
+    """Fans one streamed answer out to every client asking the same question.
+
+    A worker thread pushes deltas in; each subscriber replays what it missed
+    and then follows along live.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._condition = asyncio.Condition()
+        self.deltas = []
+        self.result = None
+        self.error = None
+        self.done = False
+
+    async def _update(self, delta=None, result=None, error=None, done=False):
+        async with self._condition:
+            if delta:
+                self.deltas.append(delta)
+            if done:
+                self.result = result
+                self.error = error
+                self.done = True
+            self._condition.notify_all()
+
+    def publish(self, delta=None, result=None, error=None, done=False):
+        """Thread-safe: hand a delta or the final outcome to the event loop."""
+        asyncio.run_coroutine_threadsafe(self._update(delta, result, error, done), self._loop).result()
+
+    async def subscribe(self):
+        """Yield every delta from the start, then return once the stream is finished."""
+        sent = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: len(self.deltas) > sent or self.done)
+                pending = self.deltas[sent:]
+                finished = self.done
+            for delta in pending:
+                yield delta
+            sent += len(pending)
+            if finished and sent == len(self.deltas):
+                return
+
+def _request_id(request):
+    """Use the caller's X-Request-ID so logs and traces can be joined; otherwise make one up."""
+    return request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+
+def _error_status(error):
+    """Map pipeline failures to HTTP status codes."""
+    if isinstance(error, PoolSaturatedError):
+        return 503
+    if isinstance(error, TimeoutError):
+        return 504
+    return 500
+
+class RagServer:
+    """Async HTTP front end that keeps the retriever, models and caches warm."""
+
+    def __init__(self, workers=SERVER_WORKERS, warm=True):
+        self.warm = warm
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-server")
+        self.coalescer = RequestCoalescer()
+        self.streams = {}
+        self.streams_shared = 0
+        self.ingest_lock = asyncio.Lock()
+        self.started_at = time.time()
+
+    async def _blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _answer(self, question, lang, request_id=None):
+        """Run the whole pipeline for one question and return the answer dict."""
+        with trace_request("ask", request_id, question_chars=len(question)) as request:
+            result = answer_question(question, lang)
+            request.set(lang=result['lang'], cached=result['cached'])
+        return {'answer': result['answer'], 'citations': result['citations'], 'lang': result['lang'], 'cached': result['cached'], 'request_id': request.request_id}
+
+    def _produce_stream(self, broadcast, question, lang, request_id=None):
+        """Worker thread: generate one answer and publish its deltas to the broadcast."""
+        with trace_request("ask_stream", request_id, question_chars=len(question)) as request:
+            try:
+                result = answer_question(question, lang, on_delta=broadcast.publish)
+                request.set(lang=result['lang'], cached=result['cached'])
+                if not result['streamed']:
+                    # Translated or cached answers arrive whole
+                    broadcast.publish(result['answer'])
+                broadcast.publish(result={'answer': result['answer'], 'citations': result['citations'], 'lang': result['lang']}, done=True)
+            except Exception as e:
+                broadcast.publish(error=e, done=True)
+
+    @staticmethod
+    async def _read_question(request):
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            raise web.HTTPBadRequest(text="Request body must be JSON")
+        question = (body.get('question') or "").strip() if isinstance(body, dict) else ""
+        if not question:
+            raise web.HTTPBadRequest(text="'question' is required")
+        return question, body.get('lang') or 'en'
+
+    async def handle_ask(self, request):
+        question, lang = await self._read_question(request)
+        request_id = _request_id(request)
+        start_time = time.time()
+        key = (normalize_query(question), lang)
+        try:
+            # Coalesced duplicates report the request ID of the call that ran the pipeline
+            result = await self.coalescer.run(key, lambda: self._blocking(self._answer, question, lang, request_id))
+        except Exception as e:
+            return web.json_response({'error': str(e), 'request_id': request_id}, status=_error_status(e), headers={'X-Request-ID': request_id})
+        return web.json_response(dict(result, elapsed_s=round(time.time() - start_time, 4)), headers={'X-Request-ID': request_id})
+
+    async def handle_ask_stream(self, request):
+        """Stream NDJSON: `{"delta": ...}` lines, then one final line with the full answer."""
+        question, lang = await self._read_question(request)
+        request_id = _request_id(request)
+        key = (normalize_query(question), lang)
+        broadcast = self.streams.get(key)
+        if broadcast is None:
+            broadcast = StreamBroadcast(asyncio.get_running_loop())
+            self.streams[key] = broadcast
+            future = asyncio.get_running_loop().run_in_executor(self.executor, self._produce_stream, broadcast, question, lang, request_id)
+            future.add_done_callback(lambda _: self.streams.pop(key, None))
+        else:
+            self.streams_shared += 1
+
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson', 'X-Request-ID': request_id})
+        await response.prepare(request)
+        async for delta in broadcast.subscribe():
+            await response.write((json.dumps({'delta': delta}, ensure_ascii=False) + "\n").encode("utf-8"))
+        if broadcast.error is not None:
+            final = {'done': True, 'error': str(broadcast.error)}
+        else:
+            final = dict(broadcast.result, done=True)
+        await response.write((json.dumps(final, ensure_ascii=False) + "\n").encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    def _ingest(self, file_paths, source_names):
+        with trace_request("ingest", files=len(file_paths)):
+            stats, results = ingest_files(
+                file_paths,
+                get_shared_collection(),
+                get_shared_embedding_function(),
+                workers=1,
+                source_names=source_names,
+                lexical_index=get_shared_lexical_index()
+            )
+        get_shared_answer_cache().invalidate_sources(stats.changed_sources)
+        return {
+            'chunks_written': stats.chunks_written,
+            'chunks_skipped': stats.chunks_skipped,
+            'chunks_deleted': stats.chunks_deleted,
+            'files': [
+                {'source': result.source, 'chunks': result.chunks, 'written': result.written, 'error': result.error}
+                for result in results
+            ],
+        }
+
+    async def handle_ingest(self, request):
+        """Ingest PDF or HTML files sent as multipart/form-data."""
+        if not request.content_type.startswith("multipart/"):
+            raise web.HTTPBadRequest(text="Upload files as multipart/form-data")
+        file_paths = []
+        source_names = {}
+        try:
+            reader = await request.multipart()
+            async for part in reader:
+                if not part.filename:
+                    continue
+                suffix = os.path.splitext(part.filename)[1].lower()
+                if suffix not in SUPPORTED_EXTENSIONS:
+                    raise web.HTTPBadRequest(text=f"Unsupported file type: {part.filename}")
+                with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+                    while chunk := await part.read_chunk():
+                        tmp_file.write(chunk)
+                file_paths.append(tmp_file.name)
+                source_names[tmp_file.name] = part.filename
+            if not file_paths:
+                raise web.HTTPBadRequest(text="No files uploaded")
+            # Chroma and the lexical index take one writer at a time
+            async with self.ingest_lock:
+                summary = await self._blocking(self._ingest, file_paths, source_names)
+        finally:
+            for file_path in file_paths:
+                os.remove(file_path)
+        return web.json_response(summary)
+
+    async def handle_healthz(self, request):
+        return web.json_response({
+            'status': 'ok',
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'warm_resources': sorted(registry.cold_start_times()),
+        })
+
+    async def handle_metrics(self, request):
+        return web.json_response({
+            'requests': {
+                'executed': self.coalescer.executed,
+                'coalesced': self.coalescer.coalesced,
+                'streams_shared': self.streams_shared,
+            },
+            'model_call_pool': get_model_call_pool().metrics(),
+            'web_search': web_search_stats.snapshot(),
+            'answer_cache': get_shared_answer_cache().stats(),
+            'model_latency': {name: histogram.snapshot() for name, histogram in latency_histograms().items()},
+        })
+
+    async def handle_prometheus(self, request):
+        """Stage, cache and model latency metrics in the Prometheus text format."""
+        return web.Response(text=prometheus_text(), content_type="text/plain", headers={'X-Content-Type-Options': 'nosniff'})
+
+    def _warm(self):
+        """Load the models and open the stores before the first request arrives."""
+        retriever = get_shared_retriever()
+        retriever.embedding_function.embed_query("warm up")
+        get_shared_answer_cache()
+
+    async def on_startup(self, app):
+        if self.warm:
+            print("🔥 Warming models and stores...")
+            await self._blocking(self._warm)
+            print("✅ Server warm")
+
+    async def on_cleanup(self, app):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        shutdown_resources()
+
+def create_app(warm=True, workers=SERVER_WORKERS):
+    """Build the aiohttp application."""
+    server = RagServer(workers, warm)
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/ask", server.handle_ask)
+    app.router.add_post("/ask/stream", server.handle_ask_stream)
+    app.router.add_post("/ingest", server.handle_ingest)
+    app.router.add_get("/healthz", server.handle_healthz)
+    app.router.add_get("/metrics", server.handle_metrics)
+    app.router.add_get("/metrics/prometheus", server.handle_prometheus)
+    app.on_startup.append(server.on_startup)
+    app.on_cleanup.append(server.on_cleanup)
+    return app
+
+def run_server(host=SERVER_HOST, port=SERVER_PORT, warm=True, workers=SERVER_WORKERS):
+    """Serve the bot over HTTP until interrupted."""
+    web.run_app(create_app(warm, workers), host=host, port=port)
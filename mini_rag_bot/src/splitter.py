@@ -1,10 +1,88 @@
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import os
+from .embeddings import EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR
 
-def split_text(documents):
-    """Split a list of documents into smaller chunks."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
+# all-MiniLM-L6-v2 truncates its input at 256 word pieces, [CLS] and [SEP] included.
+# Chunks are measured in those word pieces so nothing is cut off at embedding time.
+CHUNK_TOKENS = int(os.environ.get("CHUNK_TOKENS", "240"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "48"))
+# Tokenizer used to measure chunks (by default the embedding model's, from its local files);
+# set it to an empty string to measure characters instead
+SPLITTER_TOKENIZER = os.environ.get("SPLITTER_TOKENIZER", ONNX_MODEL_DIR if EMBEDDING_BACKEND == "onnx" else EMBEDDING_MODEL_NAME)
+# Character sizes used when SPLITTER_TOKENIZER is empty
+CHUNK_CHARS = 1000
+CHUNK_OVERLAP_CHARS = 200
+
+def character_text_splitter():
+    """Return a splitter that measures chunks in characters."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_CHARS,
+        chunk_overlap=CHUNK_OVERLAP_CHARS,
         length_function=len
     )
-    return text_splitter.split_documents(documents)
+
+def token_text_splitter(tokenizer):
+    """Return a splitter that measures chunks in word pieces of `tokenizer`."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    def token_count(text):
+        # verbose=False: whole pages are longer than the model limit, which is expected here
+        return len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_TOKENS,
+        chunk_overlap=CHUNK_OVERLAP_TOKENS,
+        length_function=token_count
+    )
+
+def create_text_splitter():
+    """Build the splitter: token-sized with the embedder's tokenizer, or character-sized if none is configured.
+
+    The tokenizer is read from local files only. They are there once the
+    embedding model has been loaded, which ingest does before splitting, so
+    worker processes never go to the network. A missing tokenizer is an
+    error rather than a silent switch to characters, since that would change
+    every chunk boundary and chunk ID.
+    """
+    if not SPLITTER_TOKENIZER:
+        return character_text_splitter()
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(SPLITTER_TOKENIZER, local_files_only=True)
+    except Exception as e:
+        raise RuntimeError(
+            f"Could not load the {SPLITTER_TOKENIZER} tokenizer from local files ({e}). Load the embedding "
+            "model once to download it, or set SPLITTER_TOKENIZER to an empty string to split by characters"
+        ) from e
+    return token_text_splitter(tokenizer)
+
+def _split_document(text_splitter, document):
+    """Yield the chunks of one document, each with its character offset in `start_index`."""
+    from langchain.docstore.document import Document
+    text = document.page_content
+    start = 0
+    for chunk in text_splitter.split_text(text):
+        # Chunks come in order and overlap, so each starts after the previous one's start.
+        # (The splitter's own add_start_index assumes the overlap is in characters.)
+        index = text.find(chunk, start)
+        if index < 0:
+            index = text.find(chunk)
+        start = index + 1
+        yield Document(page_content=chunk, metadata=dict(document.metadata, start_index=index))
+
+def iter_split(documents):
+    """Split documents one at a time, yielding chunks as they are cut.
+
+    Accepts any iterable (e.g. pages streamed from a PDF), so the whole
+    document never has to be in memory. Chunks never span two documents
+    and keep the document's metadata, plus `start_index`, the chunk's
+    character offset within it.
+    """
+    from .resources import get_shared_splitter
+    text_splitter = get_shared_splitter()
+    for document in documents:
+        yield from _split_document(text_splitter, document)
+
+def split_text(documents):
+    """Split a list of documents into smaller chunks."""
+    return list(iter_split(documents))
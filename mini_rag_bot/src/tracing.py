@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import random
+import logging
+import threading
+import contextlib
+import contextvars
+from .metrics import Counter, Histogram, format_prometheus
+from .model_registry import latency_histograms
+
+logger = logging.getLogger(__name__)
+
+# Fraction of requests whose full span tree is appended to TRACE_LOG_PATH as one JSON line
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_LOG_PATH = os.environ.get("TRACE_LOG_PATH")
+# When set, the Prometheus text export is written here on exit (for the node exporter's textfile collector)
+METRICS_TEXTFILE = os.environ.get("METRICS_TEXTFILE")
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_current_span = contextvars.ContextVar("mini_rag_span", default=None)
+_lock = threading.Lock()
+_trace_log_lock = threading.Lock()
+_stage_seconds = {}
+_counters = {}
+# Called with (stage name, seconds) whenever a span ends
+_span_listeners = ()
+COUNTER_HELP = {
+    "rag_stage_errors_total": "Pipeline stages that raised, by stage.",
+    "rag_cache_lookups_total": "Cache lookups by cache and result.",
+}
+
+class Span:
+    """One timed stage of a request, with attributes such as document counts or cache hits."""
+
+    __slots__ = ("name", "request_id", "parent", "sampled", "attributes", "children", "start", "duration", "error")
+
+    def __init__(self, name, request_id, parent, sampled, attributes):
+        self.name = name
+        self.request_id = request_id
+        self.parent = parent
+        self.sampled = sampled
+        self.attributes = attributes
+        self.children = []
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes):
+        """Attach attributes to the span, e.g. `span.set(documents=5)`."""
+        self.attributes.update(attributes)
+
+    def to_dict(self, origin):
+        return {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3) if self.duration is not None else None,
+            'attributes': self.attributes,
+            'error': self.error,
+            'children': [child.to_dict(origin) for child in self.children],
+        }
+
+def _histogram_for(name):
+    histogram = _stage_seconds.get(name)
+    if histogram is None:
+        with _lock:
+            histogram = _stage_seconds.setdefault(name, Histogram(STAGE_BUCKETS))
+    return histogram
+
+def increment(name, amount=1, **labels):
+    """Add to the counter `name` with the given labels."""
+    key = (name, tuple(sorted(labels.items())))
+    counter = _counters.get(key)
+    if counter is None:
+        with _lock:
+            counter = _counters.setdefault(key, Counter())
+    counter.inc(amount)
+
+def add_span_listener(listener):
+    """Call `listener(name, seconds)` each time a span ends, e.g. to sample stage latencies."""
+    global _span_listeners
+    with _lock:
+        _span_listeners = _span_listeners + (listener,)
+
+def remove_span_listener(listener):
+    global _span_listeners
+    with _lock:
+        _span_listeners = tuple(l for l in _span_listeners if l is not listener)
+
+def current_span():
+    """Return the innermost active span, or None outside any request."""
+    return _current_span.get()
+
+def current_request_id():
+    """Return the ID of the request being handled, or None."""
+    span = _current_span.get()
+    return span.request_id if span is not None else None
+
+@contextlib.contextmanager
+def _enter(span):
+    token = _current_span.set(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        _histogram_for(span.name).observe(span.duration)
+        for listener in _span_listeners:
+            listener(span.name, span.duration)
+        if span.error is not None:
+            increment("rag_stage_errors_total", stage=span.name)
+
+@contextlib.contextmanager
+def span(name, **attributes):
+    """Time one stage as a child of the current span; the duration feeds the stage histogram."""
+    parent = _current_span.get()
+    child = Span(name, parent.request_id if parent else None, parent, parent.sampled if parent else False, attributes)
+    if child.sampled:
+        parent.children.append(child)
+    with _enter(child):
+        yield child
+
+@contextlib.contextmanager
+def trace_request(name, request_id=None, **attributes):
+    """Start a new request: a root span with its own request ID and sampling decision."""
+    root = Span(name, request_id or uuid.uuid4().hex[:16], None, bool(TRACE_LOG_PATH) and random.random() < TRACE_SAMPLE_RATE, attributes)
+    try:
+        with _enter(root):
+            yield root
+    finally:
+        if root.sampled:
+            _write_trace(root)
+
+def _write_trace(root):
+    record = dict(root.to_dict(root.start), request_id=root.request_id, timestamp=root.start)
+    try:
+        with _trace_log_lock, open(TRACE_LOG_PATH, "a", encoding="utf-8") as trace_log:
+            trace_log.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        logger.warning("⚠️ Could not write trace to %s: %s", TRACE_LOG_PATH, e)
+
+def prometheus_text():
+    """Render every stage histogram, counter and model latency histogram as Prometheus text."""
+    with _lock:
+        stages = sorted(_stage_seconds.items())
+        counters = sorted(_counters.items())
+    families = [format_prometheus(
+        "rag_stage_duration_seconds", "histogram", "Duration of each pipeline stage.",
+        [({'stage': name}, histogram) for name, histogram in stages]
+    )]
+    by_name = {}
+    for (name, labels), counter in counters:
+        by_name.setdefault(name, []).append((dict(labels), counter))
+    for name, series in by_name.items():
+        families.append(format_prometheus(name, "counter", COUNTER_HELP.get(name, name), series))
+    families.append(format_prometheus(
+        "rag_model_call_duration_seconds", "histogram", "Duration of Gemini calls by model.",
+        [({'model': model}, histogram) for model, histogram in sorted(latency_histograms().items())]
+    ))
+    return "".join(families)
+
+def write_prometheus_textfile(path):
+    """Write the Prometheus export atomically to `path`."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as textfile:
+        textfile.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+if METRICS_TEXTFILE:
+    atexit.register(write_prometheus_textfile, METRICS_TEXTFILE)
@@ -1,21 +1,130 @@
 import os
-import google.generativeai as genai
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from .call_pool import get_model_call_pool
+from .context_packer import count_tokens
+from .disk_cache import CACHE_DIR, SqliteLRUCache
+from .model_registry import get_model, record_latency
+from .tracing import increment
+
+logger = logging.getLogger(__name__)
+
+TRANSLATION_MODEL = 'gemini-2.5-flash'
+TRANSLATION_TIMEOUT = float(os.environ.get("TRANSLATION_TIMEOUT", "30"))
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.environ.get("TRANSLATION_MEMORY_MAX_ENTRIES", "50000"))
+# Pre-translation sends answers in batches of at most this many (estimated) English
+# tokens; replies in other scripts run longer, so each batch also gets a longer deadline
+PRETRANSLATE_TOKEN_BUDGET = int(os.environ.get("PRETRANSLATE_TOKEN_BUDGET", "2000"))
+PRETRANSLATE_TIMEOUT = float(os.environ.get("PRETRANSLATE_TIMEOUT", "120"))
+
+# Language mapping for better prompts
+lang_names = {
+    'hi': 'Hindi',
+    'bn': 'Bengali',
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'it': 'Italian',
+    'pt': 'Portuguese',
+    'ru': 'Russian',
+    'ja': 'Japanese',
+    'ko': 'Korean',
+    'zh': 'Chinese'
+}
+
+class TranslationMemory:
+    """Persistent store of earlier translations keyed by (text hash, source, target)."""
+
+    def __init__(self, path=None, max_entries=TRANSLATION_MEMORY_MAX_ENTRIES):
+        self._cache = SqliteLRUCache(path or os.path.join(CACHE_DIR, "translations.sqlite3"), max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text, source_lang, target_lang):
+        digest = hashlib.sha256(text.strip().encode("utf-8")).hexdigest()
+        return f"{digest}:{source_lang}:{target_lang}"
+
+    def get(self, text, source_lang, target_lang):
+        value = self._cache.get(self._key(text, source_lang, target_lang))
+        if value is None:
+            self.misses += 1
+            increment("rag_cache_lookups_total", cache="translation", result="miss")
+            return None
+        self.hits += 1
+        increment("rag_cache_lookups_total", cache="translation", result="hit")
+        return value.decode("utf-8")
+
+    def put(self, text, source_lang, target_lang, translation):
+        self._cache.set(self._key(text, source_lang, target_lang), translation.encode("utf-8"))
+
+    def close(self):
+        self._cache.close()
+
+_memory = None
+_memory_lock = threading.Lock()
+
+def get_translation_memory():
+    """Return the process-wide translation memory."""
+    global _memory
+    if _memory is None:
+        with _memory_lock:
+            if _memory is None:
+                _memory = TranslationMemory()
+    return _memory
+
+def set_translation_memory(memory):
+    """Replace the process-wide translation memory (None reopens the default one on next use)."""
+    global _memory
+    with _memory_lock:
+        _memory = memory
+
+def _generate(prompt, timeout=TRANSLATION_TIMEOUT):
+    """Run a translation request on the shared model call pool with a deadline."""
+    model = get_model(TRANSLATION_MODEL)
+    start_time = time.time()
+    response = get_model_call_pool().call_with_deadline(
+        lambda remaining_seconds: model.generate_content(prompt, request_options={"timeout": remaining_seconds}),
+        timeout
+    )
+    record_latency(TRANSLATION_MODEL, time.time() - start_time)
+    return response
+
+def _parse_json(text):
+    """Parse a JSON reply, tolerating a surrounding markdown code fence."""
+    text = text.strip()
+    fenced = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    return json.loads(text)
+
+def _translate(text, source_lang, target_lang, prompt):
+    """Return a remembered translation, or ask Gemini and remember its reply."""
+    memory = get_translation_memory()
+    cached = memory.get(text, source_lang, target_lang)
+    if cached is not None:
+        return cached
+    response = _generate(prompt)
+    translation = response.text.strip()
+    memory.put(text, source_lang, target_lang, translation)
+    return translation
 
 def translate_to_english(text, source_lang):
     """Translate text to English using Gemini."""
     try:
-        genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
+        source_language = lang_names.get(source_lang, source_lang)
         prompt = f"""
-        Translate the following text from {source_lang} to English. 
+        Translate the following text from {source_language} to English.
         Only provide the translation, no additional text or explanations.
-        
+
         Text to translate: {text}
         """
-        
-        response = model.generate_content(prompt)
-        return response.text.strip()
+
+        return _translate(text, source_lang, 'en', prompt)
     except Exception as e:
         print(f"Translation error: {e}")
         return text  # Return original text if translation fails
@@ -23,35 +132,87 @@ def translate_to_english(text, source_lang):
 def translate_from_english(text, target_lang):
     """Translate text from English to the target language using Gemini."""
     try:
-        genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # Language mapping for better prompts
-        lang_names = {
-            'hi': 'Hindi',
-            'bn': 'Bengali',
-            'es': 'Spanish',
-            'fr': 'French',
-            'de': 'German',
-            'it': 'Italian',
-            'pt': 'Portuguese',
-            'ru': 'Russian',
-            'ja': 'Japanese',
-            'ko': 'Korean',
-            'zh': 'Chinese'
-        }
-        
         target_language = lang_names.get(target_lang, target_lang)
-        
+
         prompt = f"""
-        Translate the following English text to {target_language}. 
+        Translate the following English text to {target_language}.
         Only provide the translation, no additional text or explanations.
-        
+
         Text to translate: {text}
         """
-        
-        response = model.generate_content(prompt)
-        return response.text.strip()
+
+        return _translate(text, 'en', target_lang, prompt)
     except Exception as e:
         print(f"Translation error: {e}")
         return text  # Return original text if translation fails
+
+def translate_batch(texts, source_lang, target_lang, timeout=TRANSLATION_TIMEOUT):
+    """Translate many strings in a single Gemini call.
+
+    Strings already in the translation memory are not sent again. If the
+    batched reply cannot be parsed, each remaining string is translated on
+    its own so callers always get one result per input. One side of the
+    pair must be English, since that fallback only translates to or from it.
+    """
+    if 'en' not in (source_lang, target_lang):
+        raise ValueError(f"translate_batch needs English on one side, got {source_lang} -> {target_lang}")
+    memory = get_translation_memory()
+    results = [memory.get(text, source_lang, target_lang) for text in texts]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    source_language = 'English' if source_lang == 'en' else lang_names.get(source_lang, source_lang)
+    target_language = 'English' if target_lang == 'en' else lang_names.get(target_lang, target_lang)
+    prompt = f"""
+    Translate each string in the following JSON array from {source_language} to {target_language}.
+    Reply with only a JSON array of the translations, in the same order and with the same length.
+
+    {json.dumps([texts[i] for i in pending], ensure_ascii=False)}
+    """
+    try:
+        translations = _parse_json(_generate(prompt, timeout).text)
+        if not isinstance(translations, list) or len(translations) != len(pending):
+            raise ValueError(f"expected {len(pending)} translations")
+        for i, translation in zip(pending, translations):
+            results[i] = str(translation).strip()
+            memory.put(texts[i], source_lang, target_lang, results[i])
+    except Exception as e:
+        logger.warning("⚠️ Batch translation of %s strings to %s failed, translating one by one: %s", len(pending), target_language, e)
+        translate_one = translate_from_english if source_lang == 'en' else translate_to_english
+        for i in pending:
+            results[i] = translate_one(texts[i], target_lang if source_lang == 'en' else source_lang)
+    return results
+
+def token_batches(texts, token_budget):
+    """Group `texts` in order into batches of at most `token_budget` estimated tokens.
+
+    A text longer than the budget gets a batch of its own.
+    """
+    batch, batch_tokens = [], 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if batch and batch_tokens + tokens > token_budget:
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+def pretranslate_answers(answers, languages=None, token_budget=PRETRANSLATE_TOKEN_BUDGET):
+    """Fill the translation memory with every answer in every supported language.
+
+    Answers are sent in batched calls of up to `token_budget` tokens per
+    language, each with PRETRANSLATE_TIMEOUT to finish, so serving a cached
+    answer in Hindi or Bengali later needs no model call at all.
+    Returns the number of answer translations requested.
+    """
+    languages = languages or list(lang_names)
+    answers = list(dict.fromkeys(answers))
+    batches = list(token_batches(answers, token_budget))
+    for language in languages:
+        for batch in batches:
+            translate_batch(batch, 'en', language, timeout=PRETRANSLATE_TIMEOUT)
+        print(f"✅ Pre-translated {len(answers)} answers to {lang_names.get(language, language)} in {len(batches)} batches")
+    return len(answers) * len(languages)
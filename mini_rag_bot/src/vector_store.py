@@ -1,19 +1,20 @@
-import chromadb
 import os
+import hashlib
+from .tracing import span
 
 # Disable ChromaDB telemetry to fix the capture() error
 os.environ["ANONYMIZED_TELEMETRY"] = "False"
 os.environ["CHROMA_TELEMETRY"] = "False"
 
-# Also set it programmatically for the current session
-import chromadb.config
-chromadb.config.Settings.anonymized_telemetry = False
-
-def get_chroma_client():
+def get_chroma_client(path="db/"):
     """Return a ChromaDB client with telemetry disabled."""
+    # chromadb is slow to import, so only the commands that open the store pay for it
+    import chromadb
+    import chromadb.config
+    chromadb.config.Settings.anonymized_telemetry = False
     print("🔧 Initializing ChromaDB client...")
     client = chromadb.PersistentClient(
-        path="db/",
+        path=path,
         settings=chromadb.config.Settings(
             anonymized_telemetry=False
         )
@@ -28,24 +29,66 @@ def create_collection(client, name="women_health"):
     print(f"✅ Collection '{name}' ready")
     return collection
 
-def add_documents_to_collection(collection, documents, embedding_function):
-    """Add documents to a collection with proper logging."""
+def content_hash(text):
+    """Return the SHA-256 hex digest of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def chunk_id(source, text):
+    """Return a stable ID for a chunk, derived from its source and content.
+
+    Unchanged chunks keep their ID across re-ingests, so they can be skipped,
+    and the same text under two sources never collides.
+    """
+    return hashlib.sha256(f"{source}\x00{text}".encode("utf-8")).hexdigest()
+
+def add_documents_to_collection(collection, documents, embedding_function, batch_size=64):
+    """Add documents to a collection in batches with proper logging."""
     if not documents:
         print("⚠️ No documents to add to collection")
         return
     
     print(f"🔧 Adding {len(documents)} documents to collection...")
     
-    # Generate embeddings
-    print("🔧 Generating embeddings...")
-    embeddings = embedding_function.embed_documents([doc.page_content for doc in documents])
-    print(f"✅ Generated {len(embeddings)} embeddings")
+    added = 0
+    for batch_start in range(0, len(documents), batch_size):
+        batch = documents[batch_start:batch_start + batch_size]
+        added += add_batch_to_collection(collection, batch, embedding_function)
+    print(f"✅ Successfully added {added} new documents to collection ({len(documents) - added} already stored)")
+
+def add_batch_to_collection(collection, batch, embedding_function):
+    """Embed the chunks of one batch that are not stored yet and write them straight away.
+
+    Returns the number of chunks that were added.
+    """
+    new_chunks = {}
+    for doc in batch:
+        doc_id = chunk_id(doc.metadata.get('source', 'unknown'), doc.page_content)
+        new_chunks.setdefault(doc_id, doc)
     
-    # Add to collection
-    collection.add(
-        embeddings=embeddings,
-        documents=[doc.page_content for doc in documents],
-        metadatas=[doc.metadata for doc in documents],
-        ids=[f"{doc.metadata.get('source', 'unknown')}_{i}" for i, doc in enumerate(documents)]
-    )
-    print(f"✅ Successfully added {len(documents)} documents to collection")
+    existing = collection.get(ids=list(new_chunks), include=[])
+    for doc_id in existing['ids']:
+        new_chunks.pop(doc_id, None)
+    if not new_chunks:
+        return 0
+    
+    texts = [doc.page_content for doc in new_chunks.values()]
+    with span("embed", chunks=len(texts)):
+        embeddings = embedding_function.embed_documents(texts)
+    
+    with span("chroma_add", chunks=len(texts)):
+        collection.add(
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=[dict(doc.metadata, content_hash=content_hash(doc.page_content)) for doc in new_chunks.values()],
+            ids=list(new_chunks)
+        )
+    return len(new_chunks)
+
+def delete_stale_chunks(collection, source, keep_ids):
+    """Delete chunks of `source` whose IDs are not in `keep_ids`; return how many were removed."""
+    existing = collection.get(where={"source": source}, include=[])
+    stale_ids = [doc_id for doc_id in existing['ids'] if doc_id not in keep_ids]
+    if stale_ids:
+        collection.delete(ids=stale_ids)
+        print(f"🗑️ Removed {len(stale_ids)} outdated chunks of {source}")
+    return len(stale_ids)
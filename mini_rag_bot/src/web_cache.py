@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .disk_cache import CACHE_DIR, SqliteLRUCache
+from .query_cache import normalize_query
+
+WEB_CACHE_PATH = os.environ.get("WEB_CACHE_PATH", os.path.join(CACHE_DIR, "tavily.sqlite3"))
+WEB_CACHE_TTL_SECONDS = float(os.environ.get("WEB_CACHE_TTL_SECONDS", str(24 * 3600)))
+WEB_CACHE_MAX_ENTRIES = int(os.environ.get("WEB_CACHE_MAX_ENTRIES", "2000"))
+# Serve web results only from the cache and never call Tavily, e.g. for offline load tests
+WEB_SEARCH_REPLAY = os.environ.get("WEB_SEARCH_REPLAY", "").lower() in ("1", "true", "yes")
+
+class CachedTavilySearch:
+    """Drop-in wrapper around the Tavily tool that keeps responses on disk.
+
+    Responses are keyed by the normalized query. Fresh entries are returned
+    directly; entries older than the TTL are still returned, but refreshed in
+    the background so the next caller gets new results. In replay mode no
+    request ever leaves the process: cached responses of any age are served
+    and misses return no results.
+    """
+
+    def __init__(self, tavily, path=WEB_CACHE_PATH, ttl_seconds=WEB_CACHE_TTL_SECONDS, max_entries=WEB_CACHE_MAX_ENTRIES, replay=WEB_SEARCH_REPLAY):
+        self.tavily = tavily
+        self.ttl_seconds = ttl_seconds
+        self.replay = replay
+        self._cache = SqliteLRUCache(path, max_entries)
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tavily-refresh")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "replay_misses": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def invoke(self, query):
+        """Return Tavily's response for `query`, from the cache when possible."""
+        key = normalize_query(query)
+        entry = self._cache.get_entry(key)
+        if entry is not None:
+            response = json.loads(entry[0])
+            if self.replay or time.time() - entry[1] < self.ttl_seconds:
+                self._count("hits")
+                return response
+            self._count("stale_hits")
+            self._schedule_refresh(key, query)
+            return response
+
+        if self.replay:
+            self._count("replay_misses")
+            print(f"⚠️ No recorded web results for '{query}' in replay mode")
+            return {'results': []}
+
+        self._count("misses")
+        return self._fetch(key, query)
+
+    def _fetch(self, key, query):
+        response = self.tavily.invoke(query)
+        self._cache.set(key, json.dumps(response).encode("utf-8"))
+        return response
+
+    def _schedule_refresh(self, key, query):
+        """Refresh a stale entry in the background, at most once at a time per key."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch(key, query)
+                self._count("refreshes")
+            except Exception as e:
+                self._count("refresh_errors")
+                print(f"⚠️ Background refresh of web results failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        try:
+            self._refresh_executor.submit(refresh)
+        except RuntimeError:
+            # Closed while a request was in flight - the stale entry stays until next time
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached responses."""
+        with self._lock:
+            snapshot = dict(self._counters)
+        snapshot["entries"] = len(self._cache)
+        return snapshot
+
+    def close(self):
+        self._refresh_executor.shutdown(wait=True, cancel_futures=True)
+        self._cache.close()
@@ -0,0 +1,69 @@
+import io
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+from mini_rag_bot.src.batch import answer_questions, read_questions, run_ask_batch
+
+class TestReadQuestions(unittest.TestCase):
+
+    def test_jsonl_csv_and_text_inputs(self):
+        """Every input format yields the same record shape; blank questions are skipped."""
+        jsonl = io.StringIO('{"id": "q1", "question": "What is PCOS?", "lang": "en"}\n"Is HPV common?"\n')
+        self.assertEqual(list(read_questions(jsonl)), [
+            {'id': "q1", 'question': "What is PCOS?", 'lang': "en"},
+            {'id': 2, 'question': "Is HPV common?", 'lang': "en"},
+        ])
+
+        csv_input = io.StringIO('id,Question,lang\na,What is anemia?,hi\nb,,en\n')
+        self.assertEqual(list(read_questions(csv_input)), [{'id': "a", 'question': "What is anemia?", 'lang': "hi"}])
+
+        text = io.StringIO("What is menopause?\n\nWhat is an IUD?\n")
+        self.assertEqual([record['question'] for record in read_questions(text)], ["What is menopause?", "What is an IUD?"])
+
+    def test_bad_jsonl_lines_become_error_records(self):
+        """A malformed line is reported in place; a quoted plain-text question is not mistaken for JSONL."""
+        jsonl = io.StringIO('{"question": "What is PCOS?"}\n{"question": \n"Is HPV common?"\n')
+        records = list(read_questions(jsonl))
+        self.assertEqual(records[0]['question'], "What is PCOS?")
+        self.assertEqual((records[1]['id'], 'error' in records[1]), (2, True))
+        self.assertEqual(records[2]['question'], "Is HPV common?")
+
+        text = io.StringIO('"What is PCOS?" she asked\nWhat is an IUD?\n')
+        self.assertEqual([record['question'] for record in read_questions(text)], ['"What is PCOS?" she asked', "What is an IUD?"])
+
+class TestAnswerQuestions(unittest.TestCase):
+
+    @patch('builtins.print')
+    @patch('mini_rag_bot.src.pipeline.generate_answer')
+    @patch('mini_rag_bot.src.pipeline.get_shared_answer_cache')
+    @patch('mini_rag_bot.src.pipeline.get_shared_retriever')
+    @patch('mini_rag_bot.src.batch.get_shared_retriever')
+    def test_chunk_is_retrieved_once_and_answered_concurrently(self, mock_retriever, mock_pipeline_retriever, mock_cache, mock_generate, mock_print):
+        """One query_batch call serves the chunk and every question gets a timed result."""
+        mock_retriever.return_value.query_batch.side_effect = lambda questions, n_results: [[] for _ in questions]
+        mock_generate.side_effect = lambda context, question: {'answer': f"About {question}", 'citations': []}
+        records = [{'id': i, 'question': f"What is topic {i}?", 'lang': 'en'} for i in range(5)]
+
+        results = sorted(answer_questions(records, concurrency=3), key=lambda result: result['id'])
+
+        mock_retriever.return_value.query_batch.assert_called_once()
+        self.assertEqual([result['answer'] for result in results], [f"About What is topic {i}?" for i in range(5)])
+        self.assertEqual(set(results[0]['timings']), {'question_translation_s', 'retrieval_s', 'generation_s', 'answer_translation_s', 'total_s'})
+
+    @patch('builtins.print')
+    @patch('mini_rag_bot.src.batch.answer_questions')
+    def test_results_are_written_as_jsonl(self, mock_answer, mock_print):
+        """Each answer becomes one JSON line and failures are counted, not raised."""
+        mock_answer.side_effect = lambda chunk, concurrency: iter(
+            [dict(record, answer="ok") for record in chunk[:-1]] + [dict(chunk[-1], error="boom")]
+        )
+        output = io.StringIO()
+        with patch('sys.stdin', io.StringIO("Q1\nQ2\nQ3\n")), patch('sys.stdout', output):
+            self.assertEqual(run_ask_batch(chunk_size=2), (1, 2))
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([line['question'] for line in lines], ["Q1", "Q2", "Q3"])
+        self.assertEqual(sum('error' in line for line in lines), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from unittest.mock import patch
+from mini_rag_bot.src.benchmark import BENCHMARK_PDFS, run_benchmark
+from mini_rag_bot.src.metrics import percentile
+from mini_rag_bot.src.resources import registry
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_percentile_interpolates_between_samples(self):
+        self.assertEqual(percentile([4, 1, 3, 2], 0.5), 2.5)
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+    @patch('builtins.print')
+    def test_offline_run_reports_every_stage(self, mock_print):
+        """A round over a bundled PDF measures every stage and leaves no stand-in registered."""
+        report = run_benchmark(
+            pdf_paths=BENCHMARK_PDFS[:1], questions=["What is PCOS?", "What are the latest anemia guidelines?"],
+            rounds=1, gemini_latency_ms=1, tavily_latency_ms=1, fake_embeddings=True
+        )
+
+        self.assertEqual(set(report['stages']), {
+            "load", "split", "embed", "chroma_add", "lexical_index",
+            "query_embed", "vector_search", "retrieve", "context_build", "generate", "translate",
+        })
+        self.assertEqual(report['stages']['generate']['count'], 2)
+        # Sampled from the retriever's own spans: one embedding and one search per question
+        self.assertEqual(report['stages']['query_embed']['count'], 2)
+        self.assertEqual(report['stages']['vector_search']['count'], 2)
+        for stats in report['stages'].values():
+            self.assertLessEqual(stats['p50_ms'], stats['p95_ms'])
+            self.assertLessEqual(stats['p95_ms'], stats['p99_ms'])
+        self.assertGreater(report['config']['chunks_per_round'], 0)
+        self.assertFalse(registry.is_loaded("tavily"))
+
+if __name__ == '__main__':
+    unittest.main()
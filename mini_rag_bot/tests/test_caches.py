@@ -0,0 +1,238 @@
+import os
+import json
+import unittest
+import tempfile
+from unittest.mock import MagicMock, patch
+from langchain.docstore.document import Document
+from mini_rag_bot.src.disk_cache import SqliteLRUCache
+from mini_rag_bot.src.query_cache import QueryEmbeddingCache
+from mini_rag_bot.src.answer_cache import SemanticAnswerCache
+from mini_rag_bot.src.pipeline import answer_question
+from mini_rag_bot.src.web_cache import CachedTavilySearch
+from mini_rag_bot.src import translator
+from mini_rag_bot.src.translator import TranslationMemory, pretranslate_answers, translate_batch, translate_from_english
+
+class TestQueryEmbeddingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "queries.sqlite3")
+        self.model = MagicMock()
+        self.model.embed_query.side_effect = lambda text: [0.5, 0.25]
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_normalized_repeat_questions_hit_memory(self):
+        """Case, spacing and trailing punctuation do not defeat the cache."""
+        cache = QueryEmbeddingCache(self.model, "model-a", self.path)
+        cache.embed_query("Symptoms of PCOS?")
+        self.assertEqual(cache.embed_query("  symptoms  of pcos "), [0.5, 0.25])
+
+        self.assertEqual(self.model.embed_query.call_count, 1)
+        self.assertEqual((cache.stats()["memory_hits"], cache.stats()["misses"]), (1, 1))
+        cache.close()
+
+    def test_embeddings_persist_and_memory_layer_is_bounded(self):
+        """A fresh process finds earlier queries on disk; memory keeps only the newest."""
+        cache = QueryEmbeddingCache(self.model, "model-a", self.path, max_memory_entries=1)
+        cache.embed_query("first question")
+        cache.embed_query("second question")
+        self.assertEqual(cache.stats()["memory_entries"], 1)
+        cache.close()
+
+        reopened = QueryEmbeddingCache(self.model, "model-a", self.path)
+        reopened.embed_query("first question")
+        self.assertEqual(reopened.stats()["disk_hits"], 1)
+        self.assertEqual(self.model.embed_query.call_count, 2)
+        reopened.close()
+
+    @patch('builtins.print')
+    def test_model_change_invalidates_disk_layer(self, mock_print):
+        """Vectors from a different embedding model are never served."""
+        cache = QueryEmbeddingCache(self.model, "model-a", self.path)
+        cache.embed_query("first question")
+        cache.close()
+
+        reopened = QueryEmbeddingCache(self.model, "model-b", self.path)
+        reopened.embed_query("first question")
+        self.assertEqual(reopened.stats()["misses"], 1)
+        reopened.close()
+
+class TestSqliteLRUCache(unittest.TestCase):
+
+    def test_hits_are_not_written_until_flushed(self):
+        """A hit does no SQLite write; buffered access times still decide what is evicted."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = SqliteLRUCache(os.path.join(tmp_dir, "entries.sqlite3"), max_entries=2, access_flush_every=10)
+            cache.set("old", b"1")
+            cache.set("new", b"2")
+            changes = cache._conn.total_changes
+
+            self.assertEqual(cache.get("old"), b"1")
+            self.assertEqual(cache._conn.total_changes, changes)
+
+            cache.set("newest", b"3")
+            self.assertIsNone(cache.get("new"))
+            self.assertEqual(cache.get("old"), b"1")
+            cache.close()
+
+class TestSemanticAnswerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = SemanticAnswerCache(os.path.join(self.tmp_dir.name, "answers.sqlite3"), similarity_threshold=0.9)
+        self.context = [Document(page_content="PCOS causes irregular periods.", metadata={"source": "Women.pdf"})]
+        self.result = {"answer": "Irregular periods.", "citations": ["[1] Women.pdf"], "source_details": []}
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    @patch('mini_rag_bot.src.pipeline.generate_answer')
+    @patch('mini_rag_bot.src.pipeline.get_shared_retriever')
+    @patch('mini_rag_bot.src.pipeline.get_shared_answer_cache')
+    def test_similar_question_with_same_context_skips_generation(self, mock_get_cache, mock_get_retriever, mock_generate):
+        """The ask pipeline answers a near-identical question over the same chunks from the cache."""
+        mock_get_cache.return_value = self.cache
+        embeddings = {"What are PCOS symptoms?": [1.0, 0.0], "PCOS symptoms?": [0.99, 0.05]}
+        mock_get_retriever.return_value.embedding_function.embed_query.side_effect = embeddings.get
+        mock_generate.return_value = self.result
+
+        first = answer_question("What are PCOS symptoms?", english_question="What are PCOS symptoms?", context=self.context)
+        second = answer_question("PCOS symptoms?", english_question="PCOS symptoms?", context=self.context)
+
+        mock_generate.assert_called_once()
+        self.assertEqual((first['cached'], second['cached']), (False, True))
+        self.assertEqual(second['answer'], self.result['answer'])
+        self.assertEqual(second['citations'], self.result['citations'])
+
+    def test_different_context_or_distant_question_misses(self):
+        """Neither a different context set nor an unrelated question is served from cache."""
+        self.cache.store("What are PCOS symptoms?", [1.0, 0.0], self.context, self.result)
+        other_context = [Document(page_content="Anemia needs iron.", metadata={"source": "Women.pdf"})]
+
+        self.assertIsNone(self.cache.lookup([1.0, 0.0], other_context))
+        self.assertIsNone(self.cache.lookup([0.0, 1.0], self.context))
+
+    def test_empty_answer_is_not_cached(self):
+        self.cache.store("What are PCOS symptoms?", [1.0, 0.0], self.context, dict(self.result, answer="  "))
+        self.assertIsNone(self.cache.lookup([1.0, 0.0], self.context))
+
+    @patch('builtins.print')
+    def test_reingested_source_invalidates_entries(self, mock_print):
+        """Re-ingesting a document drops every answer built on it."""
+        self.cache.store("What are PCOS symptoms?", [1.0, 0.0], self.context, self.result)
+
+        self.assertEqual(self.cache.invalidate_sources({"Women.pdf"}), 1)
+        self.assertIsNone(self.cache.lookup([1.0, 0.0], self.context))
+
+class TestTranslationMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.memory = TranslationMemory(os.path.join(self.tmp_dir.name, "translations.sqlite3"))
+        patcher = patch.object(translator, '_memory', self.memory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.memory.close()
+        self.tmp_dir.cleanup()
+
+    @patch('mini_rag_bot.src.translator._generate')
+    def test_repeat_translation_is_served_from_memory(self, mock_generate):
+        """The second identical translation makes no model call."""
+        mock_generate.return_value = MagicMock(text="नमस्ते")
+        self.assertEqual(translate_from_english("Hello", "hi"), "नमस्ते")
+        self.assertEqual(translate_from_english("Hello", "hi"), "नमस्ते")
+        self.assertEqual(mock_generate.call_count, 1)
+        self.assertIsNone(self.memory.get("Hello", "en", "bn"))
+
+    @patch('builtins.print')
+    @patch('mini_rag_bot.src.translator._generate')
+    def test_batch_translates_pending_strings_in_one_call(self, mock_generate, mock_print):
+        """Only strings missing from memory are sent, all in a single request."""
+        self.memory.put("One", "en", "hi", "एक")
+        mock_generate.return_value = MagicMock(text='```json\n["दो", "तीन"]\n```')
+
+        self.assertEqual(translate_batch(["One", "Two", "Three"], "en", "hi"), ["एक", "दो", "तीन"])
+        self.assertEqual(mock_generate.call_count, 1)
+        self.assertEqual(self.memory.get("Three", "en", "hi"), "तीन")
+
+    @patch('builtins.print')
+    @patch('mini_rag_bot.src.translator._generate')
+    def test_batch_falls_back_to_single_calls_on_bad_reply(self, mock_generate, mock_print):
+        """A reply of the wrong length is retried one string at a time."""
+        mock_generate.side_effect = [MagicMock(text='["only one"]'), MagicMock(text="दो"), MagicMock(text="तीन")]
+        with self.assertLogs('mini_rag_bot.src.translator', level='WARNING'):
+            self.assertEqual(translate_batch(["Two", "Three"], "en", "hi"), ["दो", "तीन"])
+        self.assertEqual(mock_generate.call_count, 3)
+        with self.assertRaises(ValueError):
+            translate_batch(["दो"], "hi", "bn")
+
+    @patch('builtins.print')
+    @patch('mini_rag_bot.src.translator._generate')
+    def test_pretranslation_batches_fit_the_token_budget(self, mock_generate, mock_print):
+        """Long answers are split across calls by estimated tokens, each with the pre-translation deadline."""
+        answers = [f"Answer {i} " + "word " * 40 for i in range(5)]
+        mock_generate.side_effect = lambda prompt, timeout: MagicMock(
+            text=json.dumps(["अनुवाद"] * prompt.count("Answer "), ensure_ascii=False)
+        )
+
+        self.assertEqual(pretranslate_answers(answers, ["hi"], token_budget=100), 5)
+
+        self.assertEqual(mock_generate.call_count, 3)
+        self.assertEqual({call.args[1] for call in mock_generate.call_args_list}, {translator.PRETRANSLATE_TIMEOUT})
+        self.assertEqual(self.memory.get(answers[4], "en", "hi"), "अनुवाद")
+
+class TestCachedTavilySearch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "tavily.sqlite3")
+        self.tavily = MagicMock()
+        self.tavily.invoke.side_effect = lambda query: {'results': [{'url': 'https://example.com', 'content': f"v{self.tavily.invoke.call_count}"}]}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_repeat_query_is_served_from_disk(self):
+        """Normalized repeats of a query reach Tavily once, even from a new process."""
+        cache = CachedTavilySearch(self.tavily, self.path, ttl_seconds=60)
+        cache.invoke("women's health PCOS symptoms")
+        cache.close()
+
+        reopened = CachedTavilySearch(self.tavily, self.path, ttl_seconds=60)
+        response = reopened.invoke("Women's health  PCOS symptoms?")
+        self.assertEqual(response['results'][0]['content'], "v1")
+        self.assertEqual(self.tavily.invoke.call_count, 1)
+        self.assertEqual(reopened.stats()["hits"], 1)
+        reopened.close()
+
+    def test_stale_entry_is_served_then_refreshed_in_background(self):
+        """An expired entry answers immediately while a refresh replaces it."""
+        cache = CachedTavilySearch(self.tavily, self.path, ttl_seconds=0)
+        cache.invoke("anemia diet")
+
+        self.assertEqual(cache.invoke("anemia diet")['results'][0]['content'], "v1")
+        cache._refresh_executor.shutdown(wait=True)
+        self.assertEqual(cache.stats()["refreshes"], 1)
+        self.assertEqual(json.loads(cache._cache.get("anemia diet"))['results'][0]['content'], "v2")
+        cache.close()
+
+    @patch('builtins.print')
+    def test_replay_mode_never_calls_tavily(self, mock_print):
+        """Replay serves recorded responses of any age and returns nothing for unknown queries."""
+        recorder = CachedTavilySearch(self.tavily, self.path)
+        recorder.invoke("menopause")
+        recorder.close()
+        replay = CachedTavilySearch(None, self.path, ttl_seconds=0, replay=True)
+
+        self.assertEqual(replay.invoke("menopause")['results'][0]['content'], "v1")
+        self.assertEqual(replay.invoke("unrecorded question"), {'results': []})
+        self.assertEqual(self.tavily.invoke.call_count, 1)
+        replay.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,10 +10,10 @@ class TestEndToEnd(unittest.TestCase):
     @patch('mini_rag_bot.src.retriever.Retriever.query')
     def test_pcos_symptoms_faq(self, mock_query, mock_parse_args, mock_print):
         """Test a sample FAQ on PCOS symptoms."""
-        mock_parse_args.return_value = MagicMock(command='ask', question="What are the symptoms of PCOS?", lang='en')
+        mock_parse_args.return_value = MagicMock(command='ask', question="What are the symptoms of PCOS?", lang='en', stream=False)
         mock_query.return_value = []
 
-        with patch('mini_rag_bot.src.app.generate_answer') as mock_generate_answer:
+        with patch('mini_rag_bot.src.pipeline.generate_answer') as mock_generate_answer:
             mock_generate_answer.return_value = {
                 "answer": "The symptoms of PCOS include irregular periods, excess androgen, and polycystic ovaries [source: 1].",
                 "citations": ["[1] https://example.com/pcos"]
@@ -26,10 +26,10 @@ class TestEndToEnd(unittest.TestCase):
     @patch('mini_rag_bot.src.retriever.Retriever.query')
     def test_anemia_dietary_advice(self, mock_query, mock_parse_args, mock_print):
         """Test a sample FAQ on anemia dietary advice."""
-        mock_parse_args.return_value = MagicMock(command='ask', question="What to eat for anemia?", lang='en')
+        mock_parse_args.return_value = MagicMock(command='ask', question="What to eat for anemia?", lang='en', stream=False)
         mock_query.return_value = []
 
-        with patch('mini_rag_bot.src.app.generate_answer') as mock_generate_answer:
+        with patch('mini_rag_bot.src.pipeline.generate_answer') as mock_generate_answer:
             mock_generate_answer.return_value = {
                 "answer": "For anemia, it is recommended to eat iron-rich foods like spinach, red meat, and lentils [source: 1].",
                 "citations": ["[1] https://example.com/anemia_diet"]
@@ -42,12 +42,12 @@ class TestEndToEnd(unittest.TestCase):
     @patch('mini_rag_bot.src.retriever.Retriever.query')
     def test_menstrual_hygiene_hindi(self, mock_query, mock_parse_args, mock_print):
         """Test a sample FAQ on menstrual hygiene in Hindi."""
-        mock_parse_args.return_value = MagicMock(command='ask', question="मासिक धर्म स्वच्छता प्रथाएं", lang='hi')
+        mock_parse_args.return_value = MagicMock(command='ask', question="मासिक धर्म स्वच्छता प्रथाएं", lang='hi', stream=False)
         mock_query.return_value = []
 
-        with patch('mini_rag_bot.src.app.translate_to_english') as mock_translate_to_english, \
-             patch('mini_rag_bot.src.app.translate_from_english') as mock_translate_from_english, \
-             patch('mini_rag_bot.src.app.generate_answer') as mock_generate_answer:
+        with patch('mini_rag_bot.src.pipeline.translate_to_english') as mock_translate_to_english, \
+             patch('mini_rag_bot.src.pipeline.translate_from_english') as mock_translate_from_english, \
+             patch('mini_rag_bot.src.pipeline.generate_answer') as mock_generate_answer:
 
             mock_translate_to_english.return_value = "menstrual hygiene practices"
             mock_generate_answer.return_value = {
@@ -0,0 +1,159 @@
+import time
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from langchain.docstore.document import Document
+from mini_rag_bot.src.generator import build_prompt, generate_answer_stream
+from mini_rag_bot.src.context_packer import count_tokens, pack_context
+from mini_rag_bot.src.call_pool import ModelCallPool, PoolSaturatedError, TimeoutError
+from mini_rag_bot.src import model_registry
+
+class FakeChunk:
+    def __init__(self, text):
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            raise ValueError("chunk has no text parts")
+        return self._text
+
+class TestStreamingGeneration(unittest.TestCase):
+
+    @patch('mini_rag_bot.src.generator.get_model')
+    def test_stream_yields_deltas_then_full_result(self, mock_get_model):
+        """Deltas arrive one by one and the final result matches generate_answer's shape."""
+        mock_get_model.return_value.generate_content.return_value = iter(
+            [FakeChunk("PCOS "), FakeChunk(None), FakeChunk("causes irregular periods.")]
+        )
+        context = [Document(page_content="PCOS text", metadata={'source': 'Women.pdf', 'source_type': 'local_document'})]
+
+        streamed = generate_answer_stream(context, "What is PCOS?")
+        self.assertEqual(streamed.citations, ["[1] Women.pdf"])
+
+        self.assertEqual(list(streamed), ["PCOS ", "causes irregular periods."])
+        result = streamed.result()
+        self.assertEqual(result['answer'], "PCOS causes irregular periods.")
+        self.assertEqual(result['source_details'][0]['source'], 'Women.pdf')
+        _, kwargs = mock_get_model.return_value.generate_content.call_args
+        self.assertTrue(kwargs['stream'])
+
+    @patch('mini_rag_bot.src.generator.get_model')
+    def test_stream_without_text_raises(self, mock_get_model):
+        """A stream that ends without text (e.g. safety-blocked) fails like generate_answer does."""
+        mock_get_model.return_value.generate_content.return_value = iter([FakeChunk(None)])
+
+        streamed = generate_answer_stream([], "What is PCOS?")
+        with self.assertRaises(ValueError):
+            list(streamed)
+
+class TestContextPacking(unittest.TestCase):
+
+    def test_overlap_between_chunks_of_one_source_is_sent_once(self):
+        """The 200-character overlap shared by neighbouring chunks is trimmed from the later one."""
+        overlap = "Iron-rich foods include spinach, lentils and red meat. " * 4
+        first = Document(page_content="Anemia is common in pregnancy. " + overlap, metadata={'source': 'Women.pdf'})
+        second = Document(page_content=overlap + "Vitamin C improves absorption.", metadata={'source': 'Women.pdf'})
+        other = Document(page_content=overlap, metadata={'source': 'Other.pdf'})
+
+        packed = pack_context([first, second, other], token_budget=1000)
+
+        self.assertEqual(packed[1][1], "Vitamin C improves absorption.")
+        self.assertEqual(packed[2][1], overlap.strip())
+
+    @patch('mini_rag_bot.src.generator.INPUT_TOKEN_BUDGET', 600)
+    def test_prompt_stays_within_budget_and_citations_match(self):
+        """Lower-ranked documents that do not fit are dropped along with their citation numbers."""
+        context = [
+            Document(page_content=f"Chunk {i} " + "text " * 200, metadata={'source': f'Doc{i}.pdf', 'source_type': 'local_document'})
+            for i in range(5)
+        ]
+
+        prompt, source_details = build_prompt(context, "What is anemia?")
+
+        self.assertLessEqual(count_tokens(prompt), 600)
+        self.assertEqual([detail['source'] for detail in source_details], ['Doc0.pdf'])
+        self.assertNotIn("[Source 2]", prompt)
+
+    @patch('mini_rag_bot.src.generator.INPUT_TOKEN_BUDGET', 50)
+    def test_context_that_does_not_fit_falls_back_to_no_context(self):
+        """When no document fits the budget, the prompt says so instead of leaving Context empty."""
+        context = [Document(page_content="text " * 200, metadata={'source': 'Doc.pdf', 'source_type': 'local_document'})]
+
+        prompt, source_details = build_prompt(context, "What is anemia?")
+
+        self.assertEqual(source_details, [])
+        self.assertIn("No specific context provided.", prompt)
+
+class TestModelCallPool(unittest.TestCase):
+
+    def test_saturated_pool_rejects_immediately(self):
+        """Once workers and queue are full, new calls fail fast instead of waiting."""
+        pool = ModelCallPool(max_workers=1, max_queued=1)
+        release = threading.Event()
+        pool.submit(release.wait)
+        pool.submit(release.wait)
+
+        start_time = time.time()
+        with self.assertRaises(PoolSaturatedError):
+            pool.submit(release.wait)
+        self.assertLess(time.time() - start_time, 0.1)
+        self.assertEqual(pool.metrics()["in_flight"], 1)
+        self.assertEqual(pool.metrics()["queued"], 1)
+        self.assertEqual(pool.metrics()["rejected"], 1)
+        release.set()
+        pool.shutdown()
+
+    def test_timed_out_queued_call_never_runs(self):
+        """A call still queued at its deadline is cancelled and its slot is freed."""
+        pool = ModelCallPool(max_workers=1, max_queued=1)
+        release = threading.Event()
+        pool.submit(release.wait)
+        queued_call = MagicMock()
+
+        with self.assertRaises(TimeoutError):
+            pool.call_with_deadline(queued_call, timeout=0.05)
+        release.set()
+        pool.shutdown()
+
+        queued_call.assert_not_called()
+        self.assertEqual(pool.metrics()["cancelled"], 1)
+        self.assertEqual(pool.metrics()["queued"], 0)
+
+    def test_deadline_is_passed_on_to_the_call(self):
+        """The call receives the time left, so the SDK request can abort on its own."""
+        pool = ModelCallPool(max_workers=1, max_queued=0)
+        remaining = pool.call_with_deadline(lambda seconds: seconds, timeout=5)
+        self.assertTrue(0 < remaining <= 5)
+        pool.shutdown()
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        model_registry._configured_api_key = None
+        model_registry._models.clear()
+
+    @patch.dict('os.environ', {'GEMINI_API_KEY': 'test-key-1234567890'})
+    @patch('mini_rag_bot.src.model_registry.genai')
+    def test_sdk_is_configured_once_and_models_are_reused(self, mock_genai):
+        """Repeated lookups share one configure call and one model per config."""
+        mock_genai.GenerativeModel.side_effect = lambda name, generation_config=None: MagicMock()
+        first = model_registry.get_model('gemini-2.5-flash', {'temperature': 0.3})
+        second = model_registry.get_model('gemini-2.5-flash', {'temperature': 0.3})
+        other = model_registry.get_model('gemini-2.5-flash')
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        mock_genai.configure.assert_called_once_with(api_key='test-key-1234567890')
+
+    def test_latencies_are_recorded_per_model(self):
+        """Each model gets its own latency histogram."""
+        model_registry.record_latency('test-model', 0.3)
+        model_registry.record_latency('test-model', 4.0)
+
+        histogram = model_registry.latency_histograms()['test-model']
+        self.assertEqual(histogram.snapshot()['count'], 2)
+        self.assertEqual(histogram.quantile(0.5), 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
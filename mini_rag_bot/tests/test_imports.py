@@ -0,0 +1,37 @@
+import os
+import sys
+import json
+import unittest
+import subprocess
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEAVY_MODULES = ["chromadb", "langchain", "langchain_community", "langchain_tavily", "google.generativeai", "sentence_transformers", "bs4", "pypdf", "torch"]
+
+def _run_python(code, **env):
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PACKAGE_ROOT, capture_output=True, text=True, timeout=120,
+        env=dict(os.environ, **env)
+    )
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_importing_the_cli_loads_no_heavy_dependencies(self):
+        """Heavy SDKs are imported by the commands that use them, not by the CLI module."""
+        result = _run_python(
+            "import sys, json, mini_rag_bot.src.app\n"
+            f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(json.loads(result.stdout.strip().splitlines()[-1]), [])
+        self.assertEqual(result.stdout.strip().splitlines()[:-1], [], "nothing is printed at import time")
+
+    def test_import_report_lists_module_costs_on_exit(self):
+        """With MINI_RAG_IMPORT_REPORT set, per-module import times go to stderr."""
+        result = _run_python("import mini_rag_bot.src.app", MINI_RAG_IMPORT_REPORT="1")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("📦 Import report", result.stderr)
+        self.assertIn("mini_rag_bot.src.resources", result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import os
+import unittest
+import tempfile
+from unittest.mock import MagicMock, patch
+from langchain.docstore.document import Document
+from mini_rag_bot.src.ingest import IngestCheckpoint, ingest_files, stream_chunks_to_collection
+from mini_rag_bot.src.loaders import iter_pdf_pages, load_pdf
+from mini_rag_bot.src.resources import registry
+from mini_rag_bot.src.splitter import character_text_splitter, iter_split, split_text
+from mini_rag_bot.src.vector_store import chunk_id
+from mini_rag_bot.src.lexical_index import BM25Index
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text))] for text in texts]
+
+class FakeCollection:
+    """In-memory stand-in for the parts of a Chroma collection that ingest uses."""
+
+    def __init__(self):
+        self.records = {}
+        self.add_calls = []
+
+    def get(self, ids=None, where=None, include=None):
+        if ids is not None:
+            return {'ids': [i for i in ids if i in self.records]}
+        return {'ids': [i for i, meta in self.records.items() if meta['source'] == where['source']]}
+
+    def add(self, embeddings, documents, metadatas, ids):
+        self.add_calls.append(ids)
+        self.records.update(zip(ids, metadatas))
+
+    def delete(self, ids):
+        for doc_id in ids:
+            del self.records[doc_id]
+
+def make_chunks(count, source="guide.pdf"):
+    return [Document(page_content=f"chunk {i}", metadata={"source": source}) for i in range(count)]
+
+class TestStreamingIngest(unittest.TestCase):
+
+    @patch('builtins.print')
+    def test_chunks_are_written_in_batches(self, mock_print):
+        """Each batch is embedded and written to the collection on its own."""
+        collection = FakeCollection()
+        stats = stream_chunks_to_collection(collection, iter(make_chunks(5)), FakeEmbeddings(), batch_size=2)
+
+        self.assertEqual(len(collection.add_calls), 3)
+        self.assertEqual(stats.chunks_written, 5)
+        written_ids = [i for ids in collection.add_calls for i in ids]
+        self.assertEqual(written_ids, [chunk_id("guide.pdf", f"chunk {i}") for i in range(5)])
+
+    @patch('builtins.print')
+    def test_interrupted_run_resumes_from_checkpoint(self, mock_print):
+        """A rerun after a crash only writes the chunks that were not saved yet."""
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            collection = FakeCollection()
+            collection.add = MagicMock(side_effect=[None, RuntimeError("killed")])
+            checkpoint = IngestCheckpoint("guide.pdf", "v1", checkpoint_dir)
+            with self.assertRaises(RuntimeError):
+                stream_chunks_to_collection(collection, make_chunks(5), FakeEmbeddings(), batch_size=2, checkpoint=checkpoint)
+            self.assertEqual(checkpoint.load(), 2)
+
+            embeddings = FakeEmbeddings()
+            stats = stream_chunks_to_collection(FakeCollection(), make_chunks(5), embeddings, batch_size=2, checkpoint=checkpoint)
+
+            self.assertEqual(embeddings.embedded, ["chunk 2", "chunk 3", "chunk 4"])
+            self.assertEqual(stats.chunks_resumed, 2)
+            self.assertEqual(checkpoint.load(), 0)
+
+    @patch('builtins.print')
+    def test_reingest_only_embeds_changed_chunks(self, mock_print):
+        """Unchanged chunks are skipped and chunks dropped from the new version are deleted."""
+        collection = FakeCollection()
+        stream_chunks_to_collection(collection, make_chunks(3), FakeEmbeddings(), batch_size=2)
+
+        new_version = make_chunks(2) + [Document(page_content="rewritten", metadata={"source": "guide.pdf"})]
+        embeddings = FakeEmbeddings()
+        stats = stream_chunks_to_collection(collection, new_version, embeddings, batch_size=2)
+
+        self.assertEqual(embeddings.embedded, ["rewritten"])
+        self.assertEqual((stats.chunks_written, stats.chunks_skipped, stats.chunks_deleted), (1, 2, 1))
+        self.assertNotIn(chunk_id("guide.pdf", "chunk 2"), collection.records)
+        self.assertEqual(stats.changed_sources, {"guide.pdf"})
+
+    @patch('builtins.print')
+    def test_lexical_index_follows_the_collection(self, mock_print):
+        """The BM25 index gains new chunks, loses pruned ones and is saved after the stream."""
+        with tempfile.TemporaryDirectory() as index_dir:
+            index = BM25Index(os.path.join(index_dir, "guide.bm25.json.gz"))
+            collection = FakeCollection()
+            stream_chunks_to_collection(collection, make_chunks(3), FakeEmbeddings(), batch_size=2, lexical_index=index)
+            new_version = make_chunks(2) + [Document(page_content="rewritten", metadata={"source": "guide.pdf"})]
+            stream_chunks_to_collection(collection, new_version, FakeEmbeddings(), batch_size=2, lexical_index=index)
+
+            reloaded = BM25Index(index.path)
+            self.assertEqual(set(reloaded._docs), set(collection.records))
+            self.assertEqual(reloaded.search("rewritten")[0][0], chunk_id("guide.pdf", "rewritten"))
+
+    @patch('builtins.print')
+    def test_checkpoint_for_changed_source_is_ignored(self, mock_print):
+        """Progress recorded for an older version of a file is not reused."""
+        with tempfile.TemporaryDirectory() as checkpoint_dir:
+            IngestCheckpoint("guide.pdf", "v1", checkpoint_dir).save(4)
+            self.assertEqual(IngestCheckpoint("guide.pdf", "v2", checkpoint_dir).load(), 0)
+
+class TestBulkIngest(unittest.TestCase):
+
+    def setUp(self):
+        # Split by characters, so no tokenizer has to be loaded here or in the worker processes
+        registry.register("text_splitter", character_text_splitter())
+        self.addCleanup(registry.shutdown)
+        environ_patcher = patch.dict(os.environ, {'SPLITTER_TOKENIZER': ""})
+        environ_patcher.start()
+        self.addCleanup(environ_patcher.stop)
+
+    @patch('builtins.print')
+    def test_files_are_parsed_in_worker_processes(self, mock_print):
+        """Every file is reported once, and a broken file does not stop the others."""
+        repo_root = os.path.join(os.path.dirname(__file__), '..', '..')
+        pdf_path = os.path.join(repo_root, 'Women.pdf')
+        missing_path = os.path.join(repo_root, 'missing.pdf')
+        collection = FakeCollection()
+        progress = []
+
+        with tempfile.TemporaryDirectory() as checkpoint_dir, \
+             patch('mini_rag_bot.src.ingest.CHECKPOINT_DIR', checkpoint_dir):
+            stats, results = ingest_files(
+                [pdf_path, missing_path],
+                collection,
+                FakeEmbeddings(),
+                workers=2,
+                source_names={pdf_path: "Women.pdf"},
+                progress_callback=progress.append
+            )
+
+        self.assertEqual(len(progress), 2)
+        by_path = {result.file_path: result for result in results}
+        self.assertIsNotNone(by_path[missing_path].error)
+        self.assertGreater(by_path[pdf_path].chunks, 0)
+        self.assertEqual(stats.chunks_written, len(collection.records))
+        self.assertTrue(all(meta['source'] == "Women.pdf" for meta in collection.records.values()))
+
+    @patch('builtins.print')
+    @patch('mini_rag_bot.src.ingest.file_fingerprint', side_effect=lambda file_path: file_path)
+    @patch('mini_rag_bot.src.ingest.count_pages', return_value=1)
+    @patch('mini_rag_bot.src.ingest.iter_file_chunks')
+    def test_lexical_index_is_saved_once_per_run(self, mock_chunks, mock_pages, mock_fingerprint, mock_print):
+        """The BM25 index is rewritten once at the end, not after every file."""
+        mock_chunks.side_effect = lambda file_path, source=None: iter(make_chunks(3, source=file_path))
+        lexical_index = MagicMock()
+
+        with tempfile.TemporaryDirectory() as checkpoint_dir, \
+             patch('mini_rag_bot.src.ingest.CHECKPOINT_DIR', checkpoint_dir):
+            stats, results = ingest_files(
+                ["a.pdf", "b.pdf", "c.pdf"], FakeCollection(), FakeEmbeddings(), workers=1, lexical_index=lexical_index
+            )
+
+        self.assertEqual(stats.chunks_written, 9)
+        self.assertEqual(lexical_index.add.call_count, 9)
+        lexical_index.save.assert_called_once()
+
+    def test_page_ranges_are_extracted_in_parallel_and_in_order(self):
+        """Parallel extraction yields the same pages, and so the same chunks, as a single-process load."""
+        pdf_path = os.path.join(os.path.dirname(__file__), '..', '..', 'C. Women and health.pdf')
+        expected = load_pdf(pdf_path)
+
+        with patch('mini_rag_bot.src.loaders.PDF_PARALLEL_MIN_PAGES', 1):
+            pages = list(iter_pdf_pages(pdf_path, workers=2, pages_per_range=3))
+
+        self.assertEqual([page.metadata['page'] for page in pages], list(range(len(expected))))
+        self.assertEqual([page.page_content for page in pages], [page.page_content for page in expected])
+        chunks = list(iter_split(iter(pages)))
+        self.assertEqual([chunk.page_content for chunk in chunks], [chunk.page_content for chunk in split_text(expected)])
+
+if __name__ == '__main__':
+    unittest.main()
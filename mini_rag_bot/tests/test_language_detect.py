@@ -0,0 +1,44 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from mini_rag_bot.src.language_detect import detect_language
+from mini_rag_bot.src.app import ask_question
+
+class TestLanguageDetection(unittest.TestCase):
+
+    def test_scripts_and_stopwords(self):
+        """Non-Latin scripts are recognised by range, Latin text by function words."""
+        self.assertEqual(detect_language("मासिक धर्म स्वच्छता प्रथाएं"), "hi")
+        self.assertEqual(detect_language("মাসিক স্বাস্থ্য"), "bn")
+        self.assertEqual(detect_language("¿Cuáles son los síntomas de la anemia?"), "es")
+        self.assertEqual(detect_language("What are the symptoms of PCOS?", "hi"), "en")
+
+    def test_mixed_script_and_fallback(self):
+        """Mostly-English questions stay English; signal-free text uses the selection."""
+        self.assertEqual(detect_language("What is the treatment for PCOS जल्दी?", "hi"), "en")
+        self.assertEqual(detect_language("PCOS के लक्षण क्या हैं?"), "hi")
+        self.assertEqual(detect_language("PCOS", "bn"), "bn")
+        self.assertEqual(detect_language("12345", "hi"), "hi")
+
+    @patch('builtins.print')
+    @patch('mini_rag_bot.src.pipeline.get_shared_answer_cache')
+    @patch('mini_rag_bot.src.pipeline.get_shared_retriever')
+    @patch('mini_rag_bot.src.pipeline.generate_answer')
+    @patch('mini_rag_bot.src.pipeline.translate_from_english')
+    @patch('mini_rag_bot.src.pipeline.translate_to_english')
+    def test_mislabeled_english_question_skips_translation(self, mock_to_english, mock_from_english,
+                                                           mock_generate, mock_retriever, mock_cache, mock_print):
+        """An English question asked with --lang hi makes no translation calls."""
+        mock_retriever.return_value.query.return_value = []
+        mock_generate.return_value = {'answer': "Answer", 'citations': []}
+
+        with patch('mini_rag_bot.src.pipeline.detect_language') as mock_pipeline_detect:
+            ask_question("What are the symptoms of anemia?", lang='hi')
+
+        # Detected once, by ask_question
+        mock_pipeline_detect.assert_not_called()
+        mock_to_english.assert_not_called()
+        mock_from_english.assert_not_called()
+        mock_generate.assert_called_once_with([], "What are the symptoms of anemia?")
+
+if __name__ == '__main__':
+    unittest.main()
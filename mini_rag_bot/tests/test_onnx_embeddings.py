@@ -0,0 +1,80 @@
+import os
+import argparse
+import tempfile
+import unittest
+import importlib.util
+from unittest.mock import patch
+from mini_rag_bot.src.app import main
+from mini_rag_bot.src.embeddings import get_embedding_function
+from mini_rag_bot.src.onnx_embeddings import cosine_parity
+
+HAS_ONNX_EXPORT = all(importlib.util.find_spec(name) for name in ("onnx", "onnxruntime", "torch", "transformers"))
+
+class TestOnnxEmbeddings(unittest.TestCase):
+
+    def test_parity_report(self):
+        reference = [[1.0, 0.0], [0.0, 1.0]]
+        report = cosine_parity(reference, [[1.0, 0.0], [0.1, 1.0]], min_cosine=0.999)
+        self.assertTrue(report['shape_match'])
+        self.assertGreater(report['mean_cosine'], report['min_cosine'])
+        self.assertAlmostEqual(report['max_drift'], 1 - 1 / (1.01 ** 0.5), places=5)
+        self.assertFalse(report['passed'])
+        self.assertFalse(cosine_parity(reference, [[1.0, 0.0, 0.0]] * 2)['shape_match'])
+
+    def test_unknown_backend_rejected(self):
+        with self.assertRaises(ValueError):
+            get_embedding_function("tensorflow")
+
+    @patch('argparse.ArgumentParser.parse_args')
+    @patch('mini_rag_bot.src.onnx_embeddings.run_comparison_cli')
+    def test_failed_parity_check_fails_the_command(self, mock_compare, mock_parse_args):
+        mock_parse_args.return_value = argparse.Namespace(command="compare-embeddings", model_dir="onnx", output="-", texts=8)
+        mock_compare.return_value = {'parity': {'passed': False}}
+        with self.assertRaises(SystemExit) as raised:
+            main()
+        self.assertNotIn(raised.exception.code, (0, None))
+
+        mock_compare.return_value = {'parity': {'passed': True}}
+        main()
+
+    @unittest.skipUnless(HAS_ONNX_EXPORT, "onnx export needs torch, transformers, onnx and onnxruntime")
+    @patch('builtins.print')
+    def test_exported_model_matches_pytorch(self, mock_print):
+        """A small BERT exported to int8 ONNX gives the same vector shape and nearly the same directions."""
+        import torch
+        import transformers
+        from mini_rag_bot.src.onnx_embeddings import OnnxEmbeddings, export_onnx_model
+
+        words = "[PAD] [UNK] [CLS] [SEP] [MASK] iron anemia pcos women health care period pain".split()
+        texts = ["iron anemia", "women health care", "period pain " * 200, "pcos"]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_dir = os.path.join(tmp_dir, "bert")
+            os.makedirs(model_dir)
+            with open(os.path.join(model_dir, "vocab.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(words))
+            tokenizer = transformers.BertTokenizerFast(vocab_file=os.path.join(model_dir, "vocab.txt"))
+            tokenizer.save_pretrained(model_dir)
+            torch.manual_seed(0)
+            model = transformers.BertModel(transformers.BertConfig(
+                vocab_size=len(words), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                intermediate_size=64, max_position_embeddings=512
+            )).eval()
+            model.save_pretrained(model_dir)
+
+            onnx_embeddings = OnnxEmbeddings(export_onnx_model(os.path.join(tmp_dir, "onnx"), model_name=model_dir))
+            vectors = onnx_embeddings.embed_documents(texts)
+
+            # Reference: the PyTorch model with sentence-transformers' mean pooling, truncated the same way
+            encoded = tokenizer(texts, padding=True, truncation=True, max_length=256, return_tensors="pt")
+            with torch.no_grad():
+                hidden = model(**encoded).last_hidden_state
+            mask = encoded['attention_mask'].unsqueeze(-1).float()
+            reference = ((hidden * mask).sum(1) / mask.sum(1)).tolist()
+
+        self.assertEqual(len(vectors[0]), 32)
+        # Activation scales are computed per batch, so a lone query differs only in the last digits
+        self.assertTrue(cosine_parity([vectors[1]], [onnx_embeddings.embed_query(texts[1])], min_cosine=0.999)['passed'])
+        self.assertTrue(cosine_parity(reference, vectors, min_cosine=0.98)['passed'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+from mini_rag_bot.src.resources import ResourceRegistry
+
+class TestResourceRegistry(unittest.TestCase):
+
+    def test_resource_is_created_once_across_threads(self):
+        """Concurrent callers share a single lazily created resource."""
+        registry = ResourceRegistry()
+        factory = MagicMock(side_effect=lambda: object())
+        results = []
+
+        def worker():
+            results.append(registry.get_or_create("model", factory))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(factory.call_count, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertIn("model", registry.cold_start_times())
+
+    def test_shutdown_closes_and_forgets_resources(self):
+        """Shutdown runs closers and the next lookup builds a fresh resource."""
+        registry = ResourceRegistry()
+        closer = MagicMock()
+        first = registry.get_or_create("client", object, closer=closer)
+
+        registry.shutdown()
+
+        closer.assert_called_once_with(first)
+        self.assertFalse(registry.is_loaded("client"))
+        self.assertIsNot(registry.get_or_create("client", object), first)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import os
+import time
+import unittest
+import tempfile
+from unittest.mock import MagicMock, patch
+from mini_rag_bot.src.retriever import Retriever, run_sync, web_search_stats
+from mini_rag_bot.src.lexical_index import BM25Index
+from mini_rag_bot.src.reranker import CrossEncoderReranker, mmr_select
+
+def make_retriever(local_delay=0.0, web_delay=0.0, local_distances=(0.2,)):
+    """Build a Retriever around fake Chroma and Tavily handles without touching the registry."""
+    retriever = Retriever.__new__(Retriever)
+    retriever.embedding_function = MagicMock()
+    retriever.embedding_function.embed_query.return_value = [0.1, 0.2]
+
+    def collection_query(**kwargs):
+        time.sleep(local_delay)
+        return {
+            'documents': [["PCOS causes irregular periods."] + [f"PCOS chunk {i}." for i in range(1, len(local_distances))]],
+            'metadatas': [[{'source': 'Women.pdf'} for _ in local_distances]],
+            'distances': [list(local_distances)],
+        }
+    retriever.collection = MagicMock()
+    retriever.collection.query.side_effect = collection_query
+    retriever.lexical_index = None
+    retriever.reranker = None
+
+    def tavily_invoke(query):
+        time.sleep(web_delay)
+        return {'results': [{'url': 'https://example.com/pcos', 'title': 'PCOS', 'content': 'PCOS overview.'}]}
+    retriever.tavily = MagicMock()
+    retriever.tavily.invoke.side_effect = tavily_invoke
+    retriever.tavily_available = True
+    return retriever
+
+class TestConcurrentRetrieval(unittest.TestCase):
+
+    @patch('builtins.print')
+    def test_local_and_web_search_run_concurrently(self, mock_print):
+        """Latency is the slower of the two searches, not their sum."""
+        retriever = make_retriever(local_delay=0.3, web_delay=0.3)
+
+        start_time = time.time()
+        documents = retriever.query("What are the latest PCOS guidelines?")
+        elapsed = time.time() - start_time
+
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual(
+            [doc.metadata['source_type'] for doc in documents],
+            ['local_document', 'web_search']
+        )
+
+    @patch('builtins.print')
+    def test_slow_web_search_does_not_block_local_results(self, mock_print):
+        """A source that misses its deadline is dropped and the other source is still returned."""
+        retriever = make_retriever(web_delay=1.0)
+
+        start_time = time.time()
+        documents = run_sync(retriever.aquery("What are PCOS symptoms?", web_timeout=0.1))
+
+        self.assertLess(time.time() - start_time, 0.5)
+        self.assertEqual([doc.metadata['source'] for doc in documents], ['Women.pdf'])
+
+class TestWebSearchGate(unittest.TestCase):
+
+    @patch('builtins.print')
+    def test_confident_local_results_skip_web_search(self, mock_print):
+        """Two close local hits and no recency cue mean Tavily is never called."""
+        retriever = make_retriever(local_distances=(0.3, 0.5))
+        skipped_before = web_search_stats.snapshot()["skipped_confident"]
+
+        documents = retriever.query("What are PCOS symptoms?")
+
+        retriever.tavily.invoke.assert_not_called()
+        self.assertEqual({doc.metadata['source_type'] for doc in documents}, {'local_document'})
+        self.assertEqual(web_search_stats.snapshot()["skipped_confident"], skipped_before + 1)
+
+    @patch('builtins.print')
+    def test_weak_local_results_fall_back_to_web(self, mock_print):
+        """Distant local hits trigger the web search after the local one."""
+        retriever = make_retriever(local_distances=(1.4, 1.6))
+        fallbacks_before = web_search_stats.snapshot()["searched_after_low_confidence"]
+
+        documents = retriever.query("What are PCOS symptoms?")
+
+        retriever.tavily.invoke.assert_called_once()
+        self.assertIn('web_search', [doc.metadata['source_type'] for doc in documents])
+        self.assertEqual(web_search_stats.snapshot()["searched_after_low_confidence"], fallbacks_before + 1)
+
+class TestBatchRetrieval(unittest.TestCase):
+
+    @patch('builtins.print')
+    def test_batch_uses_one_embedding_call_and_one_collection_query(self, mock_print):
+        """Questions share the model call and Chroma query; web search is gated per question."""
+        retriever = make_retriever(local_distances=(0.3, 0.5))
+        retriever.embedding_function.embed_queries.return_value = [[0.1, 0.2], [0.3, 0.4]]
+        retriever.collection.query.side_effect = lambda **kwargs: {
+            'documents': [["PCOS causes irregular periods.", "PCOS chunk 1."], ["Anemia chunk."]],
+            'metadatas': [[{'source': 'Women.pdf'}, {'source': 'Women.pdf'}], [{'source': 'Anemia.pdf'}]],
+            'distances': [[0.3, 0.5], [1.5]],
+        }
+
+        results = retriever.query_batch(["What are PCOS symptoms?", "What causes anemia?"])
+
+        retriever.embedding_function.embed_queries.assert_called_once_with(["What are PCOS symptoms?", "What causes anemia?"])
+        self.assertEqual(retriever.collection.query.call_count, 1)
+        self.assertEqual(len(retriever.collection.query.call_args.kwargs['query_embeddings']), 2)
+        self.assertEqual({doc.metadata['source_type'] for doc in results[0]}, {'local_document'})
+        self.assertIn('web_search', [doc.metadata['source_type'] for doc in results[1]])
+        retriever.tavily.invoke.assert_called_once()
+
+class TestHybridRetrieval(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "women_health.bm25.json.gz")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_index_round_trips_and_prunes_stale_chunks(self):
+        """The compressed index reloads with the same ranking and drops removed chunks."""
+        index = BM25Index(self.path)
+        index.add("a", "An IUD is a long-acting contraceptive.", "Women.pdf")
+        index.add("b", "Iron deficiency causes anemia.", "Women.pdf")
+        index.add("c", "HPV vaccination prevents cervical cancer.", "Other.pdf")
+        index.save()
+
+        reloaded = BM25Index(self.path)
+        self.assertEqual([doc_id for doc_id, _ in reloaded.search("what is an IUD?")], ["a"])
+        self.assertEqual(reloaded.retain_source("Women.pdf", {"b"}), 1)
+        self.assertEqual(len(reloaded), 2)
+        self.assertEqual(reloaded.search("IUD"), [])
+
+    @patch('builtins.print')
+    def test_keyword_match_missed_by_vectors_is_fused_in(self, mock_print):
+        """A chunk found only by BM25 is fetched from Chroma and ranked alongside vector hits."""
+        retriever = make_retriever()
+        retriever.tavily_available = False
+        retriever.lexical_index = BM25Index(self.path)
+        retriever.lexical_index.add("hpv-1", "HPV is the main cause of cervical cancer.", "HPV.pdf")
+        retriever.collection.get.return_value = {
+            'ids': ["hpv-1"],
+            'documents': ["HPV is the main cause of cervical cancer."],
+            'metadatas': [{'source': 'HPV.pdf'}],
+        }
+
+        documents = retriever.query("Is HPV dangerous?")
+
+        self.assertEqual(sorted(doc.metadata['source'] for doc in documents), ['HPV.pdf', 'Women.pdf'])
+        hpv = next(doc for doc in documents if doc.metadata['source'] == 'HPV.pdf')
+        self.assertIsNone(hpv.metadata['score'])
+        self.assertGreater(hpv.metadata['bm25_score'], 0)
+
+class TestReranking(unittest.TestCase):
+
+    def test_mmr_drops_near_duplicates_and_prefers_novel_chunks(self):
+        """An overlapping copy of the top chunk loses to a less relevant but different one."""
+        relevance = [1.0, 0.95, 0.6]
+        embeddings = [[1.0, 0.0], [0.999, 0.02], [0.3, 0.95]]
+        self.assertEqual(mmr_select(relevance, embeddings, 3), [0, 2])
+        self.assertEqual(mmr_select(relevance, [None, None, None], 2), [0, 1])
+
+    @patch('builtins.print')
+    def test_cross_encoder_stops_at_its_budget(self, mock_print):
+        """Scored chunks are reordered; chunks left when the budget runs out keep their place."""
+        reranker = CrossEncoderReranker.__new__(CrossEncoderReranker)
+        reranker.budget_ms = 50
+        reranker.batch_size = 2
+        reranker.budget_exhausted = 0
+
+        def predict(pairs):
+            time.sleep(0.06)
+            return [len(text) for _, text in pairs]
+        reranker.model = MagicMock()
+        reranker.model.predict.side_effect = predict
+
+        self.assertEqual(reranker.rerank("q", ["a", "ccc", "bb", "dddd"]), [1, 0, 2, 3])
+        self.assertEqual(reranker.budget_exhausted, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import time
+import asyncio
+import unittest
+from unittest.mock import MagicMock, patch
+from aiohttp.test_utils import AioHTTPTestCase
+from mini_rag_bot.src.generator import StreamedAnswer
+from mini_rag_bot.src.server import create_app
+
+class TestRagServer(AioHTTPTestCase):
+
+    async def get_application(self):
+        return create_app(warm=False)
+
+    def setUp(self):
+        patchers = [
+            patch('builtins.print'),
+            patch('mini_rag_bot.src.server.shutdown_resources'),
+            patch('mini_rag_bot.src.pipeline.get_shared_retriever'),
+        ]
+        mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        self.retriever = mocks[2].return_value
+        self.retriever.query.return_value = []
+        super().setUp()
+
+    @patch('mini_rag_bot.src.pipeline.generate_answer')
+    async def test_identical_concurrent_questions_share_one_generation(self, mock_generate):
+        """Duplicates in flight are coalesced into one retrieval and one model call."""
+        def slow_answer(context, question):
+            time.sleep(0.2)
+            return {'answer': "PCOS is a hormonal disorder.", 'citations': []}
+        mock_generate.side_effect = slow_answer
+
+        responses = await asyncio.gather(*[
+            self.client.post("/ask", json={'question': "What is PCOS?"}) for _ in range(5)
+        ])
+        bodies = [await response.json() for response in responses]
+
+        self.assertEqual({body['answer'] for body in bodies}, {"PCOS is a hormonal disorder."})
+        self.assertEqual(mock_generate.call_count, 1)
+        self.assertEqual(self.retriever.query.call_count, 1)
+        metrics = await (await self.client.get("/metrics")).json()
+        self.assertEqual(metrics['requests']['coalesced'], 4)
+
+    @patch('mini_rag_bot.src.pipeline.generate_answer_stream')
+    async def test_streams_of_the_same_question_share_one_generation(self, mock_stream):
+        """Every client receives all deltas and the final answer from a single stream."""
+        def slow_chunks():
+            for text in ["Iron ", "helps."]:
+                time.sleep(0.1)
+                yield MagicMock(text=text)
+        mock_stream.side_effect = lambda context, question: StreamedAnswer(slow_chunks(), [], [])
+
+        async def read_stream():
+            response = await self.client.post("/ask/stream", json={'question': "What helps anemia?"})
+            return [json.loads(line) for line in (await response.text()).splitlines()]
+
+        streams = await asyncio.gather(read_stream(), read_stream())
+
+        for lines in streams:
+            self.assertEqual([line['delta'] for line in lines[:-1]], ["Iron ", "helps."])
+            self.assertEqual(lines[-1]['answer'], "Iron helps.")
+            self.assertTrue(lines[-1]['done'])
+        self.assertEqual(mock_stream.call_count, 1)
+
+    async def test_bad_requests_and_health(self):
+        """A missing question is a 400; the health check answers without loading anything."""
+        response = await self.client.post("/ask", json={})
+        self.assertEqual(response.status, 400)
+        response = await self.client.get("/healthz")
+        self.assertEqual((await response.json())['status'], "ok")
+
+    @patch('mini_rag_bot.src.pipeline.generate_answer')
+    async def test_request_id_is_echoed_and_stages_are_exported(self, mock_generate):
+        """The caller's request ID comes back and the request's stages show up in the Prometheus export."""
+        mock_generate.return_value = {'answer': "Menopause is the end of menstrual cycles.", 'citations': []}
+
+        response = await self.client.post("/ask", json={'question': "What is menopause?"}, headers={'X-Request-ID': "abc123"})
+        self.assertEqual(response.headers['X-Request-ID'], "abc123")
+        self.assertEqual((await response.json())['request_id'], "abc123")
+
+        metrics = await (await self.client.get("/metrics/prometheus")).text()
+        self.assertIn('rag_stage_duration_seconds_count{stage="ask"}', metrics)
+        self.assertIn('rag_stage_duration_seconds_count{stage="generate"}', metrics)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import types
+import unittest
+from unittest.mock import patch
+from langchain.docstore.document import Document
+from mini_rag_bot.src import splitter
+from mini_rag_bot.src.resources import registry
+
+class WordTokenizer:
+    """Counts whitespace-separated words, standing in for the MiniLM tokenizer."""
+
+    def encode(self, text, add_special_tokens=True, verbose=True):
+        return text.split()
+
+class TestSplitter(unittest.TestCase):
+
+    def setUp(self):
+        registry.register("text_splitter", splitter.token_text_splitter(WordTokenizer()))
+        self.addCleanup(registry.shutdown)
+
+    def test_chunks_fit_the_token_limit_and_keep_their_offsets(self):
+        text = " ".join(f"word{i}" for i in range(1000))
+        page = Document(page_content=text, metadata={'source': "guide.pdf", 'page': 3})
+
+        chunks = splitter.split_text([page])
+
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk.page_content.split()), splitter.CHUNK_TOKENS)
+            self.assertEqual(chunk.metadata['page'], 3)
+            start = chunk.metadata['start_index']
+            self.assertEqual(text[start:start + len(chunk.page_content)], chunk.page_content)
+
+    def test_pages_are_split_lazily(self):
+        """Chunks of the first page are yielded before the next page is read."""
+        pages_read = []
+
+        def pages():
+            for number in range(3):
+                pages_read.append(number)
+                yield Document(page_content=f"Page {number} text.", metadata={'page': number})
+
+        chunks = splitter.iter_split(pages())
+        self.assertIsInstance(chunks, types.GeneratorType)
+        self.assertEqual(next(chunks).metadata['page'], 0)
+        self.assertEqual(pages_read, [0])
+
+    def test_missing_tokenizer_is_an_error(self):
+        """The tokenizer is only read from local files, and chunks never silently switch to characters."""
+        with patch('transformers.AutoTokenizer.from_pretrained', side_effect=OSError("not cached")) as mock_load:
+            with self.assertRaises(RuntimeError):
+                splitter.create_text_splitter()
+        self.assertTrue(mock_load.call_args.kwargs['local_files_only'])
+        with patch.object(splitter, 'SPLITTER_TOKENIZER', ""):
+            self.assertEqual(splitter.create_text_splitter()._chunk_size, splitter.CHUNK_CHARS)
+
+if __name__ == '__main__':
+    unittest.main()
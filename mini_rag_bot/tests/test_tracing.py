@@ -0,0 +1,54 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+from mini_rag_bot.src import tracing
+from mini_rag_bot.src.metrics import Counter, Histogram, format_prometheus
+from mini_rag_bot.src.retriever import Retriever, run_sync
+from mini_rag_bot.src.tracing import current_request_id, span, trace_request
+
+class TestTracing(unittest.TestCase):
+
+    def test_sampled_request_writes_its_span_tree(self):
+        """Spans nest under the request, including ones run on the retriever's search threads."""
+        def search():
+            with span("local_search", documents=3):
+                return current_request_id()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            trace_log = os.path.join(tmp_dir, "traces.jsonl")
+            with patch.object(tracing, 'TRACE_LOG_PATH', trace_log), patch.object(tracing, 'TRACE_SAMPLE_RATE', 1.0):
+                with trace_request("ask", "req-1", lang="en"):
+                    with span("retrieve") as retrieve_span:
+                        seen_id = run_sync(Retriever._with_deadline(None, "Local search", 5, search))
+                        retrieve_span.set(documents=3)
+            with open(trace_log, encoding="utf-8") as f:
+                traces = [json.loads(line) for line in f]
+
+        self.assertEqual(seen_id, "req-1")
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces[0]['request_id'], "req-1")
+        self.assertEqual(traces[0]['attributes'], {'lang': "en"})
+        retrieve = traces[0]['children'][0]
+        self.assertEqual((retrieve['name'], retrieve['attributes']), ("retrieve", {'documents': 3}))
+        self.assertEqual(retrieve['children'][0]['name'], "local_search")
+        self.assertIn('rag_stage_duration_seconds_count{stage="local_search"}', tracing.prometheus_text())
+
+    def test_prometheus_text_format(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 2.0):
+            histogram.observe(value)
+        counter = Counter()
+        counter.inc(3)
+
+        text = format_prometheus("rag_stage_duration_seconds", "histogram", "Stage durations.", [({'stage': "ask"}, histogram)])
+        self.assertIn("# TYPE rag_stage_duration_seconds histogram", text)
+        self.assertIn('rag_stage_duration_seconds_bucket{le="0.1",stage="ask"} 1', text)
+        self.assertIn('rag_stage_duration_seconds_bucket{le="+Inf",stage="ask"} 3', text)
+        self.assertIn('rag_stage_duration_seconds_count{stage="ask"} 3', text)
+        text = format_prometheus("rag_cache_lookups_total", "counter", "Lookups.", [({'cache': 'answer', 'result': 'hit'}, counter)])
+        self.assertIn('rag_cache_lookups_total{cache="answer",result="hit"} 3.0', text)
+
+if __name__ == '__main__':
+    unittest.main()